@@ -19,6 +19,7 @@ from app.services.maintenance_notification_service import (
     send_scheduled_maintenance_reminders,
 )
 from app.services.notification_service import VAPIDNotConfiguredError
+from app.services.qa_session_service import backfill_missing_summaries
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +65,15 @@ class CronResponse(BaseModel):
     errors: list[str] = []
 
 
+class SummaryBackfillResponse(BaseModel):
+    """Session summary backfill job response schema."""
+
+    success: bool
+    message: str
+    sessions_processed: int = 0
+    summaries_saved: int = 0
+
+
 class ErrorResponse(BaseModel):
     """Error response schema."""
 
@@ -213,3 +223,67 @@ async def send_scheduled_reminders(
                 "details": str(e),
             },
         ) from e
+
+
+@router.post(
+    "/backfill-session-summaries",
+    response_model=SummaryBackfillResponse,
+    responses={
+        401: {"model": ErrorResponse},
+        403: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
+    summary="Backfill missing QA session summaries",
+    description="Cron job endpoint to generate titles for QA sessions whose "
+    "background summary was never saved. Failed sessions are retried with "
+    "backoff. Should be called every 30 minutes by Cloud Scheduler.",
+)
+async def backfill_session_summaries(
+    x_cron_secret: Annotated[str | None, Header()] = None,
+):
+    """
+    Cronジョブ用: 保存されなかったQAセッション要約を再生成。
+
+    add_message 後のバックグラウンド要約がワーカー終了や Gemini の失敗で
+    保存されなかったセッションを対象にする。
+
+    Cloud Schedulerから30分ごとに実行されることを想定。
+
+    Args:
+        x_cron_secret: Cron認証用シークレットキー（X-Cron-Secret ヘッダー）
+
+    Returns:
+        SummaryBackfillResponse with backfill results
+
+    Raises:
+        HTTPException: If authentication fails or the backfill fails
+    """
+    _verify_cron_secret(x_cron_secret)
+
+    logger.info("Starting session summary backfill job")
+
+    try:
+        results = await backfill_missing_summaries()
+    except Exception as e:
+        logger.error(f"Unexpected error in session summary backfill: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "error": "Internal server error",
+                "code": "INTERNAL_ERROR",
+                "details": str(e),
+            },
+        ) from e
+
+    logger.info(
+        f"Session summary backfill completed: "
+        f"processed={results['sessions_processed']}, "
+        f"saved={results['summaries_saved']}"
+    )
+
+    return SummaryBackfillResponse(
+        success=True,
+        message="Session summaries backfilled successfully",
+        sessions_processed=results["sessions_processed"],
+        summaries_saved=results["summaries_saved"],
+    )
@@ -57,12 +57,14 @@ async def supabase_health_check():
 
     # Test connection using Secret Key (bypasses RLS for health check)
     try:
-        from supabase import create_client
+        from app.services.supabase_client import get_supabase_client
 
-        # Use secret key to bypass RLS for health check
+        # Reuse the backend's client (secret key, bypasses RLS) so the health
+        # check exercises the same connection pool as the API
         # In production, this endpoint should be protected or removed
-        key_to_use = settings.supabase_secret_key or settings.supabase_publishable_key
-        supabase = create_client(settings.supabase_url, key_to_use)
+        supabase = get_supabase_client()
+        if supabase is None:
+            raise RuntimeError("Failed to create Supabase client")
         result["checks"]["connection"] = True
         result["details"]["using_secret_key"] = bool(settings.supabase_secret_key)
 
@@ -1,5 +1,6 @@
 """QA (Question & Answer) API routes."""
 
+import asyncio
 import logging
 from typing import Annotated
 from uuid import UUID
@@ -26,8 +27,7 @@ from app.schemas.tier import TierLimitExceededError
 from app.services.pdf_storage import MANUALS_BUCKET
 from app.services.qa_abuse_service import (
     check_user_restriction,
-    record_violation,
-    update_restriction,
+    record_violation_and_restrict,
     validate_question,
 )
 from app.services.qa_chat_service import answer_question
@@ -90,12 +90,12 @@ async def get_shared_appliance(shared_appliance_id: str) -> dict:
         HTTPException: If appliance not found
     """
     supabase = get_supabase_client()
-    result = (
+    result = await asyncio.to_thread(
         supabase.table("shared_appliances")
         .select("*")
         .eq("id", shared_appliance_id)
         .single()
-        .execute()
+        .execute
     )
     if not result.data:
         raise HTTPException(status_code=404, detail="Shared appliance not found")
@@ -221,8 +221,16 @@ async def ask_question(
     user_id = _get_user_id_from_header(x_user_id)
     user_id_str = str(user_id)
 
-    # 2. Check if user is restricted
-    restriction = await check_user_restriction(user_id_str)
+    # 2. Check if user is restricted (appliance is fetched concurrently)
+    restriction, appliance = await asyncio.gather(
+        check_user_restriction(user_id_str),
+        get_shared_appliance(shared_appliance_id),
+        return_exceptions=True,
+    )
+    if isinstance(restriction, BaseException):
+        # 制限状態を確認できない場合は制限なしとして続行する
+        logger.error(f"Failed to check QA restriction: {restriction!r}")
+        restriction = None
     if restriction:
         error_response = QABlockedError(
             error="QA機能は現在制限されています",
@@ -235,7 +243,8 @@ async def ask_question(
             content=error_response.model_dump(mode="json"),
         )
 
-    appliance = await get_shared_appliance(shared_appliance_id)
+    if isinstance(appliance, BaseException):
+        raise appliance
 
     # 3. Validate question
     is_valid, error_info = await validate_question(
@@ -247,14 +256,13 @@ async def ask_question(
 
     if not is_valid and error_info:
         # Record violation and update restriction
-        await record_violation(
+        await record_violation_and_restrict(
             user_id_str,
             shared_appliance_id,
             request.question,
             error_info["violation_type"],
             error_info["detection_method"],
         )
-        await update_restriction(user_id_str)
 
         error_response = InvalidQuestionError(
             error="この質問は製品に関連していないため回答できません",
@@ -326,8 +334,16 @@ async def ask_question_stream(
     user_id = _get_user_id_from_header(x_user_id)
     user_id_str = str(user_id)
 
-    # 2. Check if user is restricted
-    restriction = await check_user_restriction(user_id_str)
+    # 2. Check if user is restricted (appliance is fetched concurrently)
+    restriction, appliance = await asyncio.gather(
+        check_user_restriction(user_id_str),
+        get_shared_appliance(shared_appliance_id),
+        return_exceptions=True,
+    )
+    if isinstance(restriction, BaseException):
+        # 制限状態を確認できない場合は制限なしとして続行する
+        logger.error(f"Failed to check QA restriction: {restriction!r}")
+        restriction = None
     if restriction:
         error_response = QABlockedError(
             error="QA機能は現在制限されています",
@@ -354,7 +370,8 @@ async def ask_question_stream(
             ).model_dump(),
         )
 
-    appliance = await get_shared_appliance(shared_appliance_id)
+    if isinstance(appliance, BaseException):
+        raise appliance
 
     # 3. Validate question
     is_valid, error_info = await validate_question(
@@ -366,14 +383,13 @@ async def ask_question_stream(
 
     if not is_valid and error_info:
         # Record violation and update restriction
-        await record_violation(
+        await record_violation_and_restrict(
             user_id_str,
             shared_appliance_id,
             request.question,
             error_info["violation_type"],
             error_info["detection_method"],
         )
-        await update_restriction(user_id_str)
 
         error_response = InvalidQuestionError(
             error="この質問は製品に関連していないため回答できません",
@@ -399,16 +415,21 @@ async def ask_question_stream(
     # Format conversation history for prompt
     history_context = format_history_for_prompt(session.messages)
 
-    # Add user's question to session
-    await add_message(session.id, "user", request.question)
-
     # 5. Get PDF bytes if available
-    pdf_bytes = None
-    if appliance.get("stored_pdf_path"):
+    async def load_pdf_bytes() -> bytes | None:
+        if not appliance.get("stored_pdf_path"):
+            return None
         try:
-            pdf_bytes = await get_pdf_bytes(appliance["stored_pdf_path"])
+            return await get_pdf_bytes(appliance["stored_pdf_path"])
         except Exception as e:
             logger.warning(f"Failed to get PDF: {e}")
+            return None
+
+    # Add user's question to session while the PDF is being downloaded
+    _, pdf_bytes = await asyncio.gather(
+        add_message(session.id, "user", request.question),
+        load_pdf_bytes(),
+    )
 
     # 6. Generate streaming response
     async def generate():
@@ -487,8 +508,8 @@ async def submit_feedback(
 
     # Insert rating and check for auto-deletion
     result = await insert_rating(
-        shared_appliance_id=UUID(shared_appliance_id),
-        user_id=user_id,
+        shared_appliance_id=shared_appliance_id,
+        user_id=str(user_id),
         question=request.question,
         is_helpful=request.is_helpful,
     )
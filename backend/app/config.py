@@ -43,12 +43,16 @@ class Settings(BaseSettings):
 
     # Concurrency limits
     max_concurrent_searches: int = 5  # Maximum parallel manual searches
+    max_background_gemini_calls: int = 8  # Parallel session summary generations
     max_thread_pool_workers: int = 10  # Thread pool size for blocking I/O operations
 
     # QA Self-Check Settings
     qa_self_check_enabled: bool = True  # セルフチェック有効/無効
     qa_self_check_threshold: int = 3  # 許容スコア閾値 (1-5)
 
+    # QA Semantic Cache Settings
+    qa_semantic_cache_enabled: bool = True  # 類似質問の回答キャッシュ有効/無効
+
     # Google Apps Script Webhook (Contact form)
     gas_webhook_url: str | None = None
 
@@ -23,6 +23,7 @@ from app.api.routes import (
     users,
 )
 from app.config import settings
+from app.services.qa_session_service import drain_pending_summaries
 
 # Configure logging with environment variable control
 log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
@@ -65,6 +66,9 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    # Let in-flight session summaries finish (they use the executor below)
+    await drain_pending_summaries()
+
     # Cleanup: shutdown executor
     executor.shutdown(wait=True)
     main_logger.info("Thread pool executor shut down")
@@ -24,6 +24,23 @@ class SelfCheckResult(BaseModel):
     )
 
 
+class QASearchResult(BaseModel):
+    """QA検索・テキストキャッシュ検索のLLM出力."""
+
+    found: bool = Field(..., description="質問への回答が見つかったか")
+    answer: str = Field(..., description="質問に対する回答")
+    reference: str | None = Field(None, description="参照ページ番号等")
+    used_general_knowledge: bool = Field(False, description="一般知識で補完したか")
+
+
+class PDFAnswerResult(BaseModel):
+    """PDF直接分析のLLM出力."""
+
+    answer: str = Field(..., description="質問に対する回答")
+    reference: str | None = Field(None, description="参照ページ番号等")
+    used_general_knowledge: bool = Field(False, description="一般知識で補完したか")
+
+
 class QAMetadata(BaseModel):
     """QA markdown metadata."""
 
@@ -119,10 +136,12 @@ class QABatchGenerateResponse(BaseModel):
 class QAStreamEvent(BaseModel):
     """SSE event for streaming QA search progress."""
 
-    event: str  # "step_start", "step_complete", "step_timeout", "answer", "error"
+    # "step_start", "step_complete", "step_timeout", "answer_delta", "answer", "error"
+    event: str
     step: float | None = None  # 1, 1.5, 2, 2.5, 3, 3.5 (小数点は検証ステップ)
     step_name: str | None = None  # Step description
     answer: str | None = None
+    delta: str | None = None  # answer_delta: 生成中の回答の差分テキスト
     source: str | None = None
     reference: str | None = None
     added_to_qa: bool = False
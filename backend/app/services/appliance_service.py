@@ -405,7 +405,7 @@ async def get_user_appliances(user_id: UUID) -> list[UserApplianceWithDetails]:
                 )
                 count_result = (
                     client.table("user_appliances")
-                    .select("id", count="exact")
+                    .select("id", count="exact", head=True)
                     .eq("shared_appliance_id", shared_id)
                     .or_(or_filter)
                     .execute()
@@ -416,7 +416,7 @@ async def get_user_appliances(user_id: UUID) -> list[UserApplianceWithDetails]:
             for shared_id in shared_appliance_ids:
                 count_result = (
                     client.table("user_appliances")
-                    .select("id", count="exact")
+                    .select("id", count="exact", head=True)
                     .eq("shared_appliance_id", shared_id)
                     .eq("user_id", str(user_id))
                     .is_("group_id", "null")
@@ -944,7 +944,7 @@ async def check_merge_candidates_on_share(
         # Get maintenance schedule count
         schedule_result = (
             client.table("maintenance_schedules")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("user_appliance_id", candidate["id"])
             .execute()
         )
@@ -1001,7 +1001,7 @@ async def merge_appliances_on_share(
             # 1. Count schedules before migration
             count_result = (
                 client.table("maintenance_schedules")
-                .select("id", count="exact")
+                .select("id", count="exact", head=True)
                 .eq("user_appliance_id", source_id)
                 .execute()
             )
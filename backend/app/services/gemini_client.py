@@ -0,0 +1,221 @@
+"""Gemini client singleton and response helpers for backend services."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from functools import lru_cache
+
+import httpx
+from google import genai
+from google.genai import types
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Gemini API への非同期HTTP接続プールの設定
+GEMINI_MAX_KEEPALIVE_CONNECTIONS = 50
+GEMINI_KEEPALIVE_EXPIRY = 300  # 秒（質問の合間にTLS接続を張り直さない）
+
+# Explicit context cache settings for static system instructions
+CONTEXT_CACHE_TTL = 3600  # 秒
+CONTEXT_CACHE_REFRESH_MARGIN = 300  # 失効前に作り直す余裕（秒）
+CONTEXT_CACHE_RETRY_INTERVAL = 600  # 作成失敗後に再試行するまでの間隔（秒）
+# Gemini の明示的コンテキストキャッシュの最小トークン数（これ未満は作成できない）
+CONTEXT_CACHE_MIN_TOKENS = 1024
+
+# hash(model, instruction) -> (valid_until monotonic, cache name or None)
+_context_caches: dict[str, tuple[float, str | None]] = {}
+_context_cache_locks: dict[str, asyncio.Lock] = {}
+
+# In-flight generate_content calls keyed by request hash (single-flight)
+_inflight: dict[str, asyncio.Task] = {}
+
+# Semaphore limiting concurrent background Gemini calls
+# Initialized lazily to avoid issues with event loop not running at import time
+_background_semaphore: asyncio.Semaphore | None = None
+
+
+@lru_cache
+def get_gemini_client() -> genai.Client:
+    """
+    Get Gemini client instance (singleton).
+
+    Reusing a single client keeps its underlying HTTP connection pool warm
+    across requests instead of re-initializing transports on every call.
+    The async transport is an explicit httpx client with HTTP/2 and idle
+    connections kept open long enough to survive the gap between a user's
+    questions. Passing the client (rather than async_client_args) also keeps
+    google-genai from switching to aiohttp when it is installed, which would
+    silently drop the HTTP/2 and pool settings.
+
+    Returns:
+        Gemini Client instance
+    """
+    return genai.Client(
+        api_key=settings.gemini_api_key,
+        http_options=types.HttpOptions(
+            httpx_async_client=httpx.AsyncClient(
+                follow_redirects=True,
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY,
+                ),
+            )
+        ),
+    )
+
+
+def get_background_gemini_semaphore() -> asyncio.Semaphore:
+    """
+    Get or create the semaphore for background Gemini calls.
+
+    Session summaries are not on the answer path and can arrive in bursts;
+    bounding them keeps bursts from running into Gemini rate limits and
+    competing with the calls users are waiting for. Calls a user is waiting
+    on (such as PDF text extraction for an answer) must not use it.
+
+    Returns:
+        Shared semaphore sized by settings.max_background_gemini_calls
+    """
+    global _background_semaphore
+    if _background_semaphore is None:
+        _background_semaphore = asyncio.Semaphore(settings.max_background_gemini_calls)
+    return _background_semaphore
+
+
+def _request_key(
+    model: str, prompt: str, config: types.GenerateContentConfig | None
+) -> str:
+    """Build a hash key identifying a generate_content request."""
+    # default=repr covers pydantic model classes used as response_schema
+    config_json = (
+        json.dumps(config.model_dump(exclude_none=True), default=repr, sort_keys=True)
+        if config
+        else ""
+    )
+    payload = "\0".join((model, prompt, config_json))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+async def generate_content_deduped(
+    model: str,
+    prompt: str,
+    config: types.GenerateContentConfig | None = None,
+) -> types.GenerateContentResponse:
+    """
+    Call generate_content, sharing the result among identical concurrent calls.
+
+    While a request is in flight, callers with the same model, prompt and
+    config await the same underlying call instead of issuing another one.
+    The shared call is shielded so that one caller timing out or being
+    cancelled does not cancel it for the others.
+
+    Args:
+        model: Gemini model name
+        prompt: Text prompt
+        config: Generation config
+
+    Returns:
+        Gemini response
+    """
+    key = _request_key(model, prompt, config)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            get_gemini_client().aio.models.generate_content(
+                model=model, contents=prompt, config=config
+            )
+        )
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    return await asyncio.shield(task)
+
+
+async def _create_context_cache(
+    model: str, instruction: str
+) -> tuple[float, str | None]:
+    """
+    Create an explicit context cache holding a system instruction.
+
+    Instructions below CONTEXT_CACHE_MIN_TOKENS can never be cached, so they
+    are marked as uncacheable for the life of the process instead of being
+    retried every CONTEXT_CACHE_RETRY_INTERVAL.
+    """
+    client = get_gemini_client()
+    try:
+        counted = await client.aio.models.count_tokens(
+            model=model, contents=instruction
+        )
+    except Exception as e:
+        logger.info(f"Failed to count instruction tokens, sending inline: {e}")
+        return time.monotonic() + CONTEXT_CACHE_RETRY_INTERVAL, None
+
+    if (counted.total_tokens or 0) < CONTEXT_CACHE_MIN_TOKENS:
+        logger.info(
+            f"Instruction for {model} is {counted.total_tokens} tokens, "
+            "below the context cache minimum; sending it inline"
+        )
+        return math.inf, None
+
+    try:
+        cache = await client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=instruction,
+                ttl=f"{CONTEXT_CACHE_TTL}s",
+            ),
+        )
+    except Exception as e:
+        logger.info(f"Context cache unavailable, sending instruction inline: {e}")
+        return time.monotonic() + CONTEXT_CACHE_RETRY_INTERVAL, None
+
+    logger.info(f"Created context cache {cache.name} for {model}")
+    valid_for = CONTEXT_CACHE_TTL - CONTEXT_CACHE_REFRESH_MARGIN
+    return time.monotonic() + valid_for, cache.name
+
+
+async def with_cached_instruction(
+    model: str, instruction: str, config: types.GenerateContentConfig
+) -> types.GenerateContentConfig:
+    """
+    Attach a static system instruction to a generation config.
+
+    The instruction is stored once in an explicit Gemini context cache and
+    referenced via cached_content, so its tokens are not re-sent and billed
+    at the full rate on every call. If the instruction is too small to cache
+    or the cache cannot be created, the instruction is sent as a regular
+    system_instruction instead (which still benefits from Gemini's implicit
+    prefix caching). Only use this for instructions that may reach
+    CONTEXT_CACHE_MIN_TOKENS; pass short ones as system_instruction directly.
+
+    Args:
+        model: Gemini model name (context caches are model-specific)
+        instruction: Static system instruction
+        config: Base generation config
+
+    Returns:
+        Copy of config with cached_content or system_instruction set
+    """
+    key = hashlib.blake2b(
+        f"{model}\0{instruction}".encode(), digest_size=16
+    ).hexdigest()
+    entry = _context_caches.get(key)
+
+    if entry is None or entry[0] <= time.monotonic():
+        lock = _context_cache_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = _context_caches.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                entry = await _create_context_cache(model, instruction)
+                _context_caches[key] = entry
+
+    cache_name = entry[1]
+    if cache_name:
+        return config.model_copy(update={"cached_content": cache_name})
+    return config.model_copy(update={"system_instruction": instruction})
@@ -0,0 +1,150 @@
+"""Gemini File API upload cache for manual PDFs."""
+
+import asyncio
+import hashlib
+import io
+import logging
+from datetime import UTC, datetime, timedelta
+
+from google.genai import types
+
+from app.services.gemini_client import get_gemini_client
+from app.services.supabase_client import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+# Gemini のファイルは約48時間で失効するため、少し手前で再アップロードする
+PDF_FILE_TTL = timedelta(hours=47)
+FILE_PROCESSING_POLL_INTERVAL = 2  # 秒
+PDF_FILE_CACHE_MAXSIZE = 256
+
+# cache_key -> (expires_at, file_uri); avoids a DB round-trip per question
+_pdf_file_cache: dict[str, tuple[datetime, str]] = {}
+
+
+def _pdf_cache_key(manufacturer: str, model_number: str, pdf_bytes: bytes) -> str:
+    """
+    Build the cache key for a product's uploaded PDF.
+
+    The PDF content is part of the key so that a replaced manual is
+    uploaded again instead of reusing the old file. The stored key is the
+    SHA-256 of "maker:model:<BLAKE2b-128 of the PDF>"; changing either hash
+    changes every key in gemini_pdf_files.
+    """
+    content_digest = hashlib.blake2b(pdf_bytes, digest_size=16).hexdigest()
+    return hashlib.sha256(
+        f"{manufacturer}:{model_number}:{content_digest}".encode()
+    ).hexdigest()
+
+
+def _remember_pdf_file(cache_key: str, expires_at: datetime, file_uri: str) -> None:
+    """Store an uploaded file reference in the in-process cache."""
+    if cache_key not in _pdf_file_cache and (
+        len(_pdf_file_cache) >= PDF_FILE_CACHE_MAXSIZE
+    ):
+        _pdf_file_cache.pop(next(iter(_pdf_file_cache)))
+    _pdf_file_cache[cache_key] = (expires_at, file_uri)
+
+
+async def _upload_pdf(pdf_bytes: bytes, display_name: str) -> types.File:
+    """
+    Upload PDF bytes to the Gemini File API and wait until it is usable.
+
+    Args:
+        pdf_bytes: PDF file bytes
+        display_name: Display name shown in the File API
+
+    Returns:
+        Uploaded File in ACTIVE state
+
+    Raises:
+        RuntimeError: If Gemini fails to process the file
+    """
+    client = get_gemini_client()
+    file = await client.aio.files.upload(
+        file=io.BytesIO(pdf_bytes),
+        config=types.UploadFileConfig(
+            mime_type="application/pdf", display_name=display_name
+        ),
+    )
+
+    while file.state == types.FileState.PROCESSING:
+        await asyncio.sleep(FILE_PROCESSING_POLL_INTERVAL)
+        file = await client.aio.files.get(name=file.name)
+
+    if file.state == types.FileState.FAILED:
+        raise RuntimeError(f"Gemini failed to process file {file.name}")
+
+    return file
+
+
+async def get_pdf_file_uri(
+    manufacturer: str, model_number: str, pdf_bytes: bytes
+) -> str | None:
+    """
+    Get a Gemini File API URI for the product's PDF, uploading it if needed.
+
+    The uploaded file is recorded in gemini_pdf_files (and in an in-process
+    cache in front of it) so that subsequent questions about the same PDF
+    reference it by URI instead of sending the whole PDF inline.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+        pdf_bytes: PDF file bytes (uploaded only on a cache miss)
+
+    Returns:
+        File URI, or None if the upload failed (caller falls back to inline)
+    """
+    cache_key = _pdf_cache_key(manufacturer, model_number, pdf_bytes)
+    now = datetime.now(UTC)
+
+    cached = _pdf_file_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    supabase = get_supabase_client()
+    query = (
+        supabase.table("gemini_pdf_files")
+        .select("file_uri, expires_at")
+        .eq("cache_key", cache_key)
+        .gt("expires_at", now.isoformat())
+        .limit(1)
+    )
+    try:
+        result = await asyncio.to_thread(query.execute)
+        if result.data:
+            row = result.data[0]
+            _remember_pdf_file(
+                cache_key, datetime.fromisoformat(row["expires_at"]), row["file_uri"]
+            )
+            return row["file_uri"]
+    except Exception as e:
+        logger.warning(f"Failed to look up Gemini PDF file: {e}")
+
+    try:
+        file = await _upload_pdf(pdf_bytes, f"{manufacturer}_{model_number}")
+    except Exception as e:
+        logger.warning(
+            f"Failed to upload PDF to Gemini for {manufacturer} {model_number}: {e}"
+        )
+        return None
+
+    logger.info(f"Uploaded PDF to Gemini File API: {file.name}")
+    expires_at = now + PDF_FILE_TTL
+    _remember_pdf_file(cache_key, expires_at, file.uri)
+
+    query = supabase.table("gemini_pdf_files").upsert(
+        {
+            "cache_key": cache_key,
+            "file_name": file.name,
+            "file_uri": file.uri,
+            "expires_at": expires_at.isoformat(),
+        }
+    )
+    try:
+        await asyncio.to_thread(query.execute)
+    except Exception as e:
+        logger.warning(f"Failed to save Gemini PDF file reference: {e}")
+
+    return file.uri
@@ -5,6 +5,7 @@ import secrets
 import string
 from datetime import UTC, datetime
 
+from app.services.qa_session_service import invalidate_group_id_cache
 from app.services.supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -250,27 +251,28 @@ async def get_user_groups(user_id: str) -> dict:
             client.table("groups").select("*").in_("id", group_ids).execute()
         )
 
-        groups = []
-        for group in groups_response.data or []:
-            # Get members for each group
-            members_response = (
-                client.table("group_members")
-                .select("id, user_id, joined_at, users(email)")
-                .eq("group_id", group["id"])
-                .execute()
-            )
+        # Get members of all groups in one query
+        members_response = (
+            client.table("group_members")
+            .select("id, group_id, user_id, joined_at, users(email)")
+            .in_("group_id", group_ids)
+            .execute()
+        )
 
-            members = []
-            for m in members_response.data or []:
-                members.append(
-                    {
-                        "id": m["id"],
-                        "user_id": m["user_id"],
-                        "email": m["users"]["email"] if m.get("users") else "",
-                        "joined_at": m["joined_at"],
-                    }
-                )
+        members_by_group: dict[str, list[dict]] = {}
+        for m in members_response.data or []:
+            members_by_group.setdefault(m["group_id"], []).append(
+                {
+                    "id": m["id"],
+                    "user_id": m["user_id"],
+                    "email": m["users"]["email"] if m.get("users") else "",
+                    "joined_at": m["joined_at"],
+                }
+            )
 
+        groups = []
+        for group in groups_response.data or []:
+            members = members_by_group.get(group["id"], [])
             group["members"] = members
             group["member_count"] = len(members)
             groups.append(group)
@@ -371,6 +373,7 @@ async def delete_group(group_id: str, owner_id: str) -> dict:
 
         # Delete group (CASCADE deletes group_members)
         client.table("groups").delete().eq("id", group_id).execute()
+        invalidate_group_id_cache()
 
         return {"success": True, "transferred_count": transferred_count}
 
@@ -475,7 +478,7 @@ async def get_group_by_invite_code(invite_code: str) -> dict:
         # Get member count
         members_response = (
             client.table("group_members")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("group_id", group["id"])
             .execute()
         )
@@ -627,6 +630,7 @@ async def join_group(
             result["migrated_count"] = migrated_count
             result["merged_count"] = merged_count
 
+        invalidate_group_id_cache(user_id)
         return result
 
     except Exception as e:
@@ -752,6 +756,7 @@ async def leave_group(
         client.table("group_members").delete().eq("group_id", group_id).eq(
             "user_id", user_id
         ).execute()
+        invalidate_group_id_cache(user_id)
 
         result = {"success": True}
         if take_appliances:
@@ -795,6 +800,7 @@ async def remove_member(owner_id: str, group_id: str, member_user_id: str) -> di
         client.table("group_members").delete().eq("group_id", group_id).eq(
             "user_id", member_user_id
         ).execute()
+        invalidate_group_id_cache(member_user_id)
 
         return {"success": True}
 
@@ -4,10 +4,9 @@ import json
 import logging
 from pathlib import Path
 
-from google import genai
 from google.genai import types
 
-from app.config import settings
+from app.services.gemini_client import get_gemini_client
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +54,7 @@ async def analyze_appliance_image(
         dict: Analysis result with manufacturer, model_number, category, etc.
     """
     # Initialize Gemini client
-    client = genai.Client(api_key=settings.gemini_api_key)
+    client = get_gemini_client()
 
     # Create image part
     mime_type = get_mime_type(filename)
@@ -7,10 +7,9 @@ import time
 from pathlib import Path
 
 import requests
-from google import genai
 from google.genai import types
 
-from app.config import settings
+from app.services.gemini_client import get_gemini_client
 
 logger = logging.getLogger(__name__)
 
@@ -71,11 +70,6 @@ def sanitize_extraction_result(result: dict) -> dict:
     return result
 
 
-def get_gemini_client():
-    """Get Gemini client instance"""
-    return genai.Client(api_key=settings.gemini_api_key)
-
-
 async def upload_pdf_to_gemini(client, pdf_bytes: bytes, filename: str):
     """
     Upload PDF to Gemini API.
@@ -246,7 +246,7 @@ async def get_maintenance_logs(
         # Get total count
         count_response = (
             client.table("maintenance_logs")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("schedule_id", schedule_id)
             .execute()
         )
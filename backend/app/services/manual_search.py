@@ -9,10 +9,10 @@ from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
-from google import genai
 from google.genai import types
 
 from app.config import settings
+from app.services.gemini_client import get_gemini_client
 
 logger = logging.getLogger(__name__)
 
@@ -32,11 +32,6 @@ def get_search_semaphore() -> asyncio.Semaphore:
     return _search_semaphore
 
 
-def get_gemini_client():
-    """Get Gemini client instance"""
-    return genai.Client(api_key=settings.gemini_api_key)
-
-
 def custom_search(query: str, num_results: int = 10) -> list[dict]:
     """
     Execute Google Custom Search API query.
@@ -8,6 +8,8 @@ from app.services.supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 def normalize_manufacturer_name(name: str) -> str:
     """
@@ -32,7 +34,7 @@ def normalize_manufacturer_name(name: str) -> str:
     # Lowercase (only affects ASCII)
     normalized = normalized.lower()
     # Remove multiple consecutive spaces
-    normalized = re.sub(r"\s+", "", normalized)
+    normalized = _WHITESPACE_RE.sub("", normalized)
     return normalized
 
 
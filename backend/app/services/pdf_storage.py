@@ -19,6 +19,8 @@ logger = logging.getLogger(__name__)
 # Storage bucket name for manual PDFs
 MANUALS_BUCKET = "manuals"
 
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7F]+")
+
 
 def normalize_manufacturer(manufacturer: str) -> str:
     """
@@ -40,7 +42,7 @@ def normalize_manufacturer(manufacturer: str) -> str:
         # Create a hash from the original name for uniqueness
         hash_suffix = hashlib.sha256(manufacturer.encode("utf-8")).hexdigest()[:8]
         # Keep any ASCII characters and append hash
-        ascii_part = re.sub(r"[^\x00-\x7F]+", "", normalized)
+        ascii_part = _NON_ASCII_RE.sub("", normalized)
         if ascii_part:
             return f"{ascii_part}_{hash_suffix}"
         else:
@@ -71,7 +73,7 @@ def normalize_model_number(model_number: str) -> str:
         # Create a hash from the original model number
         hash_suffix = hashlib.sha256(model_number.encode("utf-8")).hexdigest()[:8]
         # Keep any ASCII characters and append hash
-        ascii_part = re.sub(r"[^\x00-\x7F]+", "", normalized)
+        ascii_part = _NON_ASCII_RE.sub("", normalized)
         if ascii_part:
             return f"{ascii_part}_{hash_suffix}"
         else:
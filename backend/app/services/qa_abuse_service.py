@@ -1,14 +1,15 @@
 """QA abuse prevention service for question validation and user restriction management."""
 
-import json
+import asyncio
 import logging
 import re
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from typing import Literal
 
-from google import genai
+from google.genai import types
+from pydantic_core import from_json
 
-from app.config import settings
+from app.services.gemini_client import generate_content_deduped
 from app.services.supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
@@ -22,14 +23,19 @@ VIOLATION_TYPE_ATTACK = "attack"
 DETECTION_METHOD_RULE = "rule_based"
 DETECTION_METHOD_LLM = "llm"
 
-# Restriction time settings (in seconds)
-RESTRICTION_TIMES = {
-    1: 0,  # 1st violation: no restriction (reject but allow immediate retry)
-    2: 3600,  # 2nd violation: 1 hour
-    3: 86400,  # 3rd violation: 24 hours
-    # 4+ violations: 7 days
-}
-DEFAULT_RESTRICTION_TIME = 604800  # 7 days
+# Structured output schema for the LLM relevance check
+RELEVANCE_RESPONSE_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "is_related": types.Schema(type=types.Type.BOOLEAN),
+        "reason": types.Schema(type=types.Type.STRING),
+    },
+    required=["is_related"],
+)
+RELEVANCE_GENERATION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=RELEVANCE_RESPONSE_SCHEMA,
+)
 
 
 # Rule-based patterns for quick validation
@@ -61,6 +67,11 @@ PROMPT_INJECTION_PATTERNS = [
     r"forget.*?instructions?",
 ]
 
+# Each category compiled once into a single case-insensitive alternation
+_OFF_TOPIC_RE = re.compile("|".join(OFF_TOPIC_PATTERNS), re.IGNORECASE)
+_INAPPROPRIATE_RE = re.compile("|".join(INAPPROPRIATE_PATTERNS), re.IGNORECASE)
+_PROMPT_INJECTION_RE = re.compile("|".join(PROMPT_INJECTION_PATTERNS), re.IGNORECASE)
+
 
 async def check_user_restriction(user_id: str) -> dict | None:
     """
@@ -82,12 +93,13 @@ async def check_user_restriction(user_id: str) -> dict | None:
         return None
 
     try:
-        response = (
+        # Run the blocking query in a thread so callers can overlap it
+        response = await asyncio.to_thread(
             supabase.table("qa_restrictions")
             .select("*")
             .eq("user_id", user_id)
             .single()
-            .execute()
+            .execute
         )
 
         if not response.data:
@@ -130,26 +142,21 @@ def _check_rule_based(question: str) -> tuple[bool, str | None, str | None]:
         - violation_type: Type of violation if detected
         - reason: Human-readable reason if violation detected
     """
-    question_lower = question.lower()
-
     # Check off-topic patterns
-    for pattern in OFF_TOPIC_PATTERNS:
-        if re.search(pattern, question_lower, re.IGNORECASE):
-            return (
-                False,
-                VIOLATION_TYPE_OFF_TOPIC,
-                "製品の使い方やメンテナンスについてお聞きください",
-            )
+    if _OFF_TOPIC_RE.search(question):
+        return (
+            False,
+            VIOLATION_TYPE_OFF_TOPIC,
+            "製品の使い方やメンテナンスについてお聞きください",
+        )
 
     # Check inappropriate patterns
-    for pattern in INAPPROPRIATE_PATTERNS:
-        if re.search(pattern, question_lower, re.IGNORECASE):
-            return (False, VIOLATION_TYPE_INAPPROPRIATE, "不適切な質問は回答できません")
+    if _INAPPROPRIATE_RE.search(question):
+        return (False, VIOLATION_TYPE_INAPPROPRIATE, "不適切な質問は回答できません")
 
     # Check prompt injection patterns
-    for pattern in PROMPT_INJECTION_PATTERNS:
-        if re.search(pattern, question, re.IGNORECASE):
-            return (False, VIOLATION_TYPE_ATTACK, "不適切な質問は回答できません")
+    if _PROMPT_INJECTION_RE.search(question):
+        return (False, VIOLATION_TYPE_ATTACK, "不適切な質問は回答できません")
 
     return (True, None, None)
 
@@ -171,8 +178,6 @@ async def _check_llm_based(
         - is_valid: False if violation detected, True otherwise
         - reason: Human-readable reason if violation detected
     """
-    client = genai.Client(api_key=settings.gemini_api_key)
-
     prompt = f"""
 この質問は以下の製品に関連していますか？
 
@@ -193,33 +198,24 @@ async def _check_llm_based(
 """
 
     try:
-        response = await client.aio.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
+        response = await generate_content_deduped(
+            "gemini-2.5-flash", prompt, RELEVANCE_GENERATION_CONFIG
         )
 
-        text = response.text.strip()
+        result = from_json(response.text)
+        is_related = result.get("is_related", True)
+        reason = result.get("reason", "")
 
-        # Extract JSON
-        json_match = re.search(r"\{.+\}", text, re.DOTALL)
-        if json_match:
-            result = json.loads(json_match.group())
-            is_related = result.get("is_related", True)
-            reason = result.get("reason", "")
+        if not is_related:
+            return (False, f"製品に関連しない質問です: {reason}")
 
-            if not is_related:
-                return (False, f"製品に関連しない質問です: {reason}")
-
-            return (True, None)
+        return (True, None)
 
     except Exception as e:
         logger.error(f"LLM validation error: {e}")
         # On error, allow the question (prevent false positives)
         return (True, None)
 
-    # Default: allow
-    return (True, None)
-
 
 async def validate_question(
     question: str, maker: str, model_number: str, category: str
@@ -270,15 +266,20 @@ async def validate_question(
     return (True, None)
 
 
-async def record_violation(
+async def record_violation_and_restrict(
     user_id: str,
     shared_appliance_id: str,
     question: str,
     violation_type: Literal["off_topic", "inappropriate", "attack"],
     detection_method: Literal["rule_based", "llm"],
-) -> None:
+) -> dict:
     """
-    Record a violation to qa_violations table.
+    Record a violation and update user restriction in a single RPC.
+
+    The violation insert and the restriction update (increment_qa_violation)
+    run in one transaction (record_violation_and_restrict). Restriction times
+    are defined in SQL: 1st violation = none, 2nd = 1 hour, 3rd = 24 hours,
+    4+ = 7 days.
 
     Args:
         user_id: User ID
@@ -286,39 +287,6 @@ async def record_violation(
         question: Violation question text
         violation_type: Type of violation
         detection_method: Detection method used
-    """
-    supabase = get_supabase_client()
-    if not supabase:
-        logger.error("Supabase client not available")
-        return
-
-    try:
-        supabase.table("qa_violations").insert(
-            {
-                "user_id": user_id,
-                "shared_appliance_id": shared_appliance_id,
-                "question": question,
-                "violation_type": violation_type,
-                "detection_method": detection_method,
-            }
-        ).execute()
-
-        logger.info(
-            f"Recorded violation for user {user_id}: {violation_type} ({detection_method})"
-        )
-
-    except Exception as e:
-        logger.error(f"Error recording violation: {e}")
-
-
-async def update_restriction(user_id: str) -> dict:
-    """
-    Update user restriction based on violation count.
-
-    Increments violation count and sets restricted_until based on count.
-
-    Args:
-        user_id: User ID
 
     Returns:
         Dict with updated restriction info:
@@ -332,75 +300,35 @@ async def update_restriction(user_id: str) -> dict:
         logger.error("Supabase client not available")
         return {"violation_count": 0, "restricted_until": None}
 
+    query = supabase.rpc(
+        "record_violation_and_restrict",
+        {
+            "p_user_id": user_id,
+            "p_shared_appliance_id": shared_appliance_id,
+            "p_question": question,
+            "p_violation_type": violation_type,
+            "p_detection_method": detection_method,
+        },
+    )
     try:
-        # Get or create restriction record
-        response = (
-            supabase.table("qa_restrictions")
-            .select("*")
-            .eq("user_id", user_id)
-            .execute()
-        )
+        response = await asyncio.to_thread(query.execute)
 
-        now = datetime.now(UTC)
-        new_violation_count = 1
-        restriction_seconds = RESTRICTION_TIMES.get(1, 0)
+        row = response.data[0]
+        restricted_until = row["restricted_until"]
 
-        if response.data and len(response.data) > 0:
-            # Update existing record
-            current = response.data[0]
-            new_violation_count = current["violation_count"] + 1
-            restriction_seconds = RESTRICTION_TIMES.get(
-                new_violation_count, DEFAULT_RESTRICTION_TIME
-            )
-
-            restricted_until = None
-            if restriction_seconds > 0:
-                restricted_until = (
-                    now + timedelta(seconds=restriction_seconds)
-                ).isoformat()
-
-            supabase.table("qa_restrictions").update(
-                {
-                    "violation_count": new_violation_count,
-                    "restricted_until": restricted_until,
-                    "last_violation_at": now.isoformat(),
-                    "updated_at": now.isoformat(),
-                }
-            ).eq("user_id", user_id).execute()
-
-            logger.info(
-                f"Updated restriction for user {user_id}: "
-                f"count={new_violation_count}, restricted_until={restricted_until}"
-            )
-
-            return {
-                "violation_count": new_violation_count,
-                "restricted_until": (
-                    datetime.fromisoformat(restricted_until)
-                    if restricted_until
-                    else None
-                ),
-            }
-
-        else:
-            # Create new record
-            restricted_until = None  # 1st violation has no restriction time
-            supabase.table("qa_restrictions").insert(
-                {
-                    "user_id": user_id,
-                    "violation_count": new_violation_count,
-                    "restricted_until": restricted_until,
-                    "last_violation_at": now.isoformat(),
-                }
-            ).execute()
-
-            logger.info(f"Created restriction record for user {user_id}: count=1")
+        logger.info(
+            f"Recorded violation for user {user_id}: {violation_type} "
+            f"({detection_method}), count={row['violation_count']}, "
+            f"restricted_until={restricted_until}"
+        )
 
-            return {
-                "violation_count": new_violation_count,
-                "restricted_until": None,
-            }
+        return {
+            "violation_count": row["violation_count"],
+            "restricted_until": (
+                datetime.fromisoformat(restricted_until) if restricted_until else None
+            ),
+        }
 
     except Exception as e:
-        logger.error(f"Error updating restriction: {e}")
+        logger.error(f"Error recording violation: {e}")
         return {"violation_count": 0, "restricted_until": None}
@@ -1,46 +1,117 @@
 """Question answering service with multi-source search."""
 
-import json
+import asyncio
+import hashlib
 import logging
-import re
-from collections.abc import AsyncGenerator
+import time
+from array import array
+from collections import deque
+from collections.abc import AsyncGenerator, Callable, Coroutine
+from dataclasses import dataclass
+from typing import Any
 
-from google import genai
 from google.genai import types
+from pydantic import ValidationError
+from pydantic_core import from_json
 
 from app.config import settings
-from app.schemas.qa import QAStreamEvent, SelfCheckResult
+from app.schemas.qa import (
+    PDFAnswerResult,
+    QASearchResult,
+    QAStreamEvent,
+    SelfCheckResult,
+)
+from app.services.gemini_client import (
+    generate_content_deduped,
+    get_gemini_client,
+    with_cached_instruction,
+)
+from app.services.gemini_file_service import get_pdf_file_uri
 from app.services.qa_rating_service import delete_invalid_qa_from_storage
+from app.services.qa_semantic_cache import embed_question, lookup_answer, store_answer
 from app.services.qa_service import append_qa_to_markdown, get_qa_markdown
-from app.services.text_cache_service import get_or_create_text_cache
+from app.services.text_cache_service import (
+    TextCacheIndex,
+    get_or_create_text_cache,
+    get_text_cache_index,
+    is_likely_answerable,
+    select_text_passages,
+)
 
 # タイムアウト設定（秒）
 TIMEOUT_QA_SEARCH = 30  # QA検索
 TIMEOUT_TEXT_CACHE = 60  # テキストキャッシュ検索
 TIMEOUT_PDF_ANALYSIS = 90  # PDF直接分析
 TIMEOUT_SELF_CHECK = 30  # セルフチェック
+# 意味キャッシュ用の質問埋め込み（超えたらキャッシュを使わない）
+SEMANTIC_CACHE_EMBED_TIMEOUT = 3
 
 logger = logging.getLogger(__name__)
 
-# Step definitions for progress display
-STEP_DEFINITIONS = {
-    1: "QAデータベースを検索中...",
-    1.5: "回答を検証中...",
-    2: "説明書テキストを検索中...",
-    2.5: "回答を検証中...",
-    3: "PDFを詳細分析中...",
-    3.5: "回答を検証中...",
-}
-
-# Self-check prompt template
-SELF_CHECK_PROMPT = """
-以下の質問と回答の整合性を評価してください：
-
-【質問】
-{question}
-
-【回答】
-{answer}
+# Strong references to in-flight background QA appends (prevents GC mid-flight)
+_pending_appends: set[asyncio.Task] = set()
+# Strong references to in-flight text cache prefetches
+_pending_prefetches: set[asyncio.Task] = set()
+
+# 投機実行の判定に使うセルフチェック結果の件数（ソースごとの直近分）
+SPECULATION_WINDOW = 50
+# 判定に必要な最小件数（これ未満なら投機実行する）
+SPECULATION_MIN_SAMPLES = 10
+# 直近の不合格率がこれ未満なら、次のステップを投機実行しない
+SPECULATION_MIN_FAILURE_RATE = 0.2
+
+# source -> recent self-check verdicts (True = passed)
+_self_check_history: dict[str, deque[bool]] = {}
+
+# Step names for progress display (self-check steps are N.5)
+STEP_QA_SEARCH = "QAデータベースを検索中..."
+STEP_TEXT_CACHE = "説明書テキストを検索中..."
+STEP_PDF_ANALYSIS = "PDFを詳細分析中..."
+STEP_SELF_CHECK = "回答を検証中..."
+
+
+@dataclass
+class SourceStep:
+    """An answer source tried in order by the streaming QA pipeline."""
+
+    step: int
+    source: str  # "qa", "text_cache", "pdf"
+    run: Callable[[], Coroutine[Any, Any, dict | None]]
+    start_name: str
+    found_name: str
+    not_found_name: str
+    timeout_name: str
+    # Whether verified answers are appended to the QA markdown
+    appendable: bool = True
+    # Last resort: always answers (flagged if rejected), timeout is an error
+    final: bool = False
+    # Queue fed with answer text while the step runs (answer_delta events)
+    answer_deltas: asyncio.Queue[str] | None = None
+    # Checked when the previous step found nothing; False skips this step
+    worthwhile: Callable[[], bool] | None = None
+
+
+# Structured output configs (parsed into pydantic models via response.parsed)
+ANSWER_GENERATION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=QASearchResult,
+)
+PDF_ANSWER_GENERATION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=PDFAnswerResult,
+)
+SELF_CHECK_GENERATION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=SelfCheckResult,
+)
+SELF_CHECK_BATCH_GENERATION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=list[SelfCheckResult],
+)
+
+# Self-check instruction (static; sent via context cache) and per-call prompt
+SELF_CHECK_INSTRUCTION = """
+質問と回答の整合性を評価してください。
 
 【評価手順】
 
@@ -91,17 +162,254 @@ SELF_CHECK_PROMPT = """
   → 原因を聞かれているのに操作方法を答えている → score: 2
 
 【出力形式】
-{{
+{
   "question_type": "方法/頻度/理由/トラブル/仕様/その他",
   "answer_type": "手順/頻度/理由/解決方法/仕様/その他",
   "type_match": true/false（質問タイプと回答タイプが適切に対応しているか）,
   "score": 1-5の整数（1=全く整合性なし、5=完全に整合）,
-  "is_acceptable": true/false（scoreが{threshold}以上ならtrue）,
+  "is_acceptable": true/false（scoreが判定閾値以上ならtrue）,
   "reason": "評価理由（日本語で簡潔に）"
-}}
+}
+"""
+
+SELF_CHECK_PROMPT = """
+以下の質問と回答の整合性を評価してください：
+
+【質問】
+{question}
+
+【回答】
+{answer}
+
+【判定閾値】
+{threshold}
+"""
+
+SELF_CHECK_BATCH_PROMPT = """
+以下の質問に対する複数の回答候補について、それぞれ質問との整合性を評価してください。
+評価結果は回答候補の番号順にJSON配列で出力してください。
+
+【質問】
+{question}
+
+【回答候補】
+{answers}
+
+【判定閾値】
+{threshold}
+"""
+
+# Source guidance for answers that may fall back to general knowledge
+# (text cache and PDF)
+_GENERAL_KNOWLEDGE_GUIDE = """【情報源について】
+- メインは説明書の内容です
+- 説明書に記載がない場合は、あなたの一般知識で補完してください
+- 一般知識を使用した場合は、必ず "used_general_knowledge": true を設定してください"""
+
+# Answer guidelines shared by QA search, text cache and PDF answering
+ANSWER_GUIDELINES_INSTRUCTION = """
+あなたは家電の取扱説明書に基づいてユーザーの質問に回答するアシスタントです。
+
+【質問タイプの判別】
+まず、ユーザーの質問が以下のどのタイプか判断してください：
+- 方法/手順型: 「〜の方法」「〜のやり方」「どうやって」「手順」「〜するには」
+  → 具体的なステップ・操作手順を回答すること
+- 頻度/タイミング型: 「いつ」「どのくらいの頻度」「何回」「タイミング」
+  → 時間・回数・周期を回答すること
+- 理由/原因型: 「なぜ」「どうして」「原因」「理由」
+  → 理由・背景・メカニズムを回答すること
+- トラブルシューティング型: 「〜できない」「〜しない」「故障」「エラー」
+  → 解決方法・対処手順を回答すること
+- 仕様/スペック型: 「何が」「どれくらい」「対応している」「サイズ」
+  → 製品情報・仕様を回答すること
+
+【回答の適合性チェック】
+◯ 良い回答例:
+- 質問「お手入れの方法を教えてください」
+  → 「1. 電源を切る 2. フィルターを外す 3. 水洗いする 4. 乾かして戻す」
+  （方法を聞かれて → 具体的な手順を回答 ✓）
+
+- 質問「いつ掃除すればいいですか」
+  → 「週に1回程度、または汚れが目立ってきたら掃除してください」
+  （頻度を聞かれて → 頻度・タイミングを回答 ✓）
+
+- 質問「なぜ電源が入らないのですか」
+  → 「バッテリー切れ、電源コードの接続不良、または安全装置が作動している可能性があります」
+  （原因を聞かれて → 考えられる原因を回答 ✓）
+
+✕ 悪い回答例:
+- 質問「お手入れの方法を教えてください」
+  → 「使うたびにお手入れが必要です」
+  （方法を聞かれて → 頻度だけを回答 ✗）
+
+- 質問「いつ掃除すればいいですか」
+  → 「フィルターを外して水洗いします」
+  （頻度を聞かれて → 手順を回答 ✗）
+
+- 質問「なぜ電源が入らないのですか」
+  → 「電源ボタンを3秒長押ししてください」
+  （原因を聞かれて → 操作方法を回答 ✗）
+
+【回答の構造】
+質問タイプに応じて以下の構造で回答してください：
+- 方法/手順型: 1. まず結論 2. 具体的な手順（ステップ1, 2, 3...） 3. 注意点
+- 頻度/タイミング型: 1. 推奨頻度・タイミング 2. その理由（あれば）
+- 理由/原因型: 1. 考えられる原因（複数ある場合は列挙） 2. 補足説明
+- トラブル型: 1. 考えられる原因 2. 対処方法 3. 解決しない場合の対応
 """
 
 
+async def _safe_append_qa(
+    manufacturer: str, model_number: str, question: str, answer: str, source: str
+) -> None:
+    """Append QA in the background, logging instead of raising on failure."""
+    try:
+        await append_qa_to_markdown(
+            manufacturer, model_number, question, answer, source
+        )
+    except Exception as e:
+        logger.error("Failed to append QA: %s", e)
+
+
+def _schedule_qa_append(
+    manufacturer: str, model_number: str, question: str, answer: str, source: str
+) -> None:
+    """
+    Append QA to markdown without blocking the caller.
+
+    The write is unrelated to producing the answer, so both answer paths
+    return the answer immediately and let the append finish later.
+    """
+    task = asyncio.create_task(
+        _safe_append_qa(manufacturer, model_number, question, answer, source)
+    )
+    _pending_appends.add(task)
+    task.add_done_callback(_pending_appends.discard)
+
+
+async def _load_text_index(
+    manufacturer: str, model_number: str, pdf_bytes: bytes
+) -> TextCacheIndex:
+    """Load (or extract) the text cache and return its passage index."""
+    text_cache = await get_or_create_text_cache(manufacturer, model_number, pdf_bytes)
+    return await get_text_cache_index(manufacturer, model_number, text_cache)
+
+
+def _on_prefetch_done(task: asyncio.Task) -> None:
+    """Release a finished text cache prefetch and log its failure, if any."""
+    _pending_prefetches.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Text cache prefetch failed: %r", task.exception())
+
+
+def _prefetch_text_index(
+    manufacturer: str, model_number: str, pdf_bytes: bytes
+) -> asyncio.Task:
+    """
+    Start loading the text cache index before Step 1 runs.
+
+    Step 2 has no data dependency on Step 1, so the Storage download (or PDF
+    extraction on a cold product) overlaps the QA search. The task is not
+    tied to the request: a newly extracted cache is still saved even if the
+    QA step answers first.
+    """
+    task = asyncio.create_task(_load_text_index(manufacturer, model_number, pdf_bytes))
+    _pending_prefetches.add(task)
+    task.add_done_callback(_on_prefetch_done)
+    return task
+
+
+async def _prepare_text_cache_answer(
+    text_index_task: asyncio.Task, question: str
+) -> dict | None:
+    """Answer the question from passages of the prefetched text cache (Step 2)."""
+    # shield: cancelling a speculative Step 2 must not abort the prefetch
+    text_index = await asyncio.shield(text_index_task)
+    passages = select_text_passages(text_index, question)
+    return await ask_text_cache(passages, question)
+
+
+def _start_step(
+    step_tasks: set[asyncio.Task], coro: Coroutine[Any, Any, Any]
+) -> asyncio.Task:
+    """
+    Start a pipeline step as a task.
+
+    The task is tracked in ``step_tasks`` so that steps started speculatively
+    (while the previous answer is self-checked) are cancelled when the stream
+    finishes or is closed early.
+    """
+    task = asyncio.create_task(coro)
+    step_tasks.add(task)
+    return task
+
+
+def _record_self_check(source: str, passed: bool) -> None:
+    """Remember a self-check verdict for the speculation gate."""
+    history = _self_check_history.get(source)
+    if history is None:
+        history = _self_check_history[source] = deque(maxlen=SPECULATION_WINDOW)
+    history.append(passed)
+
+
+def _should_speculate(checked_source: str, next_step: SourceStep) -> bool:
+    """
+    Decide whether to start ``next_step`` before ``checked_source`` is rejected.
+
+    A speculative step is a paid Gemini call that is thrown away whenever the
+    checked answer passes. Only non-final steps are speculated (the PDF step
+    sends the whole manual), never ones their ``worthwhile`` gate would skip,
+    and only while answers from ``checked_source`` fail the self-check often
+    enough for the saved latency to be worth it.
+    """
+    if next_step.final:
+        return False
+    if next_step.worthwhile is not None and not next_step.worthwhile():
+        return False
+    history = _self_check_history.get(checked_source)
+    if history is None or len(history) < SPECULATION_MIN_SAMPLES:
+        return True
+    return history.count(False) / len(history) >= SPECULATION_MIN_FAILURE_RATE
+
+
+def _discard_speculative(task: asyncio.Task | None) -> None:
+    """Cancel a speculative fallback whose result is no longer needed."""
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        # Mark any exception as retrieved to avoid "never retrieved" warnings
+        task.exception()
+
+
+async def _drain_answer_deltas(
+    task: asyncio.Task, deltas: asyncio.Queue[str]
+) -> AsyncGenerator[str, None]:
+    """Yield answer deltas queued by ``task`` until it finishes."""
+    while not task.done():
+        getter = asyncio.ensure_future(deltas.get())
+        try:
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        if getter.done() and not getter.cancelled():
+            yield getter.result()
+    while not deltas.empty():
+        yield deltas.get_nowait()
+
+
+def _partial_answer(json_text: str) -> str:
+    """Extract the (possibly incomplete) "answer" value from streamed JSON."""
+    try:
+        partial = from_json(json_text, allow_partial="trailing-strings")
+    except ValueError:
+        return ""
+    answer = partial.get("answer") if isinstance(partial, dict) else None
+    return answer if isinstance(answer, str) else ""
+
+
 async def check_answer_consistency(
     question: str,
     answer: str,
@@ -121,11 +429,8 @@ async def check_answer_consistency(
     Raises:
         asyncio.TimeoutError: If operation times out
     """
-    import asyncio
-    import time
-
     start_time = time.time()
-    client = genai.Client(api_key=settings.gemini_api_key)
+    client = get_gemini_client()
 
     prompt = SELF_CHECK_PROMPT.format(
         question=question,
@@ -135,34 +440,26 @@ async def check_answer_consistency(
 
     try:
         async with asyncio.timeout(TIMEOUT_SELF_CHECK):
+            config = await with_cached_instruction(
+                "gemini-2.5-flash", SELF_CHECK_INSTRUCTION, SELF_CHECK_GENERATION_CONFIG
+            )
             response = await client.aio.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=prompt,
+                config=config,
             )
         elapsed = time.time() - start_time
-        logger.info(f"check_answer_consistency completed in {elapsed:.2f}s")
-
-        text = response.text.strip()
-
-        # JSONパース
-        json_match = re.search(r"\{.+\}", text, re.DOTALL)
-        if json_match:
-            data = json.loads(json_match.group())
-            score = data.get("score", 3)
-            return SelfCheckResult(
-                score=score,
-                is_acceptable=data.get("is_acceptable", score >= threshold),
-                reason=data.get("reason", ""),
-                question_type=data.get("question_type"),
-                answer_type=data.get("answer_type"),
-                type_match=data.get("type_match"),
-            )
+        logger.info("check_answer_consistency completed in %.2fs", elapsed)
+
+        if isinstance(response.parsed, SelfCheckResult):
+            return response.parsed
+        logger.warning("Failed to parse self-check response: %s", response.text)
     except TimeoutError:
         elapsed = time.time() - start_time
-        logger.warning(f"check_answer_consistency timed out after {elapsed:.2f}s")
+        logger.warning("check_answer_consistency timed out after %.2fs", elapsed)
         raise
     except Exception as e:
-        logger.warning(f"Failed to parse self-check response: {e}")
+        logger.warning("Failed to parse self-check response: %s", e)
 
     # フォールバック: パース失敗時は許容とみなす
     return SelfCheckResult(
@@ -175,6 +472,113 @@ async def check_answer_consistency(
     )
 
 
+async def check_answers_batch(
+    question: str,
+    answers: list[str],
+    threshold: int = 3,
+) -> list[SelfCheckResult]:
+    """
+    複数の回答候補と質問の整合性を1回の呼び出しでチェックする.
+
+    Args:
+        question: ユーザーの質問
+        answers: 回答候補のリスト
+        threshold: 許容スコア閾値 (デフォルト: 3)
+
+    Returns:
+        list[SelfCheckResult]: 回答候補と同じ順序のセルフチェック結果
+
+    Raises:
+        asyncio.TimeoutError: If operation times out
+    """
+    start_time = time.time()
+    client = get_gemini_client()
+
+    prompt = SELF_CHECK_BATCH_PROMPT.format(
+        question=question,
+        answers="\n".join(
+            f"{number}: {answer}" for number, answer in enumerate(answers, 1)
+        ),
+        threshold=threshold,
+    )
+
+    try:
+        async with asyncio.timeout(TIMEOUT_SELF_CHECK):
+            config = await with_cached_instruction(
+                "gemini-2.5-flash",
+                SELF_CHECK_INSTRUCTION,
+                SELF_CHECK_BATCH_GENERATION_CONFIG,
+            )
+            response = await client.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=prompt,
+                config=config,
+            )
+        elapsed = time.time() - start_time
+        logger.info(
+            "check_answers_batch (%d answers) completed in %.2fs",
+            len(answers),
+            elapsed,
+        )
+
+        if isinstance(response.parsed, list) and len(response.parsed) == len(answers):
+            return response.parsed
+        logger.warning("Failed to parse batch self-check response: %s", response.text)
+    except TimeoutError:
+        elapsed = time.time() - start_time
+        logger.warning("check_answers_batch timed out after %.2fs", elapsed)
+        raise
+    except Exception as e:
+        logger.warning("Failed to parse batch self-check response: %s", e)
+
+    # フォールバック: パース失敗時は許容とみなす
+    return [
+        SelfCheckResult(
+            score=3,
+            is_acceptable=True,
+            reason="セルフチェックの解析に失敗しました",
+        )
+        for _ in answers
+    ]
+
+
+async def _check_answers_memoized(
+    self_checks: dict[str, SelfCheckResult],
+    question: str,
+    answers: list[str],
+    threshold: int,
+) -> list[SelfCheckResult]:
+    """
+    Self-check answers, reusing verdicts for answers already checked.
+
+    Later steps can produce the same answer string as an earlier one; the
+    verdict for (question, answer) does not change within a request.
+    Answers without a verdict are checked together in one call.
+    """
+    keys = [hashlib.blake2b(a.encode(), digest_size=16).hexdigest() for a in answers]
+    missing = {key: answer for key, answer in zip(keys, answers, strict=True)}
+    for key in self_checks.keys() & missing.keys():
+        del missing[key]
+
+    if len(missing) == 1:
+        [(key, answer)] = missing.items()
+        self_checks[key] = await check_answer_consistency(question, answer, threshold)
+    elif missing:
+        checks = await check_answers_batch(question, list(missing.values()), threshold)
+        self_checks.update(zip(missing.keys(), checks, strict=True))
+
+    return [self_checks[key] for key in keys]
+
+
+def _finished_result(task: asyncio.Task | None) -> dict | None:
+    """Return a step task's result if it has already finished successfully."""
+    if task is None or not task.done() or task.cancelled():
+        return None
+    if task.exception() is not None:
+        return None
+    return task.result()
+
+
 async def search_qa_markdown(qa_content: str, question: str) -> dict | None:
     """
     Search answer in QA markdown using LLM semantic search.
@@ -189,11 +593,7 @@ async def search_qa_markdown(qa_content: str, question: str) -> dict | None:
     Raises:
         asyncio.TimeoutError: If operation times out
     """
-    import asyncio
-    import time
-
     start_time = time.time()
-    client = genai.Client(api_key=settings.gemini_api_key)
 
     prompt = f"""
 以下のFAQから、ユーザーの質問に対する回答を見つけてください。
@@ -204,81 +604,40 @@ async def search_qa_markdown(qa_content: str, question: str) -> dict | None:
 【FAQ内容】
 {qa_content}
 
-【質問タイプの判別】
-まず、ユーザーの質問が以下のどのタイプか判断してください：
-- 方法/手順型: 「〜の方法」「〜のやり方」「どうやって」「手順」「〜するには」
-  → 具体的なステップ・操作手順を回答すること
-- 頻度/タイミング型: 「いつ」「どのくらいの頻度」「何回」「タイミング」
-  → 時間・回数・周期を回答すること
-- 理由/原因型: 「なぜ」「どうして」「原因」「理由」
-  → 理由・背景・メカニズムを回答すること
-- トラブルシューティング型: 「〜できない」「〜しない」「故障」「エラー」
-  → 解決方法・対処手順を回答すること
-- 仕様/スペック型: 「何が」「どれくらい」「対応している」「サイズ」
-  → 製品情報・仕様を回答すること
-
-【回答の適合性チェック】
-◯ 良い回答例:
-- 質問「お手入れの方法を教えてください」
-  → 「1. 電源を切る 2. フィルターを外す 3. 水洗いする 4. 乾かして戻す」
-  （方法を聞かれて → 具体的な手順を回答 ✓）
-
-- 質問「いつ掃除すればいいですか」
-  → 「週に1回程度、または汚れが目立ってきたら掃除してください」
-  （頻度を聞かれて → 頻度・タイミングを回答 ✓）
-
-✕ 悪い回答例:
-- 質問「お手入れの方法を教えてください」
-  → 「使うたびにお手入れが必要です」
-  （方法を聞かれて → 頻度だけを回答 ✗）
-
-- 質問「いつ掃除すればいいですか」
-  → 「フィルターを外して水洗いします」
-  （頻度を聞かれて → 手順を回答 ✗）
-
-【回答の構造】
-質問タイプに応じて以下の構造で回答してください：
-- 方法/手順型: 1. まず結論 2. 具体的な手順（ステップ1, 2, 3...） 3. 注意点
-- 頻度/タイミング型: 1. 推奨頻度・タイミング 2. その理由（あれば）
-- トラブル型: 1. 考えられる原因 2. 対処方法 3. 解決しない場合の対応
-
 【重要な注意】
 - 質問タイプと回答内容が一致していることを必ず確認してください
 - 質問と関係のない情報は回答に含めないでください
-- 部分的にしか回答できない場合は「NOT_FOUND」としてください
+- 部分的にしか回答できない場合は "found": false としてください
 - 質問の意図から外れた回答は避けてください
 
 【出力形式】
-- 回答がある場合: {{"answer": "質問に対する具体的な回答（マークダウン記法は使用しない）", "reference": "P.XX"}}
-- 回答がない場合: NOT_FOUND
+- 回答がある場合: {{"found": true, "answer": "質問に対する具体的な回答（マークダウン記法は使用しない）", "reference": "P.XX"}}
+- 回答がない場合: {{"found": false, "answer": ""}}
 """
 
     try:
         async with asyncio.timeout(TIMEOUT_QA_SEARCH):
-            response = await client.aio.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
+            config = await with_cached_instruction(
+                "gemini-2.5-flash",
+                ANSWER_GUIDELINES_INSTRUCTION,
+                ANSWER_GENERATION_CONFIG,
+            )
+            response = await generate_content_deduped(
+                "gemini-2.5-flash", prompt, config
             )
         elapsed = time.time() - start_time
-        logger.info(f"search_qa_markdown completed in {elapsed:.2f}s")
+        logger.info("search_qa_markdown completed in %.2fs", elapsed)
     except TimeoutError:
         elapsed = time.time() - start_time
-        logger.warning(f"search_qa_markdown timed out after {elapsed:.2f}s")
+        logger.warning("search_qa_markdown timed out after %.2fs", elapsed)
         raise
 
-    text = response.text.strip()
-    if "NOT_FOUND" in text:
+    result = response.parsed
+    if not isinstance(result, QASearchResult):
+        logger.warning("Failed to parse QA search response: %s", response.text)
         return None
 
-    # Extract JSON part
-    try:
-        json_match = re.search(r"\{.+\}", text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-    except Exception as e:
-        logger.warning(f"Failed to parse QA search response: {e}")
-
-    return None
+    return result.model_dump() if result.found else None
 
 
 async def ask_text_cache(text_cache: str, question: str) -> dict | None:
@@ -286,7 +645,7 @@ async def ask_text_cache(text_cache: str, question: str) -> dict | None:
     Generate answer from text cache using LLM.
 
     Args:
-        text_cache: Cached text content
+        text_cache: Text cache passages selected for the question
         question: User question
 
     Returns:
@@ -295,13 +654,7 @@ async def ask_text_cache(text_cache: str, question: str) -> dict | None:
     Raises:
         asyncio.TimeoutError: If operation times out
     """
-    import time
-
     start_time = time.time()
-    client = genai.Client(api_key=settings.gemini_api_key)
-
-    # Truncate to avoid token limit
-    truncated_cache = text_cache[:50000]
 
     prompt = f"""
 以下の説明書テキストを参考に、ユーザーの質問に回答してください。
@@ -310,179 +663,88 @@ async def ask_text_cache(text_cache: str, question: str) -> dict | None:
 {question}
 
 【説明書内容】
-{truncated_cache}
-
-【質問タイプの判別】
-まず、ユーザーの質問が以下のどのタイプか判断してください：
-- 方法/手順型: 「〜の方法」「〜のやり方」「どうやって」「手順」「〜するには」
-  → 具体的なステップ・操作手順を回答すること
-- 頻度/タイミング型: 「いつ」「どのくらいの頻度」「何回」「タイミング」
-  → 時間・回数・周期を回答すること
-- 理由/原因型: 「なぜ」「どうして」「原因」「理由」
-  → 理由・背景・メカニズムを回答すること
-- トラブルシューティング型: 「〜できない」「〜しない」「故障」「エラー」
-  → 解決方法・対処手順を回答すること
-- 仕様/スペック型: 「何が」「どれくらい」「対応している」「サイズ」
-  → 製品情報・仕様を回答すること
+{text_cache}
 
-【回答の適合性チェック】
-◯ 良い回答例:
-- 質問「お手入れの方法を教えてください」
-  → 「1. 電源を切る 2. フィルターを外す 3. 水洗いする 4. 乾かして戻す」
-  （方法を聞かれて → 具体的な手順を回答 ✓）
-
-- 質問「いつ掃除すればいいですか」
-  → 「週に1回程度、または汚れが目立ってきたら掃除してください」
-  （頻度を聞かれて → 頻度・タイミングを回答 ✓）
-
-- 質問「なぜ電源が入らないのですか」
-  → 「バッテリー切れ、電源コードの接続不良、または安全装置が作動している可能性があります」
-  （原因を聞かれて → 考えられる原因を回答 ✓）
-
-✕ 悪い回答例:
-- 質問「お手入れの方法を教えてください」
-  → 「使うたびにお手入れが必要です」
-  （方法を聞かれて → 頻度だけを回答 ✗）
-
-- 質問「いつ掃除すればいいですか」
-  → 「フィルターを外して水洗いします」
-  （頻度を聞かれて → 手順を回答 ✗）
-
-- 質問「なぜ電源が入らないのですか」
-  → 「電源ボタンを3秒長押ししてください」
-  （原因を聞かれて → 操作方法を回答 ✗）
-
-【回答の構造】
-質問タイプに応じて以下の構造で回答してください：
-- 方法/手順型: 1. まず結論 2. 具体的な手順（ステップ1, 2, 3...） 3. 注意点
-- 頻度/タイミング型: 1. 推奨頻度・タイミング 2. その理由（あれば）
-- 理由/原因型: 1. 考えられる原因（複数ある場合は列挙） 2. 補足説明
-- トラブル型: 1. 考えられる原因 2. 対処方法 3. 解決しない場合の対応
-
-【情報源について】
-- メインは説明書の内容です
-- 説明書に記載がない場合は、あなたの一般知識で補完してください
-- 一般知識を使用した場合は、必ず "used_general_knowledge": true を設定してください
+{_GENERAL_KNOWLEDGE_GUIDE}
 
 【重要な注意】
 - 質問タイプと回答内容が一致していることを必ず確認してください
 - 質問に直接関係する情報のみを回答してください
 - 関係のない操作方法や機能の説明は含めないでください
-- 完全に回答できない場合のみ「NOT_FOUND」と返してください
+- 完全に回答できない場合のみ "found": false を返してください
 
 【出力形式】
 {{
+  "found": true/false（回答できた場合はtrue）,
   "answer": "質問に対する具体的な回答（マークダウン記法は使用しない）",
   "reference": "P.XX（説明書から参照した場合）",
   "used_general_knowledge": true/false
 }}
 """
 
-    import asyncio
-
     try:
         async with asyncio.timeout(TIMEOUT_TEXT_CACHE):
-            response = await client.aio.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
+            config = await with_cached_instruction(
+                "gemini-2.5-flash",
+                ANSWER_GUIDELINES_INSTRUCTION,
+                ANSWER_GENERATION_CONFIG,
+            )
+            response = await generate_content_deduped(
+                "gemini-2.5-flash", prompt, config
             )
         elapsed = time.time() - start_time
-        logger.info(f"ask_text_cache completed in {elapsed:.2f}s")
+        logger.info("ask_text_cache completed in %.2fs", elapsed)
     except TimeoutError:
         elapsed = time.time() - start_time
-        logger.warning(f"ask_text_cache timed out after {elapsed:.2f}s")
+        logger.warning("ask_text_cache timed out after %.2fs", elapsed)
         raise
 
-    text = response.text.strip()
-    if "NOT_FOUND" in text:
+    result = response.parsed
+    if not isinstance(result, QASearchResult):
+        logger.warning("Failed to parse text cache response: %s", response.text)
         return None
 
-    try:
-        json_match = re.search(r"\{.+\}", text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-    except Exception as e:
-        logger.warning(f"Failed to parse text cache response: {e}")
-
-    return None
+    return result.model_dump() if result.found else None
 
 
-async def ask_pdf_directly(pdf_bytes: bytes, question: str) -> dict:
+async def ask_pdf_directly(
+    manufacturer: str,
+    model_number: str,
+    pdf_bytes: bytes,
+    question: str,
+    on_delta: Callable[[str], None] | None = None,
+) -> dict:
     """
     Generate answer by directly referencing PDF using Gemini API.
 
+    The PDF is uploaded once per product via the File API and referenced by
+    URI; inline bytes are only sent if the upload is unavailable. The
+    response is streamed, and ``on_delta`` receives the answer text as it
+    is generated.
+
     Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
         pdf_bytes: PDF file bytes
         question: User question
+        on_delta: Callback for each new piece of the answer text (optional)
 
-    Returns:
-        Dict with "answer" and "reference" keys
-
-    Raises:
-        asyncio.TimeoutError: If operation times out
-    """
-    import time
-
-    start_time = time.time()
-    client = genai.Client(api_key=settings.gemini_api_key)
-
-    prompt = f"""
-この製品の説明書PDFを読んで、ユーザーの質問に回答してください。
-
-【質問】
-{question}
-
-【質問タイプの判別】
-まず、ユーザーの質問が以下のどのタイプか判断してください：
-- 方法/手順型: 「〜の方法」「〜のやり方」「どうやって」「手順」「〜するには」
-  → 具体的なステップ・操作手順を回答すること
-- 頻度/タイミング型: 「いつ」「どのくらいの頻度」「何回」「タイミング」
-  → 時間・回数・周期を回答すること
-- 理由/原因型: 「なぜ」「どうして」「原因」「理由」
-  → 理由・背景・メカニズムを回答すること
-- トラブルシューティング型: 「〜できない」「〜しない」「故障」「エラー」
-  → 解決方法・対処手順を回答すること
-- 仕様/スペック型: 「何が」「どれくらい」「対応している」「サイズ」
-  → 製品情報・仕様を回答すること
-
-【回答の適合性チェック】
-◯ 良い回答例:
-- 質問「お手入れの方法を教えてください」
-  → 「1. 電源を切る 2. フィルターを外す 3. 水洗いする 4. 乾かして戻す」
-  （方法を聞かれて → 具体的な手順を回答 ✓）
-
-- 質問「いつ掃除すればいいですか」
-  → 「週に1回程度、または汚れが目立ってきたら掃除してください」
-  （頻度を聞かれて → 頻度・タイミングを回答 ✓）
-
-- 質問「なぜ電源が入らないのですか」
-  → 「バッテリー切れ、電源コードの接続不良、または安全装置が作動している可能性があります」
-  （原因を聞かれて → 考えられる原因を回答 ✓）
-
-✕ 悪い回答例:
-- 質問「お手入れの方法を教えてください」
-  → 「使うたびにお手入れが必要です」
-  （方法を聞かれて → 頻度だけを回答 ✗）
-
-- 質問「いつ掃除すればいいですか」
-  → 「フィルターを外して水洗いします」
-  （頻度を聞かれて → 手順を回答 ✗）
+    Returns:
+        Dict with "answer" and "reference" keys
 
-- 質問「なぜ電源が入らないのですか」
-  → 「電源ボタンを3秒長押ししてください」
-  （原因を聞かれて → 操作方法を回答 ✗）
+    Raises:
+        asyncio.TimeoutError: If operation times out
+    """
+    start_time = time.time()
+    client = get_gemini_client()
 
-【回答の構造】
-質問タイプに応じて以下の構造で回答してください：
-- 方法/手順型: 1. まず結論 2. 具体的な手順（ステップ1, 2, 3...） 3. 注意点
-- 頻度/タイミング型: 1. 推奨頻度・タイミング 2. その理由（あれば）
-- 理由/原因型: 1. 考えられる原因（複数ある場合は列挙） 2. 補足説明
-- トラブル型: 1. 考えられる原因 2. 対処方法 3. 解決しない場合の対応
+    prompt = f"""
+この製品の説明書PDFを読んで、ユーザーの質問に回答してください。
 
-【情報源について】
-- メインは説明書の内容です
-- 説明書に記載がない場合は、あなたの一般知識で補完してください
-- 一般知識を使用した場合は、必ず "used_general_knowledge": true を設定してください
+【質問】
+{question}
+
+{_GENERAL_KNOWLEDGE_GUIDE}
 
 【重要な注意】
 - 質問タイプと回答内容が一致していることを必ず確認してください
@@ -498,42 +760,99 @@ async def ask_pdf_directly(pdf_bytes: bytes, question: str) -> dict:
 }}
 """
 
-    import asyncio
-
     try:
         async with asyncio.timeout(TIMEOUT_PDF_ANALYSIS):
-            response = await client.aio.models.generate_content(
+            file_uri = await get_pdf_file_uri(manufacturer, model_number, pdf_bytes)
+            if file_uri:
+                pdf_part = types.Part.from_uri(
+                    file_uri=file_uri, mime_type="application/pdf"
+                )
+            else:
+                pdf_part = types.Part.from_bytes(
+                    data=pdf_bytes, mime_type="application/pdf"
+                )
+
+            config = await with_cached_instruction(
+                "gemini-2.5-flash",
+                ANSWER_GUIDELINES_INSTRUCTION,
+                PDF_ANSWER_GENERATION_CONFIG,
+            )
+            stream = await client.aio.models.generate_content_stream(
                 model="gemini-2.5-flash",
                 contents=[
                     types.Content(
                         role="user",
                         parts=[
-                            types.Part.from_bytes(
-                                data=pdf_bytes, mime_type="application/pdf"
-                            ),
+                            pdf_part,
                             types.Part.from_text(text=prompt),
                         ],
                     ),
                 ],
+                config=config,
             )
+            response_text = ""
+            streamed_answer = ""
+            async for chunk in stream:
+                if not chunk.text:
+                    continue
+                response_text += chunk.text
+                if on_delta is None:
+                    continue
+                answer = _partial_answer(response_text)
+                if len(answer) > len(streamed_answer) and answer.startswith(
+                    streamed_answer
+                ):
+                    on_delta(answer[len(streamed_answer) :])
+                    streamed_answer = answer
         elapsed = time.time() - start_time
-        logger.info(f"ask_pdf_directly completed in {elapsed:.2f}s")
+        logger.info("ask_pdf_directly completed in %.2fs", elapsed)
     except TimeoutError:
         elapsed = time.time() - start_time
-        logger.warning(f"ask_pdf_directly timed out after {elapsed:.2f}s")
+        logger.warning("ask_pdf_directly timed out after %.2fs", elapsed)
         raise
 
-    text = response.text.strip()
+    try:
+        return PDFAnswerResult.model_validate_json(response_text).model_dump()
+    except ValidationError:
+        logger.warning("Failed to parse PDF response")
+        # Fallback: return raw text as answer
+        return {"answer": response_text.strip(), "reference": None}
+
 
+async def _embed_for_cache(question: str) -> array | None:
+    """Embed a question, giving up after SEMANTIC_CACHE_EMBED_TIMEOUT."""
     try:
-        json_match = re.search(r"\{.+\}", text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-    except Exception as e:
-        logger.warning(f"Failed to parse PDF response: {e}")
+        async with asyncio.timeout(SEMANTIC_CACHE_EMBED_TIMEOUT):
+            return await embed_question(question)
+    except TimeoutError:
+        logger.info("Question embedding timed out; skipping semantic cache")
+        return None
+
+
+async def _lookup_semantic_cache(
+    question: str, manufacturer: str, model_number: str
+) -> tuple[array | None, dict | None]:
+    """
+    Embed the question and look it up in the semantic answer cache.
 
-    # Fallback: return raw text as answer
-    return {"answer": text, "reference": None}
+    The embedding runs alongside the pipeline's preparation: the QA markdown
+    is loaded here, and callers start the text cache prefetch beforehand, so
+    a cache miss costs at most the time the embedding takes beyond those
+    loads (bounded by SEMANTIC_CACHE_EMBED_TIMEOUT).
+
+    Returns:
+        Tuple of (embedding, cached result); embedding is None if disabled
+    """
+    if not settings.qa_semantic_cache_enabled:
+        return None, None
+
+    embedding, _ = await asyncio.gather(
+        _embed_for_cache(question),
+        get_qa_markdown(manufacturer, model_number),
+    )
+    if embedding is None:
+        return None, None
+    return embedding, lookup_answer(manufacturer, model_number, question, embedding)
 
 
 async def answer_question(
@@ -545,6 +864,11 @@ async def answer_question(
     """
     Answer question using multi-source search: QA → text_cache → PDF.
 
+    Answers to semantically equivalent questions about the same product are
+    served from the semantic cache without calling the LLM steps. This path
+    does not self-check its answers, so it only reads the cache; entries are
+    written by answer_question_stream after a passing self-check.
+
     Args:
         question: User question
         manufacturer: Manufacturer name
@@ -554,12 +878,42 @@ async def answer_question(
     Returns:
         Dict with keys: answer, source, reference, added_to_qa
     """
+    # Start loading the text cache before the embedding call, not after it
+    text_index_task = (
+        _prefetch_text_index(manufacturer, model_number, pdf_bytes)
+        if pdf_bytes
+        else None
+    )
+    _, cached = await _lookup_semantic_cache(question, manufacturer, model_number)
+    if cached:
+        return {**cached, "added_to_qa": False}
+
+    return await _answer_question(
+        question, manufacturer, model_number, pdf_bytes, text_index_task
+    )
+
+
+async def _answer_question(
+    question: str,
+    manufacturer: str,
+    model_number: str,
+    pdf_bytes: bytes | None,
+    text_index_task: asyncio.Task | None,
+) -> dict:
+    """
+    Run the QA → text_cache → PDF pipeline (see answer_question).
+
+    ``text_index_task`` is the text cache prefetch started by the caller
+    (None without a PDF), so that it overlaps the semantic cache lookup and
+    Step 1.
+    """
+
     # Step 1: Search in QA markdown
     qa_content = await get_qa_markdown(manufacturer, model_number)
     if qa_content:
         result = await search_qa_markdown(qa_content, question)
         if result:
-            logger.info(f"Answer found in QA for {manufacturer} {model_number}")
+            logger.info("Answer found in QA for %s %s", manufacturer, model_number)
             return {
                 "answer": result["answer"],
                 "source": "qa",
@@ -569,26 +923,18 @@ async def answer_question(
 
     # Step 2: Search in text cache
     if pdf_bytes:
-        text_cache = await get_or_create_text_cache(
-            manufacturer, model_number, pdf_bytes
-        )
-        result = await ask_text_cache(text_cache, question)
+        result = await _prepare_text_cache_answer(text_index_task, question)
         if result:
-            logger.info(f"Answer found in text cache for {manufacturer} {model_number}")
-            # Append new QA to markdown
+            logger.info(
+                "Answer found in text cache for %s %s", manufacturer, model_number
+            )
+            # Append new QA to markdown (in the background)
             added = False
             if qa_content:
-                try:
-                    await append_qa_to_markdown(
-                        manufacturer,
-                        model_number,
-                        question,
-                        result["answer"],
-                        "text_cache",
-                    )
-                    added = True
-                except Exception as e:
-                    logger.error(f"Failed to append QA: {e}")
+                _schedule_qa_append(
+                    manufacturer, model_number, question, result["answer"], "text_cache"
+                )
+                added = True
 
             return {
                 "answer": result["answer"],
@@ -597,21 +943,18 @@ async def answer_question(
                 "added_to_qa": added,
             }
 
-    # Step 3: Ask PDF directly
-    if pdf_bytes:
-        result = await ask_pdf_directly(pdf_bytes, question)
-        logger.info(f"Answer generated from PDF for {manufacturer} {model_number}")
+    # Step 3: Ask PDF directly (skipped if the manual text can't cover the question)
+    if pdf_bytes and is_likely_answerable(text_index_task.result(), question):
+        result = await ask_pdf_directly(manufacturer, model_number, pdf_bytes, question)
+        logger.info("Answer generated from PDF for %s %s", manufacturer, model_number)
 
-        # Append new QA to markdown
+        # Append new QA to markdown (in the background)
         added = False
         if qa_content:
-            try:
-                await append_qa_to_markdown(
-                    manufacturer, model_number, question, result["answer"], "pdf"
-                )
-                added = True
-            except Exception as e:
-                logger.error(f"Failed to append QA: {e}")
+            _schedule_qa_append(
+                manufacturer, model_number, question, result["answer"], "pdf"
+            )
+            added = True
 
         return {
             "answer": result["answer"],
@@ -644,6 +987,13 @@ async def answer_question_stream(
 
     Yields SSE events for each step of the search process.
     Performs consistency check after each answer and falls back to next source if needed.
+    Verified answers are stored in the semantic cache, and questions without
+    history that match a cached answer are answered immediately.
+    While an answer is being self-checked, the next fallback step may be
+    started speculatively and discarded if the answer passes (see
+    _should_speculate; the PDF step is never started speculatively).
+    The PDF step (Step 3) streams its answer as "answer_delta" events before
+    the final "answer" event.
 
     Args:
         question: User question
@@ -656,6 +1006,89 @@ async def answer_question_stream(
     Yields:
         QAStreamEvent for each step and final answer
     """
+    # Start loading the text cache before the embedding call, not after it
+    text_index_task = (
+        _prefetch_text_index(manufacturer, model_number, pdf_bytes)
+        if pdf_bytes
+        else None
+    )
+
+    # Answers that depend on conversation history are not cached
+    embedding = None
+    if not history_context:
+        embedding, cached = await _lookup_semantic_cache(
+            question, manufacturer, model_number
+        )
+        if cached:
+            yield QAStreamEvent(event="answer", session_id=session_id, **cached)
+            return
+
+    step_tasks: set[asyncio.Task] = set()
+    try:
+        async for event in _answer_question_stream(
+            question,
+            manufacturer,
+            model_number,
+            pdf_bytes,
+            history_context,
+            session_id,
+            step_tasks,
+            text_index_task,
+        ):
+            # Only answers that passed the self-check are cached
+            if (
+                embedding
+                and event.event == "answer"
+                and event.source != "none"
+                and event.self_check_score is not None
+                and not event.needs_verification
+            ):
+                store_answer(
+                    manufacturer,
+                    model_number,
+                    question,
+                    embedding,
+                    event.model_dump(
+                        include={
+                            "answer",
+                            "source",
+                            "reference",
+                            "self_check_score",
+                            "used_general_knowledge",
+                        }
+                    ),
+                )
+            yield event
+    finally:
+        # Stop fallbacks that lost the race or were orphaned by a disconnect
+        for task in step_tasks:
+            _discard_speculative(task)
+
+
+async def _search_qa_step(qa_markdown_task: asyncio.Task, question: str) -> dict | None:
+    """Search the product's QA markdown, if it has one (Step 1)."""
+    qa_content = await qa_markdown_task
+    if not qa_content:
+        return None
+    return await search_qa_markdown(qa_content, question)
+
+
+async def _answer_question_stream(
+    question: str,
+    manufacturer: str,
+    model_number: str,
+    pdf_bytes: bytes | None,
+    history_context: str,
+    session_id: str | None,
+    step_tasks: set[asyncio.Task],
+    text_index_task: asyncio.Task | None,
+) -> AsyncGenerator[QAStreamEvent, None]:
+    """
+    Run the streaming QA pipeline (see answer_question_stream).
+
+    ``text_index_task`` is the text cache prefetch started by the caller
+    (None without a PDF).
+    """
     # Build full question with history context if provided
     if history_context:
         full_question = f"{history_context}\n\n【現在の質問】\n{question}\n\n【指示】\n会話の文脈を考慮して回答してください。「それ」「これ」などの指示語は、会話履歴から何を指しているか推測してください。"
@@ -665,444 +1098,249 @@ async def answer_question_stream(
     # Get self-check settings
     self_check_enabled = settings.qa_self_check_enabled
     self_check_threshold = settings.qa_self_check_threshold
+    # Self-check verdicts for this request, keyed by answer digest
+    self_checks: dict[str, SelfCheckResult] = {}
 
-    # Step 1: Search in QA markdown
-    yield QAStreamEvent(
-        event="step_start",
-        step=1,
-        step_name=STEP_DEFINITIONS[1],
+    # Load the QA markdown concurrently with Step 1
+    qa_markdown_task = _start_step(
+        step_tasks, get_qa_markdown(manufacturer, model_number)
     )
 
-    qa_content = await get_qa_markdown(manufacturer, model_number)
-    step1_timeout = False
-    if qa_content:
-        try:
-            result = await search_qa_markdown(qa_content, full_question)
-        except TimeoutError:
-            result = None
-            step1_timeout = True
-            yield QAStreamEvent(
-                event="step_timeout",
-                step=1,
-                step_name="QA検索がタイムアウトしました",
-                message="別の方法で検索を続けています...",
-            )
-
-        if result:
-            logger.info(f"Answer found in QA for {manufacturer} {model_number}")
-
-            # Self-check for QA result
-            if self_check_enabled:
-                yield QAStreamEvent(
-                    event="step_start",
-                    step=1.5,
-                    step_name=STEP_DEFINITIONS[1.5],
-                )
-                try:
-                    check = await check_answer_consistency(
-                        question, result["answer"], self_check_threshold
-                    )
-                except TimeoutError:
-                    # タイムアウト時は検証をスキップして回答を返す
-                    logger.warning("Self-check timed out for QA result, skipping check")
-                    yield QAStreamEvent(
-                        event="step_timeout",
-                        step=1.5,
-                        step_name="回答検証がタイムアウトしました",
-                        message="検証をスキップして回答を表示します",
-                    )
-                    yield QAStreamEvent(
-                        event="step_complete",
-                        step=1,
-                        step_name="QAデータベースで回答を発見",
-                    )
-                    yield QAStreamEvent(
-                        event="answer",
-                        answer=result["answer"],
-                        source="qa",
-                        reference=result.get("reference"),
-                        added_to_qa=False,
-                        session_id=session_id,
-                        needs_verification=True,
-                        used_general_knowledge=False,
-                    )
-                    return
-
-                yield QAStreamEvent(
-                    event="step_complete",
-                    step=1.5,
-                    step_name="回答検証完了",
-                    self_check_score=check.score,
-                )
-
-                if check.is_acceptable:
-                    yield QAStreamEvent(
-                        event="step_complete",
-                        step=1,
-                        step_name="QAデータベースで回答を発見",
-                    )
-                    yield QAStreamEvent(
-                        event="answer",
-                        answer=result["answer"],
-                        source="qa",
-                        reference=result.get("reference"),
-                        added_to_qa=False,
-                        session_id=session_id,
-                        self_check_score=check.score,
-                        used_general_knowledge=False,
-                    )
-                    return
-                else:
-                    # NG: Delete invalid QA and fallback to Step 2
-                    deleted = await delete_invalid_qa_from_storage(
-                        manufacturer, model_number, question
-                    )
-                    logger.warning(
-                        f"Deleted invalid QA entry (score={check.score}): "
-                        f"{question[:50]}... deleted={deleted}"
-                    )
-            else:
-                # Self-check disabled: return QA result directly
-                yield QAStreamEvent(
-                    event="step_complete",
-                    step=1,
-                    step_name="QAデータベースで回答を発見",
-                )
-                yield QAStreamEvent(
-                    event="answer",
-                    answer=result["answer"],
-                    source="qa",
-                    reference=result.get("reference"),
-                    added_to_qa=False,
-                    session_id=session_id,
-                    used_general_knowledge=False,
-                )
-                return
-
-    if not step1_timeout:
-        yield QAStreamEvent(
-            event="step_complete",
+    steps = [
+        SourceStep(
             step=1,
-            step_name="QAデータベースに該当なし",
-        )
-
-    # Step 2: Search in text cache
-    step2_timeout = False
+            source="qa",
+            run=lambda: _search_qa_step(qa_markdown_task, full_question),
+            start_name=STEP_QA_SEARCH,
+            found_name="QAデータベースで回答を発見",
+            not_found_name="QAデータベースに該当なし",
+            timeout_name="QA検索がタイムアウトしました",
+            appendable=False,
+        ),
+    ]
+    # Answer text streamed by Step 3 (answer_delta events)
+    pdf_deltas: asyncio.Queue[str] = asyncio.Queue()
     if pdf_bytes:
+        steps += [
+            SourceStep(
+                step=2,
+                source="text_cache",
+                run=lambda: _prepare_text_cache_answer(text_index_task, full_question),
+                start_name=STEP_TEXT_CACHE,
+                found_name="テキストキャッシュで回答を発見",
+                not_found_name="テキストキャッシュに該当なし",
+                timeout_name="テキスト検索がタイムアウトしました",
+            ),
+            SourceStep(
+                step=3,
+                source="pdf",
+                run=lambda: ask_pdf_directly(
+                    manufacturer,
+                    model_number,
+                    pdf_bytes,
+                    full_question,
+                    on_delta=pdf_deltas.put_nowait,
+                ),
+                start_name=STEP_PDF_ANALYSIS,
+                found_name="PDFから回答を生成",
+                not_found_name="PDFから回答を生成",
+                timeout_name="PDF分析がタイムアウトしました",
+                final=True,
+                answer_deltas=pdf_deltas,
+                # Don't send the PDF for questions the manual text can't cover.
+                # Follow-ups (「それの掃除方法は？」) take their subject from the
+                # history, so the gate only applies to questions without one
+                worthwhile=(
+                    None
+                    if history_context
+                    else lambda: is_likely_answerable(
+                        text_index_task.result(), question
+                    )
+                ),
+            ),
+        ]
+
+    # Steps started ahead of their turn while the previous answer is checked
+    started: dict[int, asyncio.Task] = {}
+    # Whether the previous step completed without finding an answer
+    previous_missed = False
+    if (
+        self_check_enabled
+        and len(steps) > 1
+        and _should_speculate(steps[0].source, steps[1])
+    ):
+        # With the self-check on and QA answers often rejected, Step 2 runs on
+        # most paths (as the fallback, or speculatively during Step 1.5), so
+        # start it alongside Step 1. If it finishes first, both answers are
+        # self-checked in one call.
+        started[steps[1].step] = _start_step(step_tasks, steps[1].run())
+
+    for index, step in enumerate(steps):
+        next_step = steps[index + 1] if index + 1 < len(steps) else None
+
+        if previous_missed and step.worthwhile is not None and not step.worthwhile():
+            logger.info(
+                "Skipping %s step: question is not covered by the manual", step.source
+            )
+            break
+        previous_missed = False
+
         yield QAStreamEvent(
             event="step_start",
-            step=2,
-            step_name=STEP_DEFINITIONS[2],
+            step=step.step,
+            step_name=step.start_name,
         )
 
+        task = started.pop(step.step, None) or _start_step(step_tasks, step.run())
         try:
-            text_cache = await get_or_create_text_cache(
-                manufacturer, model_number, pdf_bytes
-            )
-            result = await ask_text_cache(text_cache, full_question)
-        except TimeoutError:
-            result = None
-            step2_timeout = True
-            yield QAStreamEvent(
-                event="step_timeout",
-                step=2,
-                step_name="テキスト検索がタイムアウトしました",
-                message="別の方法で検索を続けています...",
-            )
-
-        if result:
-            logger.info(f"Answer found in text cache for {manufacturer} {model_number}")
-            used_general_knowledge = result.get("used_general_knowledge", False)
-
-            # Self-check for text cache result
-            if self_check_enabled:
-                yield QAStreamEvent(
-                    event="step_start",
-                    step=2.5,
-                    step_name=STEP_DEFINITIONS[2.5],
-                )
-                try:
-                    check = await check_answer_consistency(
-                        question, result["answer"], self_check_threshold
-                    )
-                except TimeoutError:
-                    # タイムアウト時は検証をスキップして回答を返す
-                    logger.warning(
-                        "Self-check timed out for text cache result, skipping check"
-                    )
-                    yield QAStreamEvent(
-                        event="step_timeout",
-                        step=2.5,
-                        step_name="回答検証がタイムアウトしました",
-                        message="検証をスキップして回答を表示します",
-                    )
-                    added = False
-                    if qa_content:
-                        try:
-                            await append_qa_to_markdown(
-                                manufacturer,
-                                model_number,
-                                question,
-                                result["answer"],
-                                "text_cache",
-                            )
-                            added = True
-                        except Exception as e:
-                            logger.error(f"Failed to append QA: {e}")
-
-                    yield QAStreamEvent(
-                        event="step_complete",
-                        step=2,
-                        step_name="テキストキャッシュで回答を発見",
-                    )
-                    yield QAStreamEvent(
-                        event="answer",
-                        answer=result["answer"],
-                        source="text_cache",
-                        reference=result.get("reference"),
-                        added_to_qa=added,
-                        session_id=session_id,
-                        needs_verification=True,
-                        used_general_knowledge=used_general_knowledge,
-                    )
-                    return
-
-                yield QAStreamEvent(
-                    event="step_complete",
-                    step=2.5,
-                    step_name="回答検証完了",
-                    self_check_score=check.score,
-                )
-
-                if check.is_acceptable:
-                    # OK: Append to QA and return
-                    added = False
-                    if qa_content:
-                        try:
-                            await append_qa_to_markdown(
-                                manufacturer,
-                                model_number,
-                                question,
-                                result["answer"],
-                                "text_cache",
-                            )
-                            added = True
-                        except Exception as e:
-                            logger.error(f"Failed to append QA: {e}")
-
+            if step.answer_deltas is not None:
+                # Stream the answer while it is generated; the final "answer"
+                # event still carries the complete text and self-check result
+                async for delta in _drain_answer_deltas(task, step.answer_deltas):
                     yield QAStreamEvent(
-                        event="step_complete",
-                        step=2,
-                        step_name="テキストキャッシュで回答を発見",
+                        event="answer_delta", step=step.step, delta=delta
                     )
-                    yield QAStreamEvent(
-                        event="answer",
-                        answer=result["answer"],
-                        source="text_cache",
-                        reference=result.get("reference"),
-                        added_to_qa=added,
-                        session_id=session_id,
-                        self_check_score=check.score,
-                        used_general_knowledge=used_general_knowledge,
-                    )
-                    return
-                else:
-                    # NG: Fallback to Step 3 (no FAQ append)
-                    logger.warning(
-                        f"Text cache answer failed consistency check "
-                        f"(score={check.score}): {check.reason}"
-                    )
-            else:
-                # Self-check disabled: return text cache result directly
-                added = False
-                if qa_content:
-                    try:
-                        await append_qa_to_markdown(
-                            manufacturer,
-                            model_number,
-                            question,
-                            result["answer"],
-                            "text_cache",
-                        )
-                        added = True
-                    except Exception as e:
-                        logger.error(f"Failed to append QA: {e}")
-
+            result = await task
+        except TimeoutError:
+            if step.final:
+                # 最後の手段もタイムアウトした場合はエラーを返す
                 yield QAStreamEvent(
-                    event="step_complete",
-                    step=2,
-                    step_name="テキストキャッシュで回答を発見",
+                    event="step_timeout",
+                    step=step.step,
+                    step_name=step.timeout_name,
+                    message="すべての検索方法がタイムアウトしました",
                 )
                 yield QAStreamEvent(
-                    event="answer",
-                    answer=result["answer"],
-                    source="text_cache",
-                    reference=result.get("reference"),
-                    added_to_qa=added,
+                    event="error",
+                    error="申し訳ありません。検索に時間がかかりすぎています。"
+                    "しばらく時間をおいて再度お試しください。",
                     session_id=session_id,
-                    used_general_knowledge=used_general_knowledge,
                 )
                 return
-
-        if not step2_timeout:
-            yield QAStreamEvent(
-                event="step_complete",
-                step=2,
-                step_name="テキストキャッシュに該当なし",
-            )
-
-    # Step 3: Ask PDF directly
-    if pdf_bytes:
-        yield QAStreamEvent(
-            event="step_start",
-            step=3,
-            step_name=STEP_DEFINITIONS[3],
-        )
-
-        try:
-            result = await ask_pdf_directly(pdf_bytes, full_question)
-        except TimeoutError:
-            # PDF分析もタイムアウトした場合はエラーを返す
             yield QAStreamEvent(
                 event="step_timeout",
-                step=3,
-                step_name="PDF分析がタイムアウトしました",
-                message="すべての検索方法がタイムアウトしました",
+                step=step.step,
+                step_name=step.timeout_name,
+                message="別の方法で検索を続けています...",
             )
+            continue
+
+        if not result:
             yield QAStreamEvent(
-                event="error",
-                error="申し訳ありません。検索に時間がかかりすぎています。"
-                "しばらく時間をおいて再度お試しください。",
-                session_id=session_id,
+                event="step_complete",
+                step=step.step,
+                step_name=step.not_found_name,
             )
-            return
+            previous_missed = True
+            continue
 
-        logger.info(f"Answer generated from PDF for {manufacturer} {model_number}")
-        used_general_knowledge = result.get("used_general_knowledge", False)
+        logger.info("Answer from %s for %s %s", step.source, manufacturer, model_number)
 
-        # Self-check for PDF result
+        check = None
+        needs_verification = False
         if self_check_enabled:
+            check_step = step.step + 0.5
             yield QAStreamEvent(
                 event="step_start",
-                step=3.5,
-                step_name=STEP_DEFINITIONS[3.5],
+                step=check_step,
+                step_name=STEP_SELF_CHECK,
             )
+            # Start the next step speculatively while this answer is checked
+            if (
+                next_step is not None
+                and next_step.step not in started
+                and _should_speculate(step.source, next_step)
+            ):
+                started[next_step.step] = _start_step(step_tasks, next_step.run())
+
+            # If the next step has already answered, check both in one call
+            answers = [result["answer"]]
+            next_result = _finished_result(
+                started.get(next_step.step) if next_step else None
+            )
+            if next_result:
+                answers.append(next_result["answer"])
+
             try:
-                check = await check_answer_consistency(
-                    question, result["answer"], self_check_threshold
+                [check, *_] = await _check_answers_memoized(
+                    self_checks, question, answers, self_check_threshold
                 )
             except TimeoutError:
                 # タイムアウト時は検証をスキップして回答を返す
-                logger.warning("Self-check timed out for PDF result, skipping check")
+                logger.warning(
+                    "Self-check timed out for %s result, skipping check", step.source
+                )
                 yield QAStreamEvent(
                     event="step_timeout",
-                    step=3.5,
+                    step=check_step,
                     step_name="回答検証がタイムアウトしました",
                     message="検証をスキップして回答を表示します",
                 )
-                yield QAStreamEvent(
-                    event="step_complete",
-                    step=3,
-                    step_name="PDFから回答を生成",
-                )
-                yield QAStreamEvent(
-                    event="answer",
-                    answer=result["answer"],
-                    source="pdf",
-                    reference=result.get("reference"),
-                    added_to_qa=False,
-                    session_id=session_id,
-                    needs_verification=True,
-                    used_general_knowledge=used_general_knowledge,
-                )
-                return
-
-            yield QAStreamEvent(
-                event="step_complete",
-                step=3.5,
-                step_name="回答検証完了",
-                self_check_score=check.score,
-            )
-
-            if check.is_acceptable:
-                # OK: Append to QA and return
-                added = False
-                if qa_content:
-                    try:
-                        await append_qa_to_markdown(
-                            manufacturer,
-                            model_number,
-                            question,
-                            result["answer"],
-                            "pdf",
-                        )
-                        added = True
-                    except Exception as e:
-                        logger.error(f"Failed to append QA: {e}")
-
-                yield QAStreamEvent(
-                    event="step_complete",
-                    step=3,
-                    step_name="PDFから回答を生成",
-                )
-                yield QAStreamEvent(
-                    event="answer",
-                    answer=result["answer"],
-                    source="pdf",
-                    reference=result.get("reference"),
-                    added_to_qa=added,
-                    session_id=session_id,
-                    self_check_score=check.score,
-                    used_general_knowledge=used_general_knowledge,
-                )
+                needs_verification = True
             else:
-                # NG: Return with warning (no FAQ append)
-                logger.warning(
-                    f"PDF answer failed consistency check "
-                    f"(score={check.score}): {check.reason}"
-                )
+                _record_self_check(step.source, check.is_acceptable)
                 yield QAStreamEvent(
                     event="step_complete",
-                    step=3,
-                    step_name="PDFから回答を生成",
-                )
-                yield QAStreamEvent(
-                    event="answer",
-                    answer=result["answer"],
-                    source="pdf",
-                    reference=result.get("reference"),
-                    added_to_qa=False,
-                    session_id=session_id,
+                    step=check_step,
+                    step_name="回答検証完了",
                     self_check_score=check.score,
-                    needs_verification=True,
-                    used_general_knowledge=used_general_knowledge,
                 )
-        else:
-            # Self-check disabled: return PDF result directly
-            added = False
-            if qa_content:
-                try:
-                    await append_qa_to_markdown(
-                        manufacturer, model_number, question, result["answer"], "pdf"
+
+                if not check.is_acceptable:
+                    logger.warning(
+                        "%s answer failed consistency check (score=%s): %s",
+                        step.source,
+                        check.score,
+                        check.reason,
                     )
-                    added = True
-                except Exception as e:
-                    logger.error(f"Failed to append QA: {e}")
+                    if step.source == "qa":
+                        # NG: Delete the invalid FAQ entry
+                        deleted = await delete_invalid_qa_from_storage(
+                            manufacturer, model_number, question
+                        )
+                        logger.warning(
+                            "Deleted invalid QA entry: %s... deleted=%s",
+                            question[:50],
+                            deleted,
+                        )
+                    if not step.final:
+                        # NG: Fall back to the next step
+                        yield QAStreamEvent(
+                            event="step_complete",
+                            step=step.step,
+                            step_name=step.not_found_name,
+                        )
+                        continue
+                    # NG on the last step: return with warning
+                    needs_verification = True
 
-            yield QAStreamEvent(
-                event="step_complete",
-                step=3,
-                step_name="PDFから回答を生成",
-            )
-            yield QAStreamEvent(
-                event="answer",
-                answer=result["answer"],
-                source="pdf",
-                reference=result.get("reference"),
-                added_to_qa=added,
-                session_id=session_id,
-                used_general_knowledge=used_general_knowledge,
+            if next_step is not None:
+                _discard_speculative(started.pop(next_step.step, None))
+
+        # Append verified answers to QA markdown (Step 1 has already finished)
+        added = False
+        if step.appendable and not needs_verification and qa_markdown_task.result():
+            _schedule_qa_append(
+                manufacturer, model_number, question, result["answer"], step.source
             )
+            added = True
+
+        yield QAStreamEvent(
+            event="step_complete",
+            step=step.step,
+            step_name=step.found_name,
+        )
+        yield QAStreamEvent(
+            event="answer",
+            answer=result["answer"],
+            source=step.source,
+            reference=result.get("reference"),
+            added_to_qa=added,
+            session_id=session_id,
+            self_check_score=check.score if check else None,
+            needs_verification=needs_verification,
+            used_general_knowledge=result.get("used_general_knowledge", False),
+        )
         return
 
     # No source available
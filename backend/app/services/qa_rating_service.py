@@ -1,16 +1,24 @@
 """QA rating service for feedback management and auto-deletion."""
 
+import asyncio
 import hashlib
 import logging
-import re
-from uuid import UUID
 
-from app.services.qa_service import get_qa_markdown, save_qa_markdown
+from app.services.qa_semantic_cache import invalidate_answers
+from app.services.qa_service import (
+    delete_user_qa_entry,
+    invalidate_qa_markdown,
+    is_user_qa_entry,
+)
 from app.services.supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
 DELETION_THRESHOLD = 3  # 低評価3件で削除
+APPLIANCE_PRODUCT_CACHE_MAXSIZE = 1024
+
+# shared_appliance_id -> (maker, model_number); these never change once created
+_appliance_product_cache: dict[str, tuple[str, str]] = {}
 
 
 def generate_question_hash(question: str) -> str:
@@ -21,15 +29,15 @@ def generate_question_hash(question: str) -> str:
         question: 質問テキスト
 
     Returns:
-        32文字のハッシュ文字列
+        32文字のハッシュ文字列（BLAKE2b 128bit）
     """
     normalized = question.strip().lower()
-    return hashlib.sha256(normalized.encode()).hexdigest()[:32]
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
 
 
 async def insert_rating(
-    shared_appliance_id: UUID,
-    user_id: UUID,
+    shared_appliance_id: str,
+    user_id: str,
     question: str,
     is_helpful: bool,
 ) -> dict:
@@ -52,17 +60,20 @@ async def insert_rating(
 
     question_hash = generate_question_hash(question)
 
-    # 1. 評価をDBに追加
+    # 1. 評価をDBに追加し、低評価の合計を取得（1回のRPC）
+    query = supabase.rpc(
+        "insert_qa_rating",
+        {
+            "p_shared_appliance_id": shared_appliance_id,
+            "p_user_id": user_id,
+            "p_question_hash": question_hash,
+            "p_question_text": question.strip(),
+            "p_is_helpful": is_helpful,
+        },
+    )
     try:
-        supabase.table("qa_ratings").insert(
-            {
-                "shared_appliance_id": str(shared_appliance_id),
-                "user_id": str(user_id),
-                "question_hash": question_hash,
-                "question_text": question.strip(),
-                "is_helpful": is_helpful,
-            }
-        ).execute()
+        response = await asyncio.to_thread(query.execute)
+        negative_count = response.data or 0
         logger.info(
             f"Rating inserted: appliance={shared_appliance_id}, "
             f"helpful={is_helpful}, hash={question_hash}"
@@ -71,156 +82,124 @@ async def insert_rating(
         logger.error(f"Failed to insert rating: {e}")
         return {"success": False, "negative_count": 0, "deleted": False}
 
-    # 2. 低評価の合計をカウント
-    negative_count = await count_negative_ratings(shared_appliance_id, question_hash)
-
-    # 3. 閾値以上なら削除処理
+    # 2. 閾値以上なら削除処理
     deleted = False
     if negative_count >= DELETION_THRESHOLD:
         logger.warning(
             f"Negative ratings reached threshold ({negative_count}): "
             f"Deleting QA for hash={question_hash}"
         )
-        deleted = await delete_qa_from_markdown(shared_appliance_id, question)
-
-        # 4. 削除成功したら関連評価も削除
-        if deleted:
-            await delete_ratings_for_question(shared_appliance_id, question_hash)
+        deleted = await delete_qa_from_markdown(
+            shared_appliance_id, question, question_hash
+        )
 
     return {"success": True, "negative_count": negative_count, "deleted": deleted}
 
 
-async def count_negative_ratings(
-    shared_appliance_id: UUID,
-    question_hash: str,
-) -> int:
+async def _get_appliance_product(
+    shared_appliance_id: str,
+) -> tuple[str, str] | None:
     """
-    指定QAの低評価合計をカウント.
+    共有家電の (maker, model_number) を取得（プロセス内キャッシュ付き）.
 
     Args:
         shared_appliance_id: 共有家電ID
-        question_hash: 質問ハッシュ
 
     Returns:
-        低評価（is_helpful=False）の件数
+        (maker, model_number)、取得できなかった場合はNone
     """
+    cached = _appliance_product_cache.get(shared_appliance_id)
+    if cached:
+        return cached
+
     supabase = get_supabase_client()
     if not supabase:
-        return 0
+        logger.error("Supabase client not available")
+        return None
 
+    query = (
+        supabase.table("shared_appliances")
+        .select("maker, model_number")
+        .eq("id", shared_appliance_id)
+        .single()
+    )
     try:
-        response = (
-            supabase.table("qa_ratings")
-            .select("id", count="exact")
-            .eq("shared_appliance_id", str(shared_appliance_id))
-            .eq("question_hash", question_hash)
-            .eq("is_helpful", False)
-            .execute()
-        )
-        return response.count or 0
+        response = await asyncio.to_thread(query.execute)
+        if not response.data:
+            logger.error(f"Shared appliance not found: {shared_appliance_id}")
+            return None
     except Exception as e:
-        logger.error(f"Failed to count negative ratings: {e}")
-        return 0
+        logger.error(f"Failed to get shared appliance: {e}")
+        return None
+
+    product = (response.data["maker"], response.data["model_number"])
+    if len(_appliance_product_cache) >= APPLIANCE_PRODUCT_CACHE_MAXSIZE:
+        _appliance_product_cache.pop(next(iter(_appliance_product_cache)))
+    _appliance_product_cache[shared_appliance_id] = product
+    return product
 
 
 async def delete_qa_from_markdown(
-    shared_appliance_id: UUID,
+    shared_appliance_id: str,
     question: str,
+    question_hash: str,
 ) -> bool:
     """
-    qa.mdからユーザー追加QAを削除。
+    ユーザー追加QA（qa_entries）と関連する評価レコードを削除。
+
+    QAの削除と評価の削除は purge_qa_entry RPC で1回にまとめて行う。
 
     Args:
         shared_appliance_id: 共有家電ID
         question: 削除対象の質問テキスト
+        question_hash: 質問ハッシュ
 
     Returns:
         削除成功した場合True、失敗した場合False
     """
-    supabase = get_supabase_client()
-    if not supabase:
-        logger.error("Supabase client not available")
-        return False
-
     # 1. shared_appliancesからmaker, model_numberを取得
-    try:
-        response = (
-            supabase.table("shared_appliances")
-            .select("maker, model_number")
-            .eq("id", str(shared_appliance_id))
-            .single()
-            .execute()
-        )
-        if not response.data:
-            logger.error(f"Shared appliance not found: {shared_appliance_id}")
-            return False
-
-        maker = response.data["maker"]
-        model_number = response.data["model_number"]
-    except Exception as e:
-        logger.error(f"Failed to get shared appliance: {e}")
+    product = await _get_appliance_product(shared_appliance_id)
+    if not product:
         return False
+    maker, model_number = product
 
-    # 2. get_qa_markdown() でマークダウン取得
-    try:
-        content = await get_qa_markdown(maker, model_number)
-        if not content:
-            logger.warning(f"QA markdown not found: {maker} {model_number}")
-            return False
-    except Exception as e:
-        logger.error(f"Failed to get QA markdown: {e}")
+    # キャッシュ済みのQAからユーザー追加QAでないと分かれば、削除クエリを省く
+    if is_user_qa_entry(maker, model_number, question) is False:
+        logger.info(f"Not a user-added QA, skipping deletion: {question[:50]}...")
         return False
 
-    # 3. remove_qa_entry() で該当QAを削除
-    updated_content = remove_qa_entry(content, question)
-
-    # 削除が実行されたかチェック（内容が変わっているか）
-    if updated_content == content:
-        logger.warning(f"QA entry not found in markdown: {question[:50]}...")
+    supabase = get_supabase_client()
+    if not supabase:
+        logger.error("Supabase client not available")
         return False
 
-    # 4. save_qa_markdown() で保存
+    # 2. qa_entriesから該当QAを削除し、削除できたら関連評価も削除（1回のRPC）
+    query = supabase.rpc(
+        "purge_qa_entry",
+        {
+            "p_shared_appliance_id": shared_appliance_id,
+            "p_maker": maker,
+            "p_model_number": model_number,
+            "p_question": question.strip(),
+            "p_question_hash": question_hash,
+        },
+    )
     try:
-        await save_qa_markdown(maker, model_number, updated_content)
-        logger.info(f"QA entry deleted from markdown: {maker} {model_number}")
-        return True
+        response = await asyncio.to_thread(query.execute)
     except Exception as e:
-        logger.error(f"Failed to save updated QA markdown: {e}")
+        logger.error(f"Failed to delete QA entry: {e}")
         return False
 
+    if not response.data:
+        logger.warning(f"QA entry not found: {question[:50]}...")
+        return False
 
-def remove_qa_entry(content: str, question: str) -> str:
-    """
-    マークダウンから指定の質問に対応するQAエントリを削除。
-
-    対象パターン:
-    ### Q: {question} (追加: YYYY-MM-DD)
-    **A**: ...
-    **ソース**: ...
-
-    Args:
-        content: マークダウン全文
-        question: 削除対象の質問テキスト
-
-    Returns:
-        削除後のマークダウン
-    """
-    escaped_question = re.escape(question.strip())
-
-    # パターン: ### Q: ... (追加: YYYY-MM-DD)\n**A**: ...\n**ソース**: ...\n
-    # 非貪欲マッチで次の ### または文末までを対象
-    pattern = (
-        rf"### Q: {escaped_question} \(追加: \d{{4}}-\d{{2}}-\d{{2}}\)\n"
-        r"\*\*A\*\*: .+?\n"
-        r"\*\*ソース\*\*: .+?\n"
+    invalidate_qa_markdown(maker, model_number)
+    invalidate_answers(maker, model_number)
+    logger.info(
+        f"QA entry and ratings deleted: {maker} {model_number}, hash={question_hash}"
     )
-
-    updated = re.sub(pattern, "", content, flags=re.DOTALL)
-
-    # 連続改行を整理（3つ以上の改行を2つに）
-    updated = re.sub(r"\n{3,}", "\n\n", updated)
-
-    return updated
+    return True
 
 
 async def delete_invalid_qa_from_storage(
@@ -229,7 +208,7 @@ async def delete_invalid_qa_from_storage(
     question: str,
 ) -> bool:
     """
-    Storageから不整合QAエントリを削除.
+    不整合なユーザー追加QAエントリを削除.
 
     セルフチェックで整合性NGと判断されたQAを削除する。
 
@@ -241,57 +220,21 @@ async def delete_invalid_qa_from_storage(
     Returns:
         削除成功した場合True、失敗した場合False
     """
-    # 1. get_qa_markdown() でマークダウン取得
-    try:
-        content = await get_qa_markdown(manufacturer, model_number)
-        if not content:
-            logger.warning(f"QA markdown not found: {manufacturer} {model_number}")
-            return False
-    except Exception as e:
-        logger.error(f"Failed to get QA markdown: {e}")
-        return False
-
-    # 2. remove_qa_entry() で該当QAを削除
-    updated_content = remove_qa_entry(content, question)
-
-    # 削除が実行されたかチェック（内容が変わっているか）
-    if updated_content == content:
-        logger.warning(f"QA entry not found in markdown: {question[:50]}...")
+    # 生成QA（説明書由来）への回答であれば、削除対象がないため省く
+    if is_user_qa_entry(manufacturer, model_number, question) is False:
+        logger.info(f"Not a user-added QA, skipping deletion: {question[:50]}...")
         return False
 
-    # 3. save_qa_markdown() で保存
     try:
-        await save_qa_markdown(manufacturer, model_number, updated_content)
-        logger.info(
-            f"Invalid QA entry deleted from markdown: {manufacturer} {model_number}"
-        )
-        return True
+        deleted = await delete_user_qa_entry(manufacturer, model_number, question)
     except Exception as e:
-        logger.error(f"Failed to save updated QA markdown: {e}")
+        logger.error(f"Failed to delete invalid QA entry: {e}")
         return False
 
+    if not deleted:
+        logger.warning(f"QA entry not found: {question[:50]}...")
+        return False
 
-async def delete_ratings_for_question(
-    shared_appliance_id: UUID,
-    question_hash: str,
-) -> None:
-    """
-    QA削除後、関連する評価レコードも削除.
-
-    Args:
-        shared_appliance_id: 共有家電ID
-        question_hash: 質問ハッシュ
-    """
-    supabase = get_supabase_client()
-    if not supabase:
-        return
-
-    try:
-        supabase.table("qa_ratings").delete().eq(
-            "shared_appliance_id", str(shared_appliance_id)
-        ).eq("question_hash", question_hash).execute()
-        logger.info(
-            f"Ratings deleted for appliance={shared_appliance_id}, hash={question_hash}"
-        )
-    except Exception as e:
-        logger.error(f"Failed to delete ratings: {e}")
+    invalidate_answers(manufacturer, model_number)
+    logger.info(f"Invalid QA entry deleted: {manufacturer} {model_number}")
+    return True
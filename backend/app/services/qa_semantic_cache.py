@@ -0,0 +1,188 @@
+"""
+Semantic answer cache for QA, keyed by product and question embedding.
+
+The cache is per process. invalidate_answers() only clears the instance that
+deleted the QA entry, so other instances can keep serving a deleted or
+downvoted answer until it expires; SEMANTIC_CACHE_TTL is kept short to bound
+that window.
+"""
+
+import logging
+import math
+import re
+import time
+import unicodedata
+from array import array
+
+from google.genai import types
+
+from app.services.gemini_client import get_gemini_client
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "gemini-embedding-001"
+EMBEDDING_DIMENSIONS = 768
+
+# コサイン距離がこの値未満なら同じ質問とみなす
+SEMANTIC_CACHE_THRESHOLD = 0.15
+# 秒（他インスタンスでのQA削除はこの時間だけ遅れて反映される）
+SEMANTIC_CACHE_TTL = 10 * 60
+SEMANTIC_CACHE_MAX_ENTRIES = 200  # 製品ごとの上限
+SEMANTIC_CACHE_MAX_PRODUCTS = (
+    256  # 保持する製品数の上限（最近使われていない製品から削除）
+)
+
+# 2文字以上の漢字・カタカナ・英数字の並び（質問の要点となる語）
+_KEY_WORD_RE = re.compile(r"[^\W\u3040-\u309f]{2,}")
+
+# (manufacturer, model_number) -> [(stored_at, embedding, key words, result)]
+# Products are kept in least-recently-used order
+_entries: dict[tuple[str, str], list[tuple[float, array, frozenset[str], dict]]] = {}
+
+
+def _normalize(vector: list[float]) -> array:
+    """Scale a vector to unit length so that cosine similarity is a dot product."""
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        return array("f", vector)
+    return array("f", (v / norm for v in vector))
+
+
+def _key_words(question: str) -> frozenset[str]:
+    """
+    Extract the words that distinguish one question from another.
+
+    Kanji, katakana and alphanumeric runs carry the subject of a question
+    (部品名, 操作, 数値, 型番); hiragana only carries grammar. Two questions
+    with different key words (e.g. 掃除方法 / 交換時期, 1時間 / 2時間) are
+    never treated as the same question, however close their embeddings are.
+    """
+    normalized = unicodedata.normalize("NFKC", question).lower()
+    return frozenset(_KEY_WORD_RE.findall(normalized))
+
+
+async def embed_question(question: str) -> array | None:
+    """
+    Compute a normalized embedding for a question.
+
+    Args:
+        question: Question text
+
+    Returns:
+        Unit-length embedding, or None if the embedding call failed
+    """
+    client = get_gemini_client()
+
+    try:
+        response = await client.aio.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=question,
+            config=types.EmbedContentConfig(
+                task_type="SEMANTIC_SIMILARITY",
+                output_dimensionality=EMBEDDING_DIMENSIONS,
+            ),
+        )
+        return _normalize(response.embeddings[0].values)
+    except Exception as e:
+        logger.warning(f"Failed to embed question for semantic cache: {e}")
+        return None
+
+
+def lookup_answer(
+    manufacturer: str,
+    model_number: str,
+    question: str,
+    embedding: array,
+    threshold: float = SEMANTIC_CACHE_THRESHOLD,
+) -> dict | None:
+    """
+    Find a cached answer to a semantically equivalent question.
+
+    A cached question matches only if its embedding is within ``threshold``
+    cosine distance and it has the same key words as ``question``.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+        question: Question text
+        embedding: Normalized question embedding
+        threshold: Maximum cosine distance for a hit
+
+    Returns:
+        Cached result dict (answer, source, reference, ...), or None on miss
+    """
+    key = (manufacturer, model_number)
+    entries = _entries.pop(key, None)
+    if not entries:
+        return None
+
+    now = time.monotonic()
+    entries[:] = [e for e in entries if now - e[0] < SEMANTIC_CACHE_TTL]
+    if entries:
+        _entries[key] = entries
+
+    key_words = _key_words(question)
+    best_result = None
+    best_distance = threshold
+    for _, cached_embedding, cached_key_words, result in entries:
+        if cached_key_words != key_words:
+            continue
+        distance = 1 - sum(
+            a * b for a, b in zip(embedding, cached_embedding, strict=True)
+        )
+        if distance < best_distance:
+            best_distance = distance
+            best_result = result
+
+    if best_result is not None:
+        logger.info(
+            f"Semantic cache hit for {manufacturer} {model_number} "
+            f"(distance={best_distance:.3f})"
+        )
+    return best_result
+
+
+def store_answer(
+    manufacturer: str,
+    model_number: str,
+    question: str,
+    embedding: array,
+    result: dict,
+) -> None:
+    """
+    Store an answer for later semantic lookups.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+        question: Question text
+        embedding: Normalized question embedding
+        result: Answer result dict to return on future hits
+    """
+    key = (manufacturer, model_number)
+    entries = _entries.pop(key, None)
+    if entries is None:
+        entries = []
+        if len(_entries) >= SEMANTIC_CACHE_MAX_PRODUCTS:
+            _entries.pop(next(iter(_entries)))
+    _entries[key] = entries
+
+    if len(entries) >= SEMANTIC_CACHE_MAX_ENTRIES:
+        entries.pop(0)
+    entries.append((time.monotonic(), embedding, _key_words(question), result))
+
+
+def invalidate_answers(manufacturer: str, model_number: str) -> None:
+    """
+    Drop all cached answers for a product.
+
+    Called when QA entries are deleted so that answers rejected by the
+    self-check or user feedback are not served from the cache. Only this
+    process is cleared; other instances drop the answers after
+    SEMANTIC_CACHE_TTL.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+    """
+    _entries.pop((manufacturer, model_number), None)
@@ -1,20 +1,36 @@
 """QA markdown generation and management service."""
 
+import asyncio
 import logging
-import re
+import time
+from collections.abc import AsyncGenerator
 from datetime import UTC, datetime
 
-from google import genai
 from google.genai import types
 
-from app.config import settings
 from app.schemas.qa import QAMetadata
+from app.services.gemini_client import get_gemini_client
 from app.services.pdf_storage import get_qa_path
 from app.services.supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
 
+# QA markdownのプロセス内キャッシュ設定
+QA_MARKDOWN_CACHE_TTL = 30  # 秒
+QA_MARKDOWN_CACHE_MAXSIZE = 1024
+
+# (manufacturer, model_number) -> (cached_at, content)
+_qa_markdown_cache: dict[tuple[str, str], tuple[float, str | None]] = {}
+# Per-key locks so concurrent cold reads share a single Storage download
+_qa_markdown_locks: dict[tuple[str, str], asyncio.Lock] = {}
+# User-added questions included in each cached copy (same lifetime as the cache)
+_user_qa_questions: dict[tuple[str, str], set[str]] = {}
+
+# フロントマターの構成要素（parse_qa_metadata / _set_last_updated_at で使用）
+_FRONTMATTER_DELIMITER = "---\n"
+_LAST_UPDATED_PREFIX = "last_updated_at: "
+
 QA_GENERATION_PROMPT = """
 この製品の説明書PDFを読んで、よくある質問（FAQ）をMarkdown形式で生成してください。
 
@@ -149,15 +165,19 @@ last_updated_at: {now}
 """
 
 
-async def generate_qa_markdown(
+async def stream_qa_markdown(
     pdf_bytes: bytes,
     manufacturer: str,
     model_number: str,
     category: str,
     shared_appliance_id: str,
-) -> str:
+) -> AsyncGenerator[str, None]:
     """
-    Generate QA markdown from PDF using Gemini API.
+    Generate QA markdown from PDF using Gemini API, yielding it piece by piece.
+
+    The header is yielded before the model call starts and the generated
+    QA as each response chunk arrives, so callers can begin displaying or
+    persisting the document without waiting for the whole response.
 
     Args:
         pdf_bytes: PDF file bytes
@@ -166,12 +186,14 @@ async def generate_qa_markdown(
         category: Product category
         shared_appliance_id: Shared appliance ID
 
-    Returns:
-        Complete QA markdown content
+    Yields:
+        Consecutive pieces of the QA markdown content
     """
-    client = genai.Client(api_key=settings.gemini_api_key)
+    yield generate_qa_header(shared_appliance_id, manufacturer, model_number)
 
-    response = await client.aio.models.generate_content(
+    client = get_gemini_client()
+
+    stream = await client.aio.models.generate_content_stream(
         model="gemini-2.5-flash",
         contents=[
             types.Content(
@@ -183,41 +205,183 @@ async def generate_qa_markdown(
             ),
         ],
     )
-
-    header = generate_qa_header(shared_appliance_id, manufacturer, model_number)
-    qa_content = response.text
+    async for chunk in stream:
+        if chunk.text:
+            yield chunk.text
 
     # Add user-added QA section
-    footer = "\n\n## ユーザー追加QA\n"
+    yield "\n\n## ユーザー追加QA\n"
 
-    return header + qa_content + footer
 
-
-async def get_qa_markdown(manufacturer: str, model_number: str) -> str | None:
+async def generate_qa_markdown(
+    pdf_bytes: bytes,
+    manufacturer: str,
+    model_number: str,
+    category: str,
+    shared_appliance_id: str,
+) -> str:
     """
-    Get QA markdown from Supabase Storage.
+    Generate QA markdown from PDF using Gemini API.
 
     Args:
+        pdf_bytes: PDF file bytes
         manufacturer: Manufacturer name
         model_number: Model number
+        category: Product category
+        shared_appliance_id: Shared appliance ID
 
     Returns:
-        QA markdown content or None if not found
+        Complete QA markdown content
     """
+    parts = [
+        part
+        async for part in stream_qa_markdown(
+            pdf_bytes, manufacturer, model_number, category, shared_appliance_id
+        )
+    ]
+    return "".join(parts)
+
+
+def _remember_qa_markdown(key: tuple[str, str], content: str | None) -> None:
+    """Store QA markdown in the in-process cache, evicting the oldest entry."""
+    if key not in _qa_markdown_cache and (
+        len(_qa_markdown_cache) >= QA_MARKDOWN_CACHE_MAXSIZE
+    ):
+        oldest = next(iter(_qa_markdown_cache))
+        _qa_markdown_cache.pop(oldest, None)
+        _qa_markdown_locks.pop(oldest, None)
+        _user_qa_questions.pop(oldest, None)
+    _qa_markdown_cache[key] = (time.monotonic(), content)
+
+
+async def _download_qa_markdown(manufacturer: str, model_number: str) -> str | None:
+    """Download QA markdown from Supabase Storage, bypassing the cache."""
     supabase = get_supabase_client()
     qa_path = get_qa_path(manufacturer, model_number)
 
     try:
-        response = supabase.storage.from_("manuals").download(qa_path)
+        response = await asyncio.to_thread(
+            supabase.storage.from_("manuals").download, qa_path
+        )
         return response.decode("utf-8")
     except Exception as e:
         logger.debug(f"QA not found: {qa_path}, error: {e}")
         return None
 
 
+def _set_last_updated_at(content: str, value: str) -> str:
+    """Replace the last_updated_at value in the frontmatter."""
+    start = content.find(_LAST_UPDATED_PREFIX)
+    if start == -1:
+        return content
+    start += len(_LAST_UPDATED_PREFIX)
+    end = content.find("\n", start)
+    if end == -1:
+        end = len(content)
+    return content[:start] + value + content[end:]
+
+
+def _render_user_qa_entry(entry: dict) -> str:
+    """Render a qa_entries row in the user-added QA markdown format."""
+    return f"""
+### Q: {entry["question"]} (追加: {entry["added_at"][:10]})
+**A**: {entry["answer"]}
+**ソース**: {entry["source"]}
+"""
+
+
+def _merge_user_qa_entries(content: str, entries: list[dict]) -> str:
+    """
+    Append user-added QA rows to the generated QA markdown.
+
+    The result is laid out exactly as when each entry was appended to qa.md
+    directly: one newline between entries and a trailing newline.
+
+    Args:
+        content: QA markdown stored in Supabase Storage
+        entries: qa_entries rows ordered by added_at
+
+    Returns:
+        QA markdown including the user-added entries
+    """
+    if not entries:
+        return content
+
+    content = _set_last_updated_at(content, entries[-1]["added_at"])
+    rendered = "".join(_render_user_qa_entry(e).rstrip() for e in entries)
+    return content.rstrip() + rendered + "\n"
+
+
+async def _list_user_qa_entries(
+    manufacturer: str, model_number: str
+) -> list[dict] | None:
+    """Get user-added QA rows for a product, oldest first (None on failure)."""
+    supabase = get_supabase_client()
+    query = (
+        supabase.table("qa_entries")
+        .select("question, answer, source, added_at")
+        .eq("maker", manufacturer)
+        .eq("model_number", model_number)
+        .order("added_at")
+    )
+
+    try:
+        response = await asyncio.to_thread(query.execute)
+        return response.data or []
+    except Exception as e:
+        logger.warning(f"Failed to get user-added QA entries: {e}")
+        return None
+
+
+async def get_qa_markdown(manufacturer: str, model_number: str) -> str | None:
+    """
+    Get QA markdown through a short-TTL in-process cache.
+
+    The generated QA is stored in Supabase Storage and user-added QA in the
+    qa_entries table; both are combined into a single markdown document.
+    Concurrent misses for the same product are coalesced behind a per-key
+    lock so only one Storage download is issued.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+
+    Returns:
+        QA markdown content or None if not found
+    """
+    key = (manufacturer, model_number)
+    entry = _qa_markdown_cache.get(key)
+    if entry and time.monotonic() - entry[0] < QA_MARKDOWN_CACHE_TTL:
+        return entry[1]
+
+    lock = _qa_markdown_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        # Another coroutine may have filled the entry while we waited
+        entry = _qa_markdown_cache.get(key)
+        if entry and time.monotonic() - entry[0] < QA_MARKDOWN_CACHE_TTL:
+            return entry[1]
+
+        # The file and the user-added rows are independent; fetch both at once
+        content, entries = await asyncio.gather(
+            _download_qa_markdown(manufacturer, model_number),
+            _list_user_qa_entries(manufacturer, model_number),
+        )
+        _user_qa_questions.pop(key, None)
+        if content:
+            if entries is not None:
+                content = _merge_user_qa_entries(content, entries)
+                _user_qa_questions[key] = {e["question"] for e in entries}
+        _remember_qa_markdown(key, content)
+
+    return content
+
+
 async def save_qa_markdown(manufacturer: str, model_number: str, content: str) -> str:
     """
-    Save QA markdown to Supabase Storage.
+    Save generated QA markdown to Supabase Storage.
+
+    User-added QA is kept in the qa_entries table and is not part of the
+    saved content.
 
     Args:
         manufacturer: Manufacturer name
@@ -230,20 +394,28 @@ async def save_qa_markdown(manufacturer: str, model_number: str, content: str) -
     supabase = get_supabase_client()
     qa_path = get_qa_path(manufacturer, model_number)
 
-    supabase.storage.from_("manuals").upload(
-        qa_path,
-        content.encode("utf-8"),
-        {"content-type": "text/plain", "upsert": "true"},
-    )
+    try:
+        await asyncio.to_thread(
+            supabase.storage.from_("manuals").upload,
+            qa_path,
+            content.encode("utf-8"),
+            {"content-type": "text/plain", "upsert": "true"},
+        )
+    finally:
+        # The next read merges the new file with the user-added entries
+        _qa_markdown_cache.pop((manufacturer, model_number), None)
 
     return qa_path
 
 
 async def append_qa_to_markdown(
     manufacturer: str, model_number: str, question: str, answer: str, source: str
-) -> str:
+) -> None:
     """
-    Append new QA to markdown file.
+    Add a user-added QA entry for a product.
+
+    The entry is inserted into qa_entries instead of re-uploading the whole
+    QA markdown file.
 
     Args:
         manufacturer: Manufacturer name
@@ -252,9 +424,6 @@ async def append_qa_to_markdown(
         answer: Answer text
         source: Source of answer ("text_cache" or "pdf")
 
-    Returns:
-        Updated QA markdown content
-
     Raises:
         ValueError: If QA markdown not found
     """
@@ -262,21 +431,96 @@ async def append_qa_to_markdown(
     if not content:
         raise ValueError("QA markdown not found")
 
-    # Update last_updated_at in metadata
-    now = datetime.now(UTC).isoformat()
-    content = re.sub(r"last_updated_at: .+", f"last_updated_at: {now}", content)
-
-    # Append to user-added QA section
-    date_str = datetime.now(UTC).strftime("%Y-%m-%d")
-    new_qa = f"""
-### Q: {question} (追加: {date_str})
-**A**: {answer}
-**ソース**: {source}
-"""
+    supabase = get_supabase_client()
+    query = supabase.table("qa_entries").insert(
+        {
+            "maker": manufacturer,
+            "model_number": model_number,
+            "question": question.strip(),
+            "answer": answer,
+            "source": source,
+        }
+    )
+    response = await asyncio.to_thread(query.execute)
 
-    content = content.rstrip() + new_qa
-    await save_qa_markdown(manufacturer, model_number, content)
-    return content
+    # Keep the cached copy current without another download
+    key = (manufacturer, model_number)
+    entry = _qa_markdown_cache.get(key)
+    if entry and entry[1] and response.data:
+        _remember_qa_markdown(key, _merge_user_qa_entries(entry[1], response.data))
+        if key in _user_qa_questions:
+            _user_qa_questions[key].add(question.strip())
+
+
+async def delete_user_qa_entry(
+    manufacturer: str, model_number: str, question: str
+) -> bool:
+    """
+    Delete a user-added QA entry for a product.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+        question: Question text of the entry to delete
+
+    Returns:
+        True if an entry was deleted, False if none matched
+    """
+    supabase = get_supabase_client()
+    query = (
+        supabase.table("qa_entries")
+        .delete()
+        .eq("maker", manufacturer)
+        .eq("model_number", model_number)
+        .eq("question", question.strip())
+    )
+    response = await asyncio.to_thread(query.execute)
+    if not response.data:
+        return False
+
+    invalidate_qa_markdown(manufacturer, model_number)
+    return True
+
+
+def invalidate_qa_markdown(manufacturer: str, model_number: str) -> None:
+    """
+    Drop the cached QA markdown for a product.
+
+    Called after user-added QA rows are changed outside this module.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+    """
+    _qa_markdown_cache.pop((manufacturer, model_number), None)
+
+
+def is_user_qa_entry(
+    manufacturer: str, model_number: str, question: str
+) -> bool | None:
+    """
+    Check whether a question is a user-added QA entry, without any I/O.
+
+    Answered from the questions loaded with the cached QA markdown, so it
+    is only as fresh as that cache.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+        question: Question text
+
+    Returns:
+        True/False if known from a fresh cached copy, None if not cached
+    """
+    key = (manufacturer, model_number)
+    entry = _qa_markdown_cache.get(key)
+    if not entry or time.monotonic() - entry[0] >= QA_MARKDOWN_CACHE_TTL:
+        return None
+
+    questions = _user_qa_questions.get(key)
+    if questions is None:
+        return None
+    return question.strip() in questions
 
 
 def parse_qa_metadata(content: str) -> QAMetadata | None:
@@ -289,11 +533,14 @@ def parse_qa_metadata(content: str) -> QAMetadata | None:
     Returns:
         Parsed metadata or None if not found
     """
-    match = re.search(r"---\n(.+?)\n---", content, re.DOTALL)
-    if not match:
+    # フロントマターは常に先頭にあるため、文書全体を走査しない
+    if not content.startswith(_FRONTMATTER_DELIMITER):
+        return None
+    end = content.find("\n---", len(_FRONTMATTER_DELIMITER))
+    if end == -1:
         return None
 
-    metadata_text = match.group(1)
+    metadata_text = content[len(_FRONTMATTER_DELIMITER) : end]
     metadata = {}
     for line in metadata_text.strip().split("\n"):
         if ": " in line:
@@ -327,4 +574,4 @@ def count_qa_items(content: str) -> int:
     Returns:
         Number of QA items
     """
-    return len(re.findall(r"### Q:", content))
+    return content.count("### Q:")
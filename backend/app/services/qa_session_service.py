@@ -9,18 +9,90 @@ QA機能の会話履歴を管理するサービス。
 
 import asyncio
 import logging
+import time
 from datetime import UTC, datetime, timedelta
 
-from google import genai
+from google.genai import types
 
 from app.config import settings
 from app.schemas.qa import ChatHistoryMessage, QASessionDetail, QASessionSummary
+from app.services.gemini_client import (
+    get_background_gemini_semaphore,
+    get_gemini_client,
+)
 from app.services.supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# 期限切れセッションの非アクティブ化は DB関数 deactivate_expired_qa_sessions（pg_cron）が
+# 同じ6時間で行う
 SESSION_TIMEOUT_HOURS = 6
 
+SESSION_CACHE_MAXSIZE = 1024
+
+# セッション一覧で使うqa_sessionsの列（一覧に不要な列は取得しない）
+SESSION_LIST_COLUMNS = (
+    "id, shared_appliance_id, is_active, summary, created_at, last_activity_at"
+)
+
+GROUP_ID_CACHE_TTL = 300  # 秒
+
+# (user_id, shared_appliance_id) -> (stored_at, group_id or None)
+_group_id_cache: dict[tuple[str, str], tuple[float, str | None]] = {}
+
+# 会話履歴プロンプトでの発言者ラベル（user以外はアシスタント）
+_ROLE_LABELS = {"user": "ユーザー"}
+
+# session_id -> 実行中の要約生成タスク（強参照でGCを防ぎ、同じセッションの重複生成を避ける）
+_pending_summaries: dict[str, asyncio.Task] = {}
+
+SUMMARY_MODEL = "gemini-2.0-flash"
+# タイトル生成には質問の冒頭で十分なため、これを超える部分は送らない
+SUMMARY_QUESTION_MAX_CHARS = 1000
+# シャットダウン時に実行中の要約生成を待つ最大秒数（Cloud Run の終了猶予10秒以内）
+SUMMARY_DRAIN_TIMEOUT = 8
+# 要約再生成ジョブ1回で処理するセッション数
+SUMMARY_BACKFILL_BATCH_SIZE = 50
+
+# 要約プロンプトの固定部分（質問だけを contents として送る）
+SUMMARY_INSTRUCTION = """入力される質問を15文字以内の短いタイトルに要約してください。
+質問の核心を捉えた簡潔な表現にしてください。
+
+【指示】
+- 15文字以内で回答
+- 「〜について」「〜の質問」などは省略
+- 具体的なキーワードを残す
+- タイトルのみを出力（説明不要）"""
+
+# 指示はコンテキストキャッシュの最小サイズに満たないため、毎回そのまま送る
+SUMMARY_GENERATION_CONFIG = types.GenerateContentConfig(
+    system_instruction=SUMMARY_INSTRUCTION
+)
+
+
+def _remember_group_id(key: tuple[str, str], group_id: str | None) -> None:
+    """家電のgroup_idをキャッシュに保存（上限に達したら最も古いエントリを削除）"""
+    if key not in _group_id_cache and len(_group_id_cache) >= SESSION_CACHE_MAXSIZE:
+        _group_id_cache.pop(next(iter(_group_id_cache)))
+    _group_id_cache[key] = (time.monotonic(), group_id)
+
+
+def invalidate_group_id_cache(user_id: str | None = None) -> None:
+    """
+    家電のgroup_idキャッシュを破棄.
+
+    グループへの参加・離脱・削除時に呼び出し、離脱したグループのgroup_idが
+    新しいセッションに設定されないようにする。
+
+    Args:
+        user_id: 対象ユーザー（Noneなら全ユーザー分を破棄）
+    """
+    if user_id is None:
+        _group_id_cache.clear()
+        return
+    for key in [k for k in _group_id_cache if k[0] == user_id]:
+        del _group_id_cache[key]
+
 
 async def generate_summary(question: str) -> str | None:
     """
@@ -32,29 +104,23 @@ async def generate_summary(question: str) -> str | None:
     Returns:
         要約されたタイトル（最大30文字程度）、失敗時はNone
     """
+    question = question.strip()
+    # 短すぎる質問はそのままタイトルにする
+    if len(question) < 3:
+        return question or None
+
     if not settings.gemini_api_key:
         logger.warning("Gemini API key not configured")
         return None
 
     try:
-        client = genai.Client(api_key=settings.gemini_api_key)
-
-        prompt = f"""以下の質問を15文字以内の短いタイトルに要約してください。
-質問の核心を捉えた簡潔な表現にしてください。
-
-【質問】
-{question}
-
-【指示】
-- 15文字以内で回答
-- 「〜について」「〜の質問」などは省略
-- 具体的なキーワードを残す
-- タイトルのみを出力（説明不要）"""
-
-        response = await client.aio.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-        )
+        client = get_gemini_client()
+        async with get_background_gemini_semaphore():
+            response = await client.aio.models.generate_content(
+                model=SUMMARY_MODEL,
+                contents=question[:SUMMARY_QUESTION_MAX_CHARS],
+                config=SUMMARY_GENERATION_CONFIG,
+            )
 
         summary = response.text.strip()
         # 長すぎる場合は切り詰め
@@ -66,18 +132,21 @@ async def generate_summary(question: str) -> str | None:
         return None
 
 
-async def update_session_summary(session_id: str, summary: str) -> None:
-    """セッションのsummaryを更新."""
+async def update_session_summary(session_id: str, summary: str) -> bool:
+    """セッションのsummaryを更新（成功したらTrue）."""
     client = get_supabase_client()
     if not client:
-        return
+        return False
 
+    query = (
+        client.table("qa_sessions").update({"summary": summary}).eq("id", session_id)
+    )
     try:
-        client.table("qa_sessions").update({"summary": summary}).eq(
-            "id", session_id
-        ).execute()
+        await asyncio.to_thread(query.execute)
     except Exception as e:
         logger.error(f"Failed to update session summary: {e}")
+        return False
+    return True
 
 
 async def _generate_and_save_summary(session_id: str, question: str) -> None:
@@ -90,6 +159,70 @@ async def _generate_and_save_summary(session_id: str, question: str) -> None:
         logger.error(f"Error in _generate_and_save_summary: {e}")
 
 
+def _schedule_summary(session_id: str, question: str) -> None:
+    """要約生成をバックグラウンドで開始（同じセッションで実行中なら何もしない）"""
+    if session_id in _pending_summaries:
+        return
+
+    task = asyncio.create_task(_generate_and_save_summary(session_id, question))
+    _pending_summaries[session_id] = task
+    task.add_done_callback(lambda _: _pending_summaries.pop(session_id, None))
+
+
+async def drain_pending_summaries(timeout: float = SUMMARY_DRAIN_TIMEOUT) -> None:
+    """
+    実行中の要約生成の完了を待つ（シャットダウン時に呼び出す）.
+
+    Args:
+        timeout: 待機する最大秒数（超過したタスクはキャンセルされ、
+            backfill_missing_summaries で再生成される）
+    """
+    tasks = list(_pending_summaries.values())
+    if not tasks:
+        return
+
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Cancelled {len(pending)} session summaries on shutdown")
+
+
+async def backfill_missing_summaries(
+    limit: int = SUMMARY_BACKFILL_BATCH_SIZE,
+) -> dict:
+    """
+    要約が保存されなかったセッションのタイトルを生成し直す（Cronジョブ用）.
+
+    対象セッションの確保・試行回数の記録・バックオフは DB関数
+    claim_qa_sessions_missing_summary が行う。
+
+    Args:
+        limit: 1回で処理するセッション数の上限
+
+    Returns:
+        dict with sessions_processed and summaries_saved
+    """
+    client = get_supabase_client()
+    if not client:
+        logger.error("Supabase client not available")
+        return {"sessions_processed": 0, "summaries_saved": 0}
+
+    query = client.rpc("claim_qa_sessions_missing_summary", {"p_limit": limit})
+    result = await asyncio.to_thread(query.execute)
+    rows = [row for row in result.data or [] if row.get("question")]
+
+    summaries = await asyncio.gather(
+        *(generate_summary(row["question"]) for row in rows)
+    )
+    saved = 0
+    for row, summary in zip(rows, summaries, strict=True):
+        if summary and await update_session_summary(row["session_id"], summary):
+            saved += 1
+
+    return {"sessions_processed": len(rows), "summaries_saved": saved}
+
+
 async def get_sessions_for_appliance(
     user_id: str, shared_appliance_id: str, group_id: str | None = None
 ) -> list[QASessionSummary]:
@@ -109,39 +242,63 @@ async def get_sessions_for_appliance(
         if group_id:
             # グループ家電 - 2つの方法で取得
             # 1. group_idが設定されたセッション（新方式、離脱者含む）
-            sessions_by_group = (
+            sessions_by_group_query = (
                 client.table("qa_sessions")
-                .select("*")
+                .select(SESSION_LIST_COLUMNS)
                 .eq("group_id", group_id)
                 .eq("shared_appliance_id", shared_appliance_id)
-                .execute()
             )
 
             # 2. 現在のグループメンバーのセッション（後方互換性）
-            members_result = (
-                client.table("group_members")
-                .select("user_id")
-                .eq("group_id", group_id)
-                .execute()
+            members_query = (
+                client.table("group_members").select("user_id").eq("group_id", group_id)
             )
-            member_ids = [m["user_id"] for m in (members_result.data or [])]
 
-            sessions_by_members = {"data": []}
+            # 1とメンバー一覧は互いに独立しているため並行して取得
+            group_result, members_result = await asyncio.gather(
+                asyncio.to_thread(sessions_by_group_query.execute),
+                asyncio.to_thread(members_query.execute),
+                return_exceptions=True,
+            )
+            if isinstance(group_result, BaseException) and isinstance(
+                members_result, BaseException
+            ):
+                raise group_result
+
+            # 片方だけ失敗した場合は取得できた分で一覧を返す
+            sessions_by_group = []
+            if isinstance(group_result, BaseException):
+                logger.warning(f"Failed to get group sessions: {group_result}")
+            else:
+                sessions_by_group = group_result.data or []
+
+            member_ids = []
+            if isinstance(members_result, BaseException):
+                logger.warning(f"Failed to get group members: {members_result}")
+            else:
+                member_ids = [m["user_id"] for m in (members_result.data or [])]
+
+            sessions_by_members = []
             if member_ids:
-                sessions_by_members = (
+                sessions_by_members_query = (
                     client.table("qa_sessions")
-                    .select("*")
+                    .select(SESSION_LIST_COLUMNS)
                     .in_("user_id", member_ids)
                     .eq("shared_appliance_id", shared_appliance_id)
                     .is_("group_id", "null")  # group_idが未設定のもの（旧方式）
-                    .execute()
                 )
+                try:
+                    sessions_by_members = (
+                        await asyncio.to_thread(sessions_by_members_query.execute)
+                    ).data or []
+                except Exception as e:
+                    logger.warning(f"Failed to get group member sessions: {e}")
 
             # マージして重複排除（IDで）
             all_sessions_map = {}
-            for row in sessions_by_group.data or []:
+            for row in sessions_by_group:
                 all_sessions_map[row["id"]] = row
-            for row in sessions_by_members.data or []:
+            for row in sessions_by_members:
                 if row["id"] not in all_sessions_map:
                     all_sessions_map[row["id"]] = row
 
@@ -154,101 +311,108 @@ async def get_sessions_for_appliance(
             result_data = all_sessions
         else:
             # 個人家電 - 自分のセッションのみ
-            result = (
+            query = (
                 client.table("qa_sessions")
-                .select("*")
+                .select(SESSION_LIST_COLUMNS)
                 .eq("user_id", user_id)
                 .eq("shared_appliance_id", shared_appliance_id)
                 .order("last_activity_at", desc=True)
-                .execute()
             )
+            result = await asyncio.to_thread(query.execute)
             result_data = result.data or []
     except Exception as e:
         logger.error(f"Failed to get sessions: {e}")
         return []
 
+    # 全セッションのメッセージ数と最初のユーザー質問を1回のRPCで取得
+    meta_by_session: dict[str, dict] = {}
+    if result_data:
+        meta_query = client.rpc(
+            "get_qa_session_meta",
+            {"p_session_ids": [row["id"] for row in result_data]},
+        )
+        try:
+            meta_result = await asyncio.to_thread(meta_query.execute)
+            meta_by_session = {m["session_id"]: m for m in meta_result.data or []}
+        except Exception as e:
+            logger.error(f"Failed to get session messages meta: {e}")
+
     sessions = []
     for row in result_data:
-        # 各セッションのメッセージ数と最初のユーザー質問を取得
-        try:
-            messages_result = (
-                client.table("qa_session_messages")
-                .select("id, role, content")
-                .eq("session_id", row["id"])
-                .order("created_at")
-                .execute()
+        meta = meta_by_session.get(row["id"], {})
+        first_message = meta.get("first_user_message")
+        if first_message is not None:
+            first_message = first_message[:50] + (
+                "..." if len(first_message) > 50 else ""
             )
 
-            messages = messages_result.data or []
-            message_count = len(messages)
-            first_message = None
-            for msg in messages:
-                if msg["role"] == "user":
-                    first_message = msg["content"][:50] + (
-                        "..." if len(msg["content"]) > 50 else ""
-                    )
-                    break
-
-            sessions.append(
-                QASessionSummary(
-                    id=row["id"],
-                    shared_appliance_id=row["shared_appliance_id"],
-                    is_active=row["is_active"],
-                    message_count=message_count,
-                    summary=row.get("summary"),
-                    first_message=first_message,
-                    created_at=row["created_at"],
-                    last_activity_at=row["last_activity_at"],
-                )
+        sessions.append(
+            QASessionSummary.model_construct(
+                id=row["id"],
+                shared_appliance_id=row["shared_appliance_id"],
+                is_active=row["is_active"],
+                message_count=meta.get("message_count", 0),
+                summary=row.get("summary"),
+                first_message=first_message,
+                created_at=datetime.fromisoformat(row["created_at"]),
+                last_activity_at=datetime.fromisoformat(row["last_activity_at"]),
             )
-        except Exception as e:
-            logger.error(f"Failed to process session {row['id']}: {e}")
-            continue
+        )
 
     return sessions
 
 
 async def get_session_detail(session_id: str, user_id: str) -> QASessionDetail | None:
     """セッション詳細を取得（メッセージ含む）"""
+
     client = get_supabase_client()
     if not client:
         logger.error("Supabase client not available")
         return None
 
+    query = (
+        client.table("qa_sessions")
+        .select("*")
+        .eq("id", session_id)
+        .eq("user_id", user_id)
+        .maybe_single()
+    )
     try:
-        result = (
-            client.table("qa_sessions")
-            .select("*")
-            .eq("id", session_id)
-            .eq("user_id", user_id)
-            .single()
-            .execute()
-        )
+        result = await asyncio.to_thread(query.execute)
     except Exception as e:
         logger.error(f"Failed to get session detail: {e}")
         return None
 
-    if not result.data:
+    # maybe_single() は該当行がなければ None を返す
+    if not result or not result.data:
         return None
 
-    row = result.data
-    messages = await get_session_messages(session_id)
+    return await _build_session_detail(result.data)
+
 
-    return QASessionDetail(
+async def _build_session_detail(row: dict) -> QASessionDetail:
+    """取得済みのqa_sessions行からセッション詳細を組み立てる（メッセージのみ取得）"""
+    messages = await get_session_messages(row["id"])
+
+    return QASessionDetail.model_construct(
         id=row["id"],
         user_id=row["user_id"],
         shared_appliance_id=row["shared_appliance_id"],
         is_active=row["is_active"],
         messages=messages,
-        created_at=row["created_at"],
-        last_activity_at=row["last_activity_at"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+        last_activity_at=datetime.fromisoformat(row["last_activity_at"]),
     )
 
 
 async def get_or_create_active_session(
     user_id: str, shared_appliance_id: str
 ) -> QASessionDetail:
-    """アクティブセッションを取得、なければ作成"""
+    """アクティブセッションを取得、なければ作成
+
+    リセット・再開は他インスタンスで行われることもあるため、アクティブな
+    セッションは毎回DBで確認する（複合インデックスによる1行の検索）。
+    """
     client = get_supabase_client()
     if not client:
         logger.error("Supabase client not available")
@@ -257,29 +421,27 @@ async def get_or_create_active_session(
     # 6時間以内のアクティブセッションを検索
     timeout_threshold = datetime.now(UTC) - timedelta(hours=SESSION_TIMEOUT_HOURS)
 
+    query = (
+        client.table("qa_sessions")
+        .select("*")
+        .eq("user_id", user_id)
+        .eq("shared_appliance_id", shared_appliance_id)
+        .eq("is_active", True)
+        .gte("last_activity_at", timeout_threshold.isoformat())
+        .order("last_activity_at", desc=True)
+        .limit(1)
+    )
     try:
-        result = (
-            client.table("qa_sessions")
-            .select("*")
-            .eq("user_id", user_id)
-            .eq("shared_appliance_id", shared_appliance_id)
-            .eq("is_active", True)
-            .gte("last_activity_at", timeout_threshold.isoformat())
-            .single()
-            .execute()
-        )
-
+        result = await asyncio.to_thread(query.execute)
+    except Exception as e:
+        logger.warning(f"Failed to look up active session: {e}")
+    else:
         if result.data:
             # 既存のアクティブセッションを返す
-            return await get_session_detail(result.data["id"], user_id)
-    except Exception as e:
-        # single()でレコードが見つからない場合は例外が発生するが、想定内
-        logger.debug(f"No active session found: {e}")
-
-    # タイムアウトしたアクティブセッションがあれば非アクティブ化
-    await _deactivate_user_active_sessions(user_id, shared_appliance_id)
+            return await _build_session_detail(result.data[0])
 
-    # 新規セッションを作成
+    # 新規セッションを作成（タイムアウトしたアクティブセッションは
+    # create_new_session 内で非アクティブ化される）
     return await create_new_session(user_id, shared_appliance_id)
 
 
@@ -291,10 +453,15 @@ async def _deactivate_user_active_sessions(
     if not client:
         return
 
+    query = (
+        client.table("qa_sessions")
+        .update({"is_active": False})
+        .eq("user_id", user_id)
+        .eq("shared_appliance_id", shared_appliance_id)
+        .eq("is_active", True)
+    )
     try:
-        client.table("qa_sessions").update({"is_active": False}).eq(
-            "user_id", user_id
-        ).eq("shared_appliance_id", shared_appliance_id).eq("is_active", True).execute()
+        await asyncio.to_thread(query.execute)
     except Exception as e:
         logger.error(f"Failed to deactivate sessions: {e}")
 
@@ -306,7 +473,13 @@ async def _get_group_id_for_shared_appliance(
 
     user_appliancesテーブルを検索して、ユーザーがグループ経由で
     この家電にアクセスしている場合はそのgroup_idを返す。
+    結果（グループ家電でない場合のNoneを含む）はGROUP_ID_CACHE_TTLの間キャッシュする。
     """
+    key = (user_id, shared_appliance_id)
+    entry = _group_id_cache.get(key)
+    if entry and time.monotonic() - entry[0] < GROUP_ID_CACHE_TTL:
+        return entry[1]
+
     client = get_supabase_client()
     if not client:
         return None
@@ -314,31 +487,29 @@ async def _get_group_id_for_shared_appliance(
     try:
         # まずグループ家電を検索（group_idが設定されているもの）
         # ユーザーがグループメンバーである場合、group_membersを通じて確認
-        group_members = (
-            client.table("group_members")
-            .select("group_id")
-            .eq("user_id", user_id)
-            .execute()
+        group_members_query = (
+            client.table("group_members").select("group_id").eq("user_id", user_id)
         )
+        group_members = await asyncio.to_thread(group_members_query.execute)
 
         if not group_members.data:
+            _remember_group_id(key, None)
             return None
 
         group_id = group_members.data[0]["group_id"]
 
         # このグループにこのshared_appliance_idの家電があるか確認
-        group_appliance = (
+        group_appliance_query = (
             client.table("user_appliances")
             .select("id")
             .eq("shared_appliance_id", shared_appliance_id)
             .eq("group_id", group_id)
-            .execute()
         )
+        group_appliance = await asyncio.to_thread(group_appliance_query.execute)
 
-        if group_appliance.data:
-            return group_id
-
-        return None
+        result = group_id if group_appliance.data else None
+        _remember_group_id(key, result)
+        return result
     except Exception as e:
         logger.error(f"Failed to get group_id for appliance: {e}")
         return None
@@ -355,11 +526,12 @@ async def create_new_session(user_id: str, shared_appliance_id: str) -> QASessio
         logger.error("Supabase client not available")
         raise RuntimeError("Supabase client not available")
 
-    # 既存のアクティブセッションを非アクティブ化
-    await _deactivate_user_active_sessions(user_id, shared_appliance_id)
-
-    # グループ家電かどうか確認してgroup_idを取得
-    group_id = await _get_group_id_for_shared_appliance(user_id, shared_appliance_id)
+    # 既存のアクティブセッションの非アクティブ化と、グループ家電かどうかの
+    # 確認（group_idの取得）は互いに独立しているため並行して行う
+    _, group_id = await asyncio.gather(
+        _deactivate_user_active_sessions(user_id, shared_appliance_id),
+        _get_group_id_for_shared_appliance(user_id, shared_appliance_id),
+    )
 
     # 新規セッション作成
     insert_data = {
@@ -370,21 +542,22 @@ async def create_new_session(user_id: str, shared_appliance_id: str) -> QASessio
     if group_id:
         insert_data["group_id"] = group_id
 
+    query = client.table("qa_sessions").insert(insert_data)
     try:
-        result = client.table("qa_sessions").insert(insert_data).execute()
+        result = await asyncio.to_thread(query.execute)
     except Exception as e:
         logger.error(f"Failed to create session: {e}")
         raise RuntimeError(f"Failed to create session: {e}") from e
 
     row = result.data[0]
-    return QASessionDetail(
+    return QASessionDetail.model_construct(
         id=row["id"],
         user_id=row["user_id"],
         shared_appliance_id=row["shared_appliance_id"],
         is_active=row["is_active"],
         messages=[],
-        created_at=row["created_at"],
-        last_activity_at=row["last_activity_at"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+        last_activity_at=datetime.fromisoformat(row["last_activity_at"]),
     )
 
 
@@ -404,76 +577,62 @@ async def add_message(
         logger.error("Supabase client not available")
         return
 
-    # 最初のユーザーメッセージかチェック（要約生成用）
-    is_first_user_message = False
-    if role == "user":
-        try:
-            existing = (
-                client.table("qa_session_messages")
-                .select("id", count="exact")
-                .eq("session_id", session_id)
-                .eq("role", "user")
-                .execute()
-            )
-            is_first_user_message = (existing.count or 0) == 0
-        except Exception as e:
-            logger.warning(f"Failed to check existing messages: {e}")
-
+    # メッセージ追加と最初のユーザーメッセージ判定を1回のRPCで行う
+    # （last_activity_at は qa_session_messages のトリガーで更新される）
+    query = client.rpc(
+        "add_qa_session_message",
+        {
+            "p_session_id": session_id,
+            "p_role": role,
+            "p_content": content,
+            "p_source": source or None,
+            "p_reference": reference or None,
+        },
+    )
     try:
-        # メッセージ追加
-        message_data: dict = {
-            "session_id": session_id,
-            "role": role,
-            "content": content,
-        }
-        if source:
-            message_data["source"] = source
-        if reference:
-            message_data["reference"] = reference
-
-        client.table("qa_session_messages").insert(message_data).execute()
-
-        # last_activity_at更新
-        client.table("qa_sessions").update(
-            {"last_activity_at": datetime.now(UTC).isoformat()}
-        ).eq("id", session_id).execute()
-
-        # 最初のユーザーメッセージなら要約を生成（バックグラウンド）
-        if is_first_user_message:
-            asyncio.create_task(_generate_and_save_summary(session_id, content))
+        response = await asyncio.to_thread(query.execute)
     except Exception as e:
         logger.error(f"Failed to add message: {e}")
+        return
+
+    # 最初のユーザーメッセージなら要約を生成（バックグラウンド）
+    if response.data:
+        _schedule_summary(session_id, content)
 
 
 async def get_session_messages(
     session_id: str, limit: int = 20
 ) -> list[ChatHistoryMessage]:
-    """セッションのメッセージを取得（古い順）"""
+    """セッションの直近のメッセージを取得（古い順）
+
+    新しい順に limit 件を取得してから並べ替えるため、長いセッションでも
+    (session_id, created_at) インデックスの範囲スキャンで直近の会話を返す。
+    """
     client = get_supabase_client()
     if not client:
         logger.error("Supabase client not available")
         return []
 
+    query = (
+        client.table("qa_session_messages")
+        .select("*")
+        .eq("session_id", session_id)
+        .order("created_at", desc=True)
+        .limit(limit)
+    )
     try:
-        result = (
-            client.table("qa_session_messages")
-            .select("*")
-            .eq("session_id", session_id)
-            .order("created_at")
-            .limit(limit)
-            .execute()
-        )
+        result = await asyncio.to_thread(query.execute)
 
         return [
-            ChatHistoryMessage(
+            ChatHistoryMessage.model_construct(
                 id=row["id"],
                 role=row["role"],
                 content=row["content"],
                 source=row.get("source"),
                 reference=row.get("reference"),
-                created_at=row["created_at"],
+                created_at=datetime.fromisoformat(row["created_at"]),
             )
-            for row in (result.data or [])
+            for row in reversed(result.data or [])
         ]
     except Exception as e:
         logger.error(f"Failed to get session messages: {e}")
@@ -485,11 +644,11 @@ def format_history_for_prompt(messages: list[ChatHistoryMessage]) -> str:
     if not messages:
         return ""
 
-    lines = ["【会話履歴】"]
-    for msg in messages:
-        role_label = "ユーザー" if msg.role == "user" else "アシスタント"
-        lines.append(f"{role_label}: {msg.content}")
-    return "\n".join(lines)
+    body = "\n".join(
+        f"{_ROLE_LABELS.get(msg.role, 'アシスタント')}: {msg.content}"
+        for msg in messages
+    )
+    return f"【会話履歴】\n{body}"
 
 
 async def reset_active_session(user_id: str, shared_appliance_id: str) -> str | None:
@@ -502,32 +661,6 @@ async def reset_active_session(user_id: str, shared_appliance_id: str) -> str |
         return None
 
 
-async def deactivate_expired_sessions() -> int:
-    """6時間以上アクティビティがないセッションを非アクティブ化"""
-    client = get_supabase_client()
-    if not client:
-        logger.error("Supabase client not available")
-        return 0
-
-    timeout_threshold = datetime.now(UTC) - timedelta(hours=SESSION_TIMEOUT_HOURS)
-
-    try:
-        result = (
-            client.table("qa_sessions")
-            .update({"is_active": False})
-            .eq("is_active", True)
-            .lt("last_activity_at", timeout_threshold.isoformat())
-            .execute()
-        )
-
-        count = len(result.data) if result.data else 0
-        logger.info(f"Deactivated {count} expired QA sessions")
-        return count
-    except Exception as e:
-        logger.error(f"Failed to deactivate expired sessions: {e}")
-        return 0
-
-
 async def resume_session(session_id: str, user_id: str) -> QASessionDetail | None:
     """過去のセッションを再開（アクティブ化）"""
     client = get_supabase_client()
@@ -536,20 +669,20 @@ async def resume_session(session_id: str, user_id: str) -> QASessionDetail | Non
         return None
 
     # 指定セッションを取得
+    query = (
+        client.table("qa_sessions")
+        .select("*")
+        .eq("id", session_id)
+        .eq("user_id", user_id)
+        .maybe_single()
+    )
     try:
-        result = (
-            client.table("qa_sessions")
-            .select("*")
-            .eq("id", session_id)
-            .eq("user_id", user_id)
-            .single()
-            .execute()
-        )
+        result = await asyncio.to_thread(query.execute)
     except Exception as e:
         logger.error(f"Failed to get session for resume: {e}")
         return None
 
-    if not result.data:
+    if not result or not result.data:
         return None
 
     shared_appliance_id = result.data["shared_appliance_id"]
@@ -558,15 +691,15 @@ async def resume_session(session_id: str, user_id: str) -> QASessionDetail | Non
     await _deactivate_user_active_sessions(user_id, shared_appliance_id)
 
     # 指定セッションをアクティブ化
+    # （last_activity_at は qa_sessions のトリガーでDB側の時刻に更新される）
+    query = client.table("qa_sessions").update({"is_active": True}).eq("id", session_id)
     try:
-        client.table("qa_sessions").update(
-            {
-                "is_active": True,
-                "last_activity_at": datetime.now(UTC).isoformat(),
-            }
-        ).eq("id", session_id).execute()
+        resumed = await asyncio.to_thread(query.execute)
     except Exception as e:
         logger.error(f"Failed to resume session: {e}")
         return None
 
-    return await get_session_detail(session_id, user_id)
+    if not resumed.data:
+        return None
+
+    return await _build_session_detail(resumed.data[0])
@@ -3,11 +3,18 @@
 import logging
 from functools import lru_cache
 
+import httpx
+
 from app.config import settings
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
 
 logger = logging.getLogger(__name__)
 
+# PostgREST / Storage で共有するHTTP接続プールの設定
+SUPABASE_HTTP_TIMEOUT = 120  # 秒（PostgRESTの既定値に合わせる）
+SUPABASE_MAX_KEEPALIVE_CONNECTIONS = 20
+SUPABASE_KEEPALIVE_EXPIRY = 30  # 秒
+
 
 @lru_cache
 def get_supabase_client() -> Client | None:
@@ -15,6 +22,8 @@ def get_supabase_client() -> Client | None:
     Get Supabase client instance (singleton).
 
     Uses secret_key to bypass RLS for backend operations.
+    PostgREST and Storage share one keep-alive httpx connection pool
+    instead of each opening its own.
     Returns None if Supabase is not configured.
 
     Returns:
@@ -33,7 +42,18 @@ def get_supabase_client() -> Client | None:
         return None
 
     try:
-        return create_client(settings.supabase_url, key)
+        http_client = httpx.Client(
+            timeout=SUPABASE_HTTP_TIMEOUT,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+            ),
+        )
+        return create_client(
+            settings.supabase_url, key, ClientOptions(httpx_client=http_client)
+        )
     except Exception as e:
         logger.error(f"Error creating Supabase client: {e}", exc_info=True)
         return None
@@ -1,13 +1,19 @@
 """Text cache service for PDF text extraction and caching."""
 
 import asyncio
+import gzip
 import logging
+import math
+import re
+import sys
 import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
 
-from google import genai
 from google.genai import types
 
-from app.config import settings
+from app.services.gemini_client import get_gemini_client
 from app.services.pdf_storage import get_text_cache_path
 from app.services.supabase_client import get_supabase_client
 
@@ -16,6 +22,55 @@ logger = logging.getLogger(__name__)
 # タイムアウト設定（秒）
 TIMEOUT_TEXT_EXTRACTION = 120  # PDF テキスト抽出（大型PDFで時間がかかる）
 
+# QA回答時にLLMへ渡すテキストキャッシュの上限
+TEXT_CACHE_WINDOW_MODEL = "gemini-2.5-flash"
+TEXT_CACHE_PASSAGE_TOKENS = 12000  # 質問ごとに選ぶ抜粋のトークン予算
+TEXT_CACHE_CHUNK_CHARS = 1500  # 抜粋選択の単位となるチャンクの文字数
+# 1製品あたり数MBになるため、直近に質問された製品だけを保持する
+TEXT_CACHE_INDEX_MAXSIZE = 8
+TEXT_CACHE_TTL = 600  # 秒（同じ製品への連続した質問でStorageの再ダウンロードを省く）
+# デコード済みテキストの保持上限（バイト）。インデックスとは別に数件分だけ持つ
+TEXT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# これより長いテキストは manual_text_cache に保存せず Storage のみから読む
+TEXT_CACHE_DB_MAX_CHARS = 2_000_000
+TEXT_CACHE_GZIP_LEVEL = 6
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# 質問の内容語バイグラムのうち説明書に含まれる割合がこれ未満なら回答不能とみなす
+TEXT_CACHE_MIN_TERM_OVERLAP = 0.3
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Word characters other than hiragana (kanji, katakana, latin, digits)
+_CONTENT_CHAR_RE = re.compile(r"[^\W\u3040-\u309f]")
+
+
+@dataclass
+class TextCacheIndex:
+    """
+    Text cache split into chunks with BM25 statistics for passage selection.
+
+    Chunks are stored as (start, end) offsets into ``text``, and term
+    statistics as one bigram -> postings map, where each postings array
+    holds (chunk id, term frequency) pairs flattened in chunk order.
+    """
+
+    text: str
+    budget_chars: int
+    chunk_spans: list[tuple[int, int]] = field(default_factory=list)
+    chunk_lengths: array = field(default_factory=lambda: array("I"))
+    postings: dict[str, array] = field(default_factory=dict)
+    avg_chunk_length: float = 0.0
+
+
+# (manufacturer, model_number) -> (stored_at, decoded text cache)
+_text_cache: dict[tuple[str, str], tuple[float, str]] = {}
+# (manufacturer, model_number) -> (source text length, index)
+_text_index_cache: dict[tuple[str, str], tuple[int, TextCacheIndex]] = {}
+
 
 async def extract_text_from_pdf(pdf_bytes: bytes) -> str:
     """
@@ -32,7 +87,7 @@ async def extract_text_from_pdf(pdf_bytes: bytes) -> str:
         Exception: If extraction fails
     """
     start_time = time.time()
-    client = genai.Client(api_key=settings.gemini_api_key)
+    client = get_gemini_client()
 
     prompt = """
 このPDFの全テキスト内容を抽出してください。
@@ -69,7 +124,12 @@ async def extract_text_from_pdf(pdf_bytes: bytes) -> str:
 
 async def get_text_cache(manufacturer: str, model_number: str) -> str | None:
     """
-    Get text cache from Supabase Storage.
+    Get text cache from the manual_text_cache table, falling back to Storage.
+
+    Decoded text is kept in process for TEXT_CACHE_TTL seconds so that
+    follow-up questions about the same product skip the lookup entirely.
+    Text found only in Storage (caches saved before the table existed) is
+    copied into the table so the next lookup is a single DB query.
 
     Args:
         manufacturer: Manufacturer name
@@ -78,20 +138,98 @@ async def get_text_cache(manufacturer: str, model_number: str) -> str | None:
     Returns:
         Cached text or None if not found
     """
+    key = (manufacturer, model_number)
+    entry = _text_cache.get(key)
+    if entry and time.monotonic() - entry[0] < TEXT_CACHE_TTL:
+        return entry[1]
+
     supabase = get_supabase_client()
-    cache_path = get_text_cache_path(manufacturer, model_number)
+    query = (
+        supabase.table("manual_text_cache")
+        .select("text_content")
+        .eq("manufacturer", manufacturer)
+        .eq("model_number", model_number)
+        .maybe_single()
+    )
+    try:
+        result = await asyncio.to_thread(query.execute)
+    except Exception as e:
+        logger.warning(f"Failed to look up manual_text_cache: {e}")
+    else:
+        if result and result.data:
+            text = result.data["text_content"]
+            _remember_text_cache(key, text)
+            return text
 
+    cache_path = get_text_cache_path(manufacturer, model_number)
     try:
-        response = supabase.storage.from_("manuals").download(cache_path)
-        return response.decode("utf-8")
+        response = await asyncio.to_thread(
+            supabase.storage.from_("manuals").download, cache_path
+        )
     except Exception as e:
         logger.debug(f"Text cache not found: {cache_path}, error: {e}")
         return None
 
+    text = await asyncio.to_thread(_decode_text_cache, response)
+    _remember_text_cache(key, text)
+    await _save_text_cache_row(manufacturer, model_number, text)
+    return text
+
+
+def _decode_text_cache(payload: bytes) -> str:
+    """Decode a Storage text cache, which may be gzip-compressed or plain UTF-8."""
+    if payload.startswith(_GZIP_MAGIC):
+        payload = gzip.decompress(payload)
+    return payload.decode("utf-8")
+
+
+def _remember_text_cache(key: tuple[str, str], text: str) -> None:
+    """
+    Store decoded text in the in-process cache.
+
+    The oldest entries are evicted until the cached texts fit in
+    TEXT_CACHE_MAX_BYTES; a text larger than the whole budget is not cached.
+    """
+    _text_cache.pop(key, None)
+    size = sys.getsizeof(text)
+    if size > TEXT_CACHE_MAX_BYTES:
+        return
+    total = sum(sys.getsizeof(cached) for _, cached in _text_cache.values())
+    while _text_cache and total + size > TEXT_CACHE_MAX_BYTES:
+        _, evicted = _text_cache.pop(next(iter(_text_cache)))
+        total -= sys.getsizeof(evicted)
+    _text_cache[key] = (time.monotonic(), text)
+
+
+async def _save_text_cache_row(manufacturer: str, model_number: str, text: str) -> None:
+    """Upsert text into manual_text_cache unless it exceeds the size limit."""
+    if len(text) > TEXT_CACHE_DB_MAX_CHARS:
+        return
+
+    query = (
+        get_supabase_client()
+        .table("manual_text_cache")
+        .upsert(
+            {
+                "manufacturer": manufacturer,
+                "model_number": model_number,
+                "text_content": text,
+            }
+        )
+    )
+    try:
+        await asyncio.to_thread(query.execute)
+    except Exception as e:
+        logger.warning(f"Failed to save manual_text_cache row: {e}")
+
 
 async def save_text_cache(manufacturer: str, model_number: str, text: str) -> str:
     """
-    Save text cache to Supabase Storage.
+    Save text cache to Supabase Storage and the manual_text_cache table.
+
+    Storage keeps every text as the gzip-compressed backup copy; the table
+    row (skipped above TEXT_CACHE_DB_MAX_CHARS) is what get_text_cache
+    reads first.
 
     Args:
         manufacturer: Manufacturer name
@@ -104,11 +242,22 @@ async def save_text_cache(manufacturer: str, model_number: str, text: str) -> st
     supabase = get_supabase_client()
     cache_path = get_text_cache_path(manufacturer, model_number)
 
-    supabase.storage.from_("manuals").upload(
-        cache_path,
+    payload = await asyncio.to_thread(
+        gzip.compress,
         text.encode("utf-8"),
-        {"content-type": "text/plain", "upsert": "true"},
+        compresslevel=TEXT_CACHE_GZIP_LEVEL,
+        mtime=0,
+    )
+    await asyncio.gather(
+        asyncio.to_thread(
+            supabase.storage.from_("manuals").upload,
+            cache_path,
+            payload,
+            {"content-type": "application/gzip", "upsert": "true"},
+        ),
+        _save_text_cache_row(manufacturer, model_number, text),
     )
+    _remember_text_cache((manufacturer, model_number), text)
 
     return cache_path
 
@@ -136,3 +285,189 @@ async def get_or_create_text_cache(
     text = await extract_text_from_pdf(pdf_bytes)
     await save_text_cache(manufacturer, model_number, text)
     return text
+
+
+def _bigrams(text: str) -> list[str]:
+    """Split text into character bigrams (works for Japanese without a tokenizer)."""
+    normalized = _WHITESPACE_RE.sub("", text.lower())
+    return [normalized[i : i + 2] for i in range(len(normalized) - 1)]
+
+
+def _split_chunks(text: str, size: int) -> list[tuple[int, int]]:
+    """
+    Split text into chunks of about ``size`` characters on paragraph breaks.
+
+    Returns:
+        (start, end) offsets of each chunk in ``text``
+    """
+    spans: list[tuple[int, int]] = []
+    start = end = pos = 0
+    for paragraph in text.split("\n\n"):
+        paragraph_start = pos
+        pos += len(paragraph) + 2
+        if end > start and end - start + len(paragraph) + 2 > size:
+            spans.append((start, end))
+            start = paragraph_start
+        elif end == start:
+            start = paragraph_start
+        end = paragraph_start + len(paragraph)
+        while end - start > size:
+            spans.append((start, start + size))
+            start += size
+    if end > start:
+        spans.append((start, end))
+    return spans
+
+
+async def _measure_chars_per_token(text: str) -> float:
+    """
+    Measure the characters-per-token ratio of a text via the Gemini API.
+
+    Falls back to 1.0 (a conservative ratio for Japanese text) if counting
+    fails.
+    """
+    client = get_gemini_client()
+
+    try:
+        result = await client.aio.models.count_tokens(
+            model=TEXT_CACHE_WINDOW_MODEL, contents=text
+        )
+    except Exception as e:
+        logger.warning(f"Failed to count text cache tokens: {e}")
+        return 1.0
+
+    return len(text) / result.total_tokens if result.total_tokens else 1.0
+
+
+def _build_text_index(text: str, budget_chars: int) -> TextCacheIndex:
+    """Chunk the text and compute BM25 term statistics."""
+    index = TextCacheIndex(text=text, budget_chars=budget_chars)
+    # The whole text is a single chunk when it fits the budget; the postings
+    # are still needed for is_likely_answerable
+    if len(text) <= budget_chars:
+        index.chunk_spans = [(0, len(text))]
+    else:
+        index.chunk_spans = _split_chunks(text, TEXT_CACHE_CHUNK_CHARS)
+
+    for chunk_id, (start, end) in enumerate(index.chunk_spans):
+        terms = Counter(_bigrams(text[start:end]))
+        index.chunk_lengths.append(terms.total())
+        for term, tf in terms.items():
+            postings = index.postings.get(term)
+            if postings is None:
+                postings = index.postings[term] = array("I")
+            postings.extend((chunk_id, tf))
+
+    if index.chunk_spans:
+        index.avg_chunk_length = sum(index.chunk_lengths) / len(index.chunk_spans)
+    return index
+
+
+async def get_text_cache_index(
+    manufacturer: str, model_number: str, text: str
+) -> TextCacheIndex:
+    """
+    Get the passage-selection index for a text cache.
+
+    The token ratio and BM25 statistics are computed once per cache entry
+    and reused across questions.
+
+    Args:
+        manufacturer: Manufacturer name
+        model_number: Model number
+        text: Full text cache content
+
+    Returns:
+        TextCacheIndex for select_text_passages
+    """
+    key = (manufacturer, model_number)
+    cached = _text_index_cache.get(key)
+    if cached and cached[0] == len(text):
+        return cached[1]
+
+    chars_per_token = await _measure_chars_per_token(text)
+    budget_chars = int(TEXT_CACHE_PASSAGE_TOKENS * chars_per_token)
+    index = _build_text_index(text, budget_chars)
+
+    if key not in _text_index_cache and (
+        len(_text_index_cache) >= TEXT_CACHE_INDEX_MAXSIZE
+    ):
+        _text_index_cache.pop(next(iter(_text_index_cache)))
+    _text_index_cache[key] = (len(text), index)
+    return index
+
+
+def select_text_passages(index: TextCacheIndex, question: str) -> str:
+    """
+    Select the text cache passages most relevant to a question.
+
+    Chunks are ranked by BM25 over character bigrams and the top ones are
+    concatenated in document order up to the token budget. If no chunk
+    shares a term with the question, the leading chunks are used.
+
+    Args:
+        index: Text cache index
+        question: User question
+
+    Returns:
+        Selected passages (the whole text if it fits the budget)
+    """
+    if len(index.text) <= index.budget_chars:
+        return index.text
+
+    n_chunks = len(index.chunk_spans)
+    norms = [
+        BM25_K1 * (1 - BM25_B + BM25_B * length / index.avg_chunk_length)
+        for length in index.chunk_lengths
+    ]
+    scores = [0.0] * n_chunks
+    for term in set(_bigrams(question)):
+        postings = index.postings.get(term)
+        if postings is None:
+            continue
+        doc_freq = len(postings) // 2
+        idf = math.log(1 + (n_chunks - doc_freq + 0.5) / (doc_freq + 0.5))
+        for chunk_id, tf in zip(postings[::2], postings[1::2], strict=True):
+            scores[chunk_id] += idf * tf * (BM25_K1 + 1) / (tf + norms[chunk_id])
+
+    if any(scores):
+        ranked = sorted(range(n_chunks), key=scores.__getitem__, reverse=True)
+    else:
+        ranked = list(range(n_chunks))
+
+    selected = []
+    used = 0
+    for i in ranked:
+        start, end = index.chunk_spans[i]
+        if used + end - start > index.budget_chars:
+            continue
+        selected.append(i)
+        used += end - start
+
+    return "\n\n".join(
+        index.text[start:end]
+        for start, end in (index.chunk_spans[i] for i in sorted(selected))
+    )
+
+
+def is_likely_answerable(index: TextCacheIndex, question: str) -> bool:
+    """
+    Check whether the manual text shares enough terms with a question.
+
+    Only bigrams containing a non-hiragana character are considered, so
+    particles and inflections do not count as overlap. Questions without
+    such terms are treated as answerable.
+
+    Args:
+        index: Text cache index
+        question: User question
+
+    Returns:
+        False if the question is very unlikely to be covered by the manual
+    """
+    terms = {term for term in _bigrams(question) if _CONTENT_CHAR_RE.search(term)}
+    if not terms:
+        return True
+
+    overlap = sum(term in index.postings for term in terms) / len(terms)
+    return overlap >= TEXT_CACHE_MIN_TERM_OVERLAP
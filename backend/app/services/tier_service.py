@@ -147,7 +147,7 @@ def check_can_add_appliance(user_id: str) -> dict:
     try:
         response = (
             client.table("user_appliances")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("user_id", user_id)
             .is_("group_id", "null")
             .execute()
@@ -229,7 +229,7 @@ def check_can_add_group_appliance(group_id: str) -> dict:
     try:
         response = (
             client.table("user_appliances")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("group_id", group_id)
             .execute()
         )
@@ -368,7 +368,7 @@ def get_user_usage_stats(user_id: str) -> dict:
     try:
         response = (
             client.table("user_appliances")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("user_id", user_id)
             .is_("group_id", "null")
             .execute()
@@ -149,7 +149,7 @@ async def get_maintenance_stats(user_id: str) -> dict:
             # Count upcoming maintenance (next 7 days)
             upcoming_response = (
                 client.table("maintenance_schedules")
-                .select("id", count="exact")
+                .select("id", count="exact", head=True)
                 .in_("user_appliance_id", appliance_ids)
                 .gte("next_due_at", now.isoformat())
                 .lte("next_due_at", seven_days_later.isoformat())
@@ -160,7 +160,7 @@ async def get_maintenance_stats(user_id: str) -> dict:
             # Count overdue maintenance
             overdue_response = (
                 client.table("maintenance_schedules")
-                .select("id", count="exact")
+                .select("id", count="exact", head=True)
                 .in_("user_appliance_id", appliance_ids)
                 .lt("next_due_at", now.isoformat())
                 .execute()
@@ -170,7 +170,7 @@ async def get_maintenance_stats(user_id: str) -> dict:
         # Count total completed maintenance
         completed_total_response = (
             client.table("maintenance_logs")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("done_by_user_id", user_id)
             .execute()
         )
@@ -179,7 +179,7 @@ async def get_maintenance_stats(user_id: str) -> dict:
         # Count completed this month
         completed_month_response = (
             client.table("maintenance_logs")
-            .select("id", count="exact")
+            .select("id", count="exact", head=True)
             .eq("done_by_user_id", user_id)
             .gte("done_at", first_day_of_month.isoformat())
             .execute()
@@ -0,0 +1,102 @@
+"""
+qa_ratings.question_hash を現在のハッシュ方式で再計算するスクリプト
+
+Usage:
+    cd backend
+    uv run python scripts/backfill_question_hashes.py [--dry-run]
+
+このスクリプトは以下を行います:
+1. qa_ratings テーブルから全評価の question_text と question_hash を取得
+2. generate_question_hash で question_text からハッシュを再計算
+3. 保存済みのハッシュと異なる行のみ question_hash を更新
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.qa_rating_service import generate_question_hash
+from app.services.supabase_client import get_supabase_client
+
+# 1回のSELECTで取得する行数
+PAGE_SIZE = 1000
+
+
+def get_all_ratings() -> list[dict]:
+    """全評価の id, question_text, question_hash を取得"""
+    client = get_supabase_client()
+    if not client:
+        print("ERROR: Supabase client not available")
+        return []
+
+    ratings: list[dict] = []
+    offset = 0
+    while True:
+        result = (
+            client.table("qa_ratings")
+            .select("id, question_text, question_hash")
+            .order("id")
+            .range(offset, offset + PAGE_SIZE - 1)
+            .execute()
+        )
+        rows = result.data or []
+        ratings.extend(rows)
+        if len(rows) < PAGE_SIZE:
+            return ratings
+        offset += PAGE_SIZE
+
+
+def update_question_hash(rating_id: str, question_hash: str) -> bool:
+    """qa_ratingsテーブルのquestion_hashを更新"""
+    client = get_supabase_client()
+    if not client:
+        return False
+
+    try:
+        client.table("qa_ratings").update({"question_hash": question_hash}).eq(
+            "id", rating_id
+        ).execute()
+        return True
+    except Exception as e:
+        print(f"  Update failed: {rating_id} - {e}")
+        return False
+
+
+def main(dry_run: bool = False):
+    print(f"=== Question Hash Backfill {'(DRY RUN)' if dry_run else ''} ===\n")
+
+    ratings = get_all_ratings()
+    print(f"Found {len(ratings)} ratings\n")
+
+    results = {"up_to_date": 0, "updated": 0, "failed": 0}
+    for rating in ratings:
+        new_hash = generate_question_hash(rating["question_text"])
+        if new_hash == rating["question_hash"]:
+            results["up_to_date"] += 1
+            continue
+
+        if dry_run or update_question_hash(rating["id"], new_hash):
+            results["updated"] += 1
+        else:
+            results["failed"] += 1
+
+    print("=== Summary ===")
+    print(f"Already up to date: {results['up_to_date']}")
+    print(f"{'Would update' if dry_run else 'Updated'}: {results['updated']}")
+    print(f"Failed: {results['failed']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recompute qa_ratings.question_hash from question_text"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Check only, don't modify anything",
+    )
+    args = parser.parse_args()
+    main(args.dry_run)
@@ -0,0 +1,166 @@
+"""
+qa.md 内のユーザー追加QAを qa_entries テーブルに移行するスクリプト
+
+Usage:
+    cd backend
+    uv run python scripts/migrate_user_qa_entries.py [--dry-run]
+
+このスクリプトは以下を行います:
+1. shared_appliances テーブルから全製品の maker, model_number を取得
+2. 各製品の qa.md をダウンロードし、ユーザー追加QA（### Q: ... (追加: YYYY-MM-DD)）を抽出
+3. 抽出したQAのうち qa_entries に未登録のものを INSERT（追加日は元の日付を使用）
+4. ユーザー追加QAを取り除いた qa.md を再アップロード
+
+途中で失敗した製品は再実行で続きから移行できます（登録済みのQAは
+(質問, 追加日) で判定して重複登録しない）。
+"""
+
+import argparse
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.pdf_storage import MANUALS_BUCKET, get_qa_path
+from app.services.supabase_client import get_supabase_client
+
+# ユーザー追加QAのエントリ（回答は複数行の場合がある）
+USER_QA_ENTRY_RE = re.compile(
+    r"\n### Q: (?P<question>[^\n]+?) \(追加: (?P<date>\d{4}-\d{2}-\d{2})\)\n"
+    r"\*\*A\*\*: (?P<answer>.+?)\n"
+    r"\*\*ソース\*\*: (?P<source>[^\n]+)(?=\n|\Z)",
+    re.DOTALL,
+)
+
+
+def get_all_products() -> list[dict]:
+    """全製品の maker, model_number を取得"""
+    client = get_supabase_client()
+    if not client:
+        print("ERROR: Supabase client not available")
+        return []
+
+    result = client.table("shared_appliances").select("maker, model_number").execute()
+    return result.data or []
+
+
+def download_qa(maker: str, model_number: str) -> str | None:
+    """qa.md をダウンロード（存在しない場合はNone）"""
+    client = get_supabase_client()
+    try:
+        data = client.storage.from_(MANUALS_BUCKET).download(
+            get_qa_path(maker, model_number)
+        )
+        return data.decode("utf-8")
+    except Exception:
+        return None
+
+
+def split_user_entries(content: str) -> tuple[str, list[dict]]:
+    """qa.md からユーザー追加QAを取り除き、(残りの本文, エントリ一覧) を返す"""
+    entries = [
+        {
+            "question": m["question"].strip(),
+            "answer": m["answer"],
+            "source": m["source"],
+            "added_at": f"{m['date']}T00:00:00+00:00",
+        }
+        for m in USER_QA_ENTRY_RE.finditer(content)
+    ]
+    remaining = USER_QA_ENTRY_RE.sub("", content)
+    return re.sub(r"\n{3,}", "\n\n", remaining).rstrip() + "\n", entries
+
+
+def _entry_key(entry: dict) -> tuple[str, datetime]:
+    """qa_entries の行と qa.md のエントリを照合するキー (質問, 追加日時)"""
+    return entry["question"], datetime.fromisoformat(entry["added_at"])
+
+
+def select_new_entries(entries: list[dict], existing: list[dict]) -> list[dict]:
+    """qa_entries に登録済みのエントリを除く（前回の移行が途中で失敗した場合）"""
+    existing_keys = {_entry_key(e) for e in existing}
+    return [e for e in entries if _entry_key(e) not in existing_keys]
+
+
+def migrate_product(maker: str, model_number: str, entries: list[dict], remaining: str):
+    """
+    未登録のエントリを qa_entries に INSERT し、qa.md を再アップロード
+
+    qa.md を先に書き換えると INSERT の失敗でQAが失われるため、INSERT を先に行う。
+    再アップロードが失敗しても、再実行時は登録済みのエントリを INSERT しない。
+    """
+    client = get_supabase_client()
+    existing = (
+        client.table("qa_entries")
+        .select("question, added_at")
+        .eq("maker", maker)
+        .eq("model_number", model_number)
+        .execute()
+    )
+    new_entries = select_new_entries(entries, existing.data or [])
+    if new_entries:
+        client.table("qa_entries").insert(
+            [{"maker": maker, "model_number": model_number, **e} for e in new_entries]
+        ).execute()
+    client.storage.from_(MANUALS_BUCKET).upload(
+        get_qa_path(maker, model_number),
+        remaining.encode("utf-8"),
+        {"content-type": "text/plain", "upsert": "true"},
+    )
+
+
+def main(dry_run: bool = False):
+    print(f"=== User QA Migration {'(DRY RUN)' if dry_run else ''} ===\n")
+
+    products = get_all_products()
+    print(f"Found {len(products)} products\n")
+
+    results = {"no_qa": 0, "no_entries": 0, "migrated": 0, "entries": 0, "failed": 0}
+    for product in products:
+        maker, model_number = product["maker"], product["model_number"]
+        content = download_qa(maker, model_number)
+        if not content:
+            results["no_qa"] += 1
+            continue
+
+        remaining, entries = split_user_entries(content)
+        if not entries:
+            results["no_entries"] += 1
+            continue
+
+        print(f"{maker} {model_number}: {len(entries)} entries")
+        if not dry_run:
+            try:
+                migrate_product(maker, model_number, entries, remaining)
+            except Exception as e:
+                print(f"  Migration failed: {e}")
+                results["failed"] += 1
+                continue
+
+        results["migrated"] += 1
+        results["entries"] += len(entries)
+
+    print("\n=== Summary ===")
+    print(f"No QA markdown: {results['no_qa']}")
+    print(f"No user-added entries: {results['no_entries']}")
+    print(
+        f"{'Would migrate' if dry_run else 'Migrated'}: "
+        f"{results['migrated']} products, {results['entries']} entries"
+    )
+    print(f"Failed: {results['failed']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move user-added QA entries from qa.md into qa_entries"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Check only, don't modify anything",
+    )
+    args = parser.parse_args()
+    main(args.dry_run)
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- Migration: 20260116000001_gemini_pdf_files.sql
+-- Description: Gemini File API にアップロードした説明書PDFの参照を保持する
+-- ============================================================================
+--
+-- 目的:
+--   PDF直接分析（QA Step 3）で質問ごとにPDF全体をインライン送信するのをやめ、
+--   File API に一度アップロードしたファイルを URI 参照で再利用する。
+--
+-- 設計:
+--   - cache_key: (manufacturer, model_number, PDF内容の BLAKE2b-128 ハッシュ) の
+--     SHA256 ハッシュ。説明書PDFが差し替えられた場合は別のキーになり、
+--     古いアップロード済みファイルを参照し続けない
+--   - Gemini のファイルは約48時間で失効するため expires_at で有効期限を管理
+--   - バックエンド（service_role）のみが読み書きする。RLSポリシーは設定しない
+--
+-- ============================================================================
+
+CREATE TABLE gemini_pdf_files (
+    cache_key TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,   -- files/xxxx（Gemini File API のリソース名）
+    file_uri TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE gemini_pdf_files IS 'Gemini File API にアップロード済みの説明書PDF';
+COMMENT ON COLUMN gemini_pdf_files.cache_key IS '(manufacturer, model_number, PDF内容のBLAKE2b-128ハッシュ) のSHA256ハッシュ';
+COMMENT ON COLUMN gemini_pdf_files.file_name IS 'Gemini File API のファイル名（files/xxxx）';
+COMMENT ON COLUMN gemini_pdf_files.file_uri IS 'generate_content で参照するファイルURI';
+COMMENT ON COLUMN gemini_pdf_files.expires_at IS '再利用可能な期限（Gemini側の失効より手前に設定）';
+
+ALTER TABLE gemini_pdf_files ENABLE ROW LEVEL SECURITY;
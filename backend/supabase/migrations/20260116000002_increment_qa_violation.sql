@@ -0,0 +1,47 @@
+-- ============================================================================
+-- Migration: 20260116000002_increment_qa_violation.sql
+-- Description: QA違反回数の加算と利用制限の設定を1回のRPCで原子的に行う関数
+-- ============================================================================
+--
+-- 目的:
+--   update_restriction の SELECT → UPDATE/INSERT（2往復）を1往復にし、
+--   同時に発生した違反が同じ回数を読んで上書きし合う競合をなくす。
+--
+-- 設計:
+--   - INSERT ... ON CONFLICT (user_id) DO UPDATE で違反回数を加算
+--   - restricted_until はDBの NOW() 基準で計算（アプリ側の時計ずれを排除）
+--   - 制限時間: 1回目=制限なし, 2回目=1時間, 3回目=24時間, 4回目以降=7日間
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION qa_restriction_interval(p_violation_count INTEGER)
+RETURNS INTERVAL AS $$
+    SELECT CASE
+        WHEN p_violation_count <= 1 THEN NULL
+        WHEN p_violation_count = 2 THEN INTERVAL '1 hour'
+        WHEN p_violation_count = 3 THEN INTERVAL '24 hours'
+        ELSE INTERVAL '7 days'
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+COMMENT ON FUNCTION qa_restriction_interval(INTEGER)
+    IS '違反回数に応じたQA利用制限時間（NULLなら制限なし）';
+
+CREATE OR REPLACE FUNCTION increment_qa_violation(p_user_id UUID)
+RETURNS TABLE (violation_count INTEGER, restricted_until TIMESTAMPTZ) AS $$
+    INSERT INTO qa_restrictions AS r (
+        user_id, violation_count, restricted_until, last_violation_at
+    )
+    VALUES (p_user_id, 1, NOW() + qa_restriction_interval(1), NOW())
+    ON CONFLICT (user_id) DO UPDATE SET
+        violation_count = r.violation_count + 1,
+        restricted_until = NOW() + qa_restriction_interval(r.violation_count + 1),
+        last_violation_at = NOW()
+    RETURNING r.violation_count, r.restricted_until;
+$$ LANGUAGE sql VOLATILE;
+
+COMMENT ON FUNCTION increment_qa_violation(UUID)
+    IS 'QA違反回数を原子的に加算し、新しい違反回数と制限解除日時を返す';
+
+-- 呼び出しはバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION increment_qa_violation(UUID) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,35 @@
+-- ============================================================================
+-- Migration: 20260116000003_record_violation_and_restrict.sql
+-- Description: QA違反の記録と利用制限の更新を1トランザクションで行う関数
+-- ============================================================================
+--
+-- 目的:
+--   record_violation（qa_violations INSERT）と update_restriction
+--   （increment_qa_violation）の2往復を1回のRPCにまとめる。
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION record_violation_and_restrict(
+    p_user_id UUID,
+    p_shared_appliance_id UUID,
+    p_question TEXT,
+    p_violation_type TEXT,
+    p_detection_method TEXT
+)
+RETURNS TABLE (violation_count INTEGER, restricted_until TIMESTAMPTZ) AS $$
+    INSERT INTO qa_violations (
+        user_id, shared_appliance_id, question, violation_type, detection_method
+    )
+    VALUES (
+        p_user_id, p_shared_appliance_id, p_question, p_violation_type, p_detection_method
+    );
+
+    SELECT * FROM increment_qa_violation(p_user_id);
+$$ LANGUAGE sql VOLATILE;
+
+COMMENT ON FUNCTION record_violation_and_restrict(UUID, UUID, TEXT, TEXT, TEXT)
+    IS 'QA違反を記録し、違反回数の加算と利用制限の設定を同一トランザクションで行う';
+
+-- 呼び出しはバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION record_violation_and_restrict(UUID, UUID, TEXT, TEXT, TEXT)
+    FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Migration: 20260116000004_gemini_pdf_files_content_key.sql
+-- Description: （統合済み）gemini_pdf_files.cache_key の形式変更
+-- ============================================================================
+--
+-- 目的:
+--   このバージョンは以前、旧形式のキーの行を削除し cache_key のコメントを
+--   更新していた。キー形式は 20260116000001 に統合したため、新しいDBでは
+--   何もしない。番号を欠番にしないのは、旧版を適用済みのDBでマイグレーション
+--   履歴とファイルを一致させるため。
+--
+-- 設計:
+--   - 旧版は関数などのオブジェクトを作成していないため、削除するものはない
+--   - 旧版を適用済みのDBでもコメントが 20260116000001 と同じになるよう、
+--     コメントだけを再設定する（何度実行しても同じ結果）
+--
+-- ============================================================================
+
+COMMENT ON COLUMN gemini_pdf_files.cache_key IS '(manufacturer, model_number, PDF内容のBLAKE2b-128ハッシュ) のSHA256ハッシュ';
@@ -0,0 +1,17 @@
+-- ============================================================================
+-- Migration: 20260116000005_qa_ratings_blake2b_hash.sql
+-- Description: qa_ratings.question_hash を BLAKE2b-128 に変更
+-- ============================================================================
+--
+-- 目的:
+--   集計用キーにすぎない question_hash の算出を SHA256（先頭32文字）から
+--   BLAKE2b-128（32文字の16進数）に変更する。
+--
+-- 注意:
+--   既存行のハッシュはSQLでは再計算できない（PostgreSQLにBLAKE2bがない）ため、
+--   デプロイ後に以下のスクリプトで question_text から再計算すること。
+--     cd backend && uv run python scripts/backfill_question_hashes.py
+--
+-- ============================================================================
+
+COMMENT ON COLUMN qa_ratings.question_hash IS '質問テキスト（正規化後）のBLAKE2b-128ハッシュ（32文字、集計用キー）';
@@ -0,0 +1,53 @@
+-- ============================================================================
+-- Migration: 20260116000006_insert_qa_rating.sql
+-- Description: QA評価の追加と低評価件数の集計を1回のRPCで行う関数
+-- ============================================================================
+--
+-- 目的:
+--   insert_rating の INSERT → SELECT count（2往復）を1往復にする。
+--
+-- 設計:
+--   - (shared_appliance_id, question_hash) 単位のアドバイザリロックで直列化し、
+--     同時に評価した2人が同じ件数を読んで削除判定が重複・欠落しないようにする
+--   - 戻り値は追加後の低評価（is_helpful = false）件数
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION insert_qa_rating(
+    p_shared_appliance_id UUID,
+    p_user_id UUID,
+    p_question_hash TEXT,
+    p_question_text TEXT,
+    p_is_helpful BOOLEAN
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_negative_count INTEGER;
+BEGIN
+    PERFORM pg_advisory_xact_lock(
+        hashtext(p_shared_appliance_id::TEXT || ':' || p_question_hash)
+    );
+
+    INSERT INTO qa_ratings (
+        shared_appliance_id, user_id, question_hash, question_text, is_helpful
+    )
+    VALUES (
+        p_shared_appliance_id, p_user_id, p_question_hash, p_question_text, p_is_helpful
+    );
+
+    SELECT COUNT(*) INTO v_negative_count
+    FROM qa_ratings
+    WHERE shared_appliance_id = p_shared_appliance_id
+      AND question_hash = p_question_hash
+      AND is_helpful = FALSE;
+
+    RETURN v_negative_count;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION insert_qa_rating(UUID, UUID, TEXT, TEXT, BOOLEAN)
+    IS 'QA評価を追加し、同じ質問の低評価件数を返す（質問単位で直列化）';
+
+-- 呼び出しはバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION insert_qa_rating(UUID, UUID, TEXT, TEXT, BOOLEAN)
+    FROM PUBLIC, anon, authenticated;
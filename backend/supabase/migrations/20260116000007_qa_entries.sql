@@ -0,0 +1,36 @@
+-- ============================================================================
+-- Migration: 20260116000007_qa_entries.sql
+-- Description: ユーザー追加QAを qa.md から行単位のテーブルに分離する
+-- ============================================================================
+--
+-- 目的:
+--   QA回答の追記・削除のたびに qa.md 全体をダウンロード・再アップロード
+--   していたのをやめ、1件ごとの INSERT / DELETE にする。
+--
+-- 設計:
+--   - 生成QA（説明書から生成したFAQ）は従来どおり Storage の qa.md に保持
+--   - ユーザー追加QAは本テーブルに保持し、読み込み時に qa.md の末尾に連結する
+--   - 製品は qa.md と同じく (maker, model_number) で識別する
+--   - 既存の qa.md 内のユーザー追加QAは scripts/migrate_user_qa_entries.py で移行
+--   - バックエンド（service_role）のみが読み書きする。RLSポリシーは設定しない
+--
+-- ============================================================================
+
+CREATE TABLE qa_entries (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    maker TEXT NOT NULL,
+    model_number TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    source TEXT NOT NULL,          -- 'text_cache' | 'pdf'
+    added_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_qa_entries_product ON qa_entries (maker, model_number, added_at);
+
+COMMENT ON TABLE qa_entries IS 'QAチャットで追加されたユーザー追加QA（qa.md の生成QAに連結して表示）';
+COMMENT ON COLUMN qa_entries.question IS '質問テキスト（前後の空白を除去済み）';
+COMMENT ON COLUMN qa_entries.source IS '回答ソース: text_cache, pdf';
+COMMENT ON COLUMN qa_entries.added_at IS '追加日時（qa.md の「追加: YYYY-MM-DD」表示に使用）';
+
+ALTER TABLE qa_entries ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,29 @@
+-- ============================================================================
+-- Migration: 20260116000008_qa_ratings_negative_index.sql
+-- Description: 低評価件数の集計用に qa_ratings の部分インデックスを追加
+-- ============================================================================
+--
+-- 目的:
+--   insert_qa_rating は評価のたびに
+--   (shared_appliance_id, question_hash, is_helpful = FALSE) の件数を数える。
+--   既存の idx_qa_ratings_appliance_question では高評価の行もヒープから
+--   読んで is_helpful を確認する必要があるため、低評価の行だけを持つ
+--   部分インデックスで index-only scan にする。
+--
+-- 確認:
+--   EXPLAIN (ANALYZE, BUFFERS)
+--   SELECT COUNT(*) FROM qa_ratings
+--   WHERE shared_appliance_id = '...' AND question_hash = '...' AND is_helpful = FALSE;
+--   → Index Only Scan using idx_qa_ratings_negative
+--
+-- 備考:
+--   マイグレーションはトランザクション内で実行されるため CONCURRENTLY は付けない。
+--   低評価は削除閾値（3件）で関連評価ごと削除されるため、インデックスは小さく保たれる。
+--
+-- ============================================================================
+
+CREATE INDEX idx_qa_ratings_negative
+    ON qa_ratings (shared_appliance_id, question_hash)
+    WHERE is_helpful = FALSE;
+
+COMMENT ON INDEX idx_qa_ratings_negative IS '低評価件数の集計用（is_helpful = FALSE の行のみ）';
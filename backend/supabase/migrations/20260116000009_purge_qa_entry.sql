@@ -0,0 +1,57 @@
+-- ============================================================================
+-- Migration: 20260116000009_purge_qa_entry.sql
+-- Description: 低評価によるユーザー追加QAの削除と関連評価の削除を1回のRPCで行う関数
+-- ============================================================================
+--
+-- 目的:
+--   低評価が閾値に達したときの qa_entries DELETE → qa_ratings DELETE
+--   （2往復）を1往復にし、同一トランザクションで行う。
+--
+-- 設計:
+--   - insert_qa_rating と同じ (shared_appliance_id, question_hash) 単位の
+--     アドバイザリロックを取り、評価の追加と削除を直列化する
+--   - qa_entries に該当行がなければ評価は削除せず FALSE を返す
+--   - qa_ratings は質問ハッシュ単位で記録されており qa_entries の行を参照しないため、
+--     外部キーの ON DELETE CASCADE ではなく関数内で削除する
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION purge_qa_entry(
+    p_shared_appliance_id UUID,
+    p_maker TEXT,
+    p_model_number TEXT,
+    p_question TEXT,
+    p_question_hash TEXT
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_deleted INTEGER;
+BEGIN
+    PERFORM pg_advisory_xact_lock(
+        hashtext(p_shared_appliance_id::TEXT || ':' || p_question_hash)
+    );
+
+    DELETE FROM qa_entries
+    WHERE maker = p_maker
+      AND model_number = p_model_number
+      AND question = p_question;
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+    IF v_deleted = 0 THEN
+        RETURN FALSE;
+    END IF;
+
+    DELETE FROM qa_ratings
+    WHERE shared_appliance_id = p_shared_appliance_id
+      AND question_hash = p_question_hash;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION purge_qa_entry(UUID, TEXT, TEXT, TEXT, TEXT)
+    IS 'ユーザー追加QAを削除し、削除できた場合は同じ質問の評価も削除する';
+
+-- 呼び出しはバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION purge_qa_entry(UUID, TEXT, TEXT, TEXT, TEXT)
+    FROM PUBLIC, anon, authenticated;
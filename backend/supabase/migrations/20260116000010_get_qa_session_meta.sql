@@ -0,0 +1,42 @@
+-- ============================================================================
+-- Migration: 20260116000010_get_qa_session_meta.sql
+-- Description: QAセッション一覧用のメッセージ数と最初の質問を一括取得する関数
+-- ============================================================================
+--
+-- 目的:
+--   get_sessions_for_appliance がセッションごとに qa_session_messages を
+--   全件取得していた N+1 クエリを、1回のRPCにまとめる。
+--
+-- 設計:
+--   - セッションIDの配列を受け取り、セッションごとにメッセージ数と
+--     最初のユーザー質問を返す（グループ家電のセッション統合ロジックは
+--     アプリ側に残すため、対象セッションの絞り込みは呼び出し側で行う）
+--   - 最初の質問は一覧表示で50文字に切り詰めるため、51文字までに制限して転送量を抑える
+--   - idx_qa_session_messages_session (session_id, created_at) を使用
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_qa_session_meta(p_session_ids UUID[])
+RETURNS TABLE (session_id UUID, message_count INTEGER, first_user_message TEXT) AS $$
+    SELECT
+        s.id,
+        (
+            SELECT COUNT(*)::INTEGER
+            FROM qa_session_messages m
+            WHERE m.session_id = s.id
+        ),
+        (
+            SELECT LEFT(m.content, 51)
+            FROM qa_session_messages m
+            WHERE m.session_id = s.id AND m.role = 'user'
+            ORDER BY m.created_at
+            LIMIT 1
+        )
+    FROM unnest(p_session_ids) AS s(id);
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION get_qa_session_meta(UUID[])
+    IS 'セッションごとのメッセージ数と最初のユーザー質問（51文字まで）を返す';
+
+-- 呼び出しはバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION get_qa_session_meta(UUID[]) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,53 @@
+-- ============================================================================
+-- Migration: 20260116000011_add_qa_session_message.sql
+-- Description: QAセッションへのメッセージ追加を1回のRPCで行う関数
+-- ============================================================================
+--
+-- 目的:
+--   add_message の「既存ユーザーメッセージの確認 → INSERT → last_activity_at 更新」
+--   （3往復）を1往復にし、同一トランザクションで行う。
+--
+-- 設計:
+--   - 先に qa_sessions の行を UPDATE して行ロックを取り、同じセッションへの
+--     同時追加を直列化する（要約生成が二重に起動しない）
+--   - 最初のユーザーメッセージかどうかは INSERT 前の存在確認で判定し、BOOLEAN で返す
+--   - idx_qa_session_messages_session (session_id, created_at) を使用
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION add_qa_session_message(
+    p_session_id UUID,
+    p_role TEXT,
+    p_content TEXT,
+    p_source TEXT DEFAULT NULL,
+    p_reference TEXT DEFAULT NULL
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_is_first_user_message BOOLEAN := FALSE;
+BEGIN
+    UPDATE qa_sessions
+    SET last_activity_at = NOW()
+    WHERE id = p_session_id;
+
+    IF p_role = 'user' THEN
+        v_is_first_user_message := NOT EXISTS (
+            SELECT 1
+            FROM qa_session_messages
+            WHERE session_id = p_session_id AND role = 'user'
+        );
+    END IF;
+
+    INSERT INTO qa_session_messages (session_id, role, content, source, reference)
+    VALUES (p_session_id, p_role, p_content, p_source, p_reference);
+
+    RETURN v_is_first_user_message;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION add_qa_session_message(UUID, TEXT, TEXT, TEXT, TEXT)
+    IS 'QAセッションにメッセージを追加してlast_activity_atを更新し、最初のユーザーメッセージかどうかを返す';
+
+-- 呼び出しはバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION add_qa_session_message(UUID, TEXT, TEXT, TEXT, TEXT)
+    FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,62 @@
+-- ============================================================================
+-- Migration: 20260116000012_touch_qa_session_trigger.sql
+-- Description: メッセージ追加時に qa_sessions.last_activity_at をトリガーで更新する
+-- ============================================================================
+--
+-- 目的:
+--   last_activity_at の更新をアプリ側の UPDATE から AFTER INSERT トリガーに移し、
+--   どの経路で qa_session_messages に追加されてもセッションの最終活動日時が
+--   更新されるようにする。
+--
+-- 設計:
+--   - touch_qa_session(): NEW.session_id の last_activity_at を NOW() に更新
+--   - add_qa_session_message は UPDATE の代わりに SELECT ... FOR UPDATE で
+--     セッション行をロックし、同時追加の直列化を維持する
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION touch_qa_session()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE qa_sessions
+    SET last_activity_at = NOW()
+    WHERE id = NEW.session_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION touch_qa_session()
+    IS 'qa_session_messages 追加時に親セッションの last_activity_at を更新する';
+
+CREATE TRIGGER touch_qa_session
+    AFTER INSERT ON qa_session_messages
+    FOR EACH ROW EXECUTE FUNCTION touch_qa_session();
+
+CREATE OR REPLACE FUNCTION add_qa_session_message(
+    p_session_id UUID,
+    p_role TEXT,
+    p_content TEXT,
+    p_source TEXT DEFAULT NULL,
+    p_reference TEXT DEFAULT NULL
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_is_first_user_message BOOLEAN := FALSE;
+BEGIN
+    PERFORM 1 FROM qa_sessions WHERE id = p_session_id FOR UPDATE;
+
+    IF p_role = 'user' THEN
+        v_is_first_user_message := NOT EXISTS (
+            SELECT 1
+            FROM qa_session_messages
+            WHERE session_id = p_session_id AND role = 'user'
+        );
+    END IF;
+
+    -- last_activity_at は touch_qa_session トリガーで更新される
+    INSERT INTO qa_session_messages (session_id, role, content, source, reference)
+    VALUES (p_session_id, p_role, p_content, p_source, p_reference);
+
+    RETURN v_is_first_user_message;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
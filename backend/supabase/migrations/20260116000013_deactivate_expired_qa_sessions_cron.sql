@@ -0,0 +1,50 @@
+-- ============================================================================
+-- Migration: 20260116000013_deactivate_expired_qa_sessions_cron.sql
+-- Description: 期限切れQAセッションの非アクティブ化を pg_cron で定期実行する
+-- ============================================================================
+--
+-- 目的:
+--   6時間以上アクティビティがないセッションの非アクティブ化を、アプリ経由の
+--   PostgREST 呼び出しではなくDB内の定期ジョブで行う。
+--
+-- 設計:
+--   - deactivate_expired_qa_sessions(): 非アクティブ化した件数を返す
+--     （タイムアウト時間はバックエンドの SESSION_TIMEOUT_HOURS と同じ6時間）
+--   - 15分ごとに pg_cron で実行
+--   - アクティブなセッションだけを対象にした部分インデックスで UPDATE の検索を絞る
+--
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_cron WITH SCHEMA pg_catalog;
+
+CREATE INDEX IF NOT EXISTS idx_qa_sessions_active_last_activity
+    ON qa_sessions(last_activity_at)
+    WHERE is_active;
+
+CREATE OR REPLACE FUNCTION deactivate_expired_qa_sessions()
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    UPDATE qa_sessions
+    SET is_active = FALSE
+    WHERE is_active
+      AND last_activity_at < NOW() - INTERVAL '6 hours';
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+COMMENT ON FUNCTION deactivate_expired_qa_sessions()
+    IS '6時間以上アクティビティがないQAセッションを非アクティブ化し、件数を返す';
+
+-- 呼び出しは pg_cron（postgres）とバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION deactivate_expired_qa_sessions()
+    FROM PUBLIC, anon, authenticated;
+
+SELECT cron.schedule(
+    'deactivate-expired-qa-sessions',
+    '*/15 * * * *',
+    'SELECT deactivate_expired_qa_sessions()'
+);
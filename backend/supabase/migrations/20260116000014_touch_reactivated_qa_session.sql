@@ -0,0 +1,32 @@
+-- ============================================================================
+-- Migration: 20260116000014_touch_reactivated_qa_session.sql
+-- Description: セッション再開時の last_activity_at をDB側の時刻で設定する
+-- ============================================================================
+--
+-- 目的:
+--   resume_session がアプリ側の時刻（datetime.now）を送っていた
+--   last_activity_at を、BEFORE UPDATE トリガーで NOW() に設定する。
+--   メッセージ追加時（touch_qa_session）と同じくDBの時計に揃える。
+--
+-- 設計:
+--   - is_active が FALSE → TRUE に変わった行だけを対象にする
+--     （非アクティブ化や要約の更新では last_activity_at を変えない）
+--
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION touch_reactivated_qa_session()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.last_activity_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION touch_reactivated_qa_session()
+    IS 'QAセッションの再開（is_active が TRUE に変わった）時に last_activity_at を更新する';
+
+CREATE TRIGGER touch_reactivated_qa_session
+    BEFORE UPDATE OF is_active ON qa_sessions
+    FOR EACH ROW
+    WHEN (NEW.is_active AND NOT OLD.is_active)
+    EXECUTE FUNCTION touch_reactivated_qa_session();
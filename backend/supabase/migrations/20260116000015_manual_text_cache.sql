@@ -0,0 +1,36 @@
+-- ============================================================================
+-- Migration: 20260116000015_manual_text_cache.sql
+-- Description: 説明書PDFから抽出したテキストキャッシュをDBに保持する
+-- ============================================================================
+--
+-- 目的:
+--   QA回答ごとに Storage から text_cache.md をダウンロードしていたのをやめ、
+--   他のQA処理と同じDB接続への1回のSELECTでテキストを取得する。
+--
+-- 設計:
+--   - 製品は text_cache.md と同じく (manufacturer, model_number) で識別する
+--   - Storage の text_cache.md はバックアップとして引き続き保存する
+--   - 非常に長いテキスト（200万文字超）は本テーブルに保存せず Storage のみから読む
+--   - 既存のキャッシュは Storage から読んだ時点で本テーブルにコピーされる
+--   - バックエンド（service_role）のみが読み書きする。RLSポリシーは設定しない
+--
+-- ============================================================================
+
+CREATE TABLE manual_text_cache (
+    manufacturer TEXT NOT NULL,
+    model_number TEXT NOT NULL,
+    text_content TEXT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (manufacturer, model_number)
+);
+
+COMMENT ON TABLE manual_text_cache IS '説明書PDFから抽出したテキスト（Storage の text_cache.md と同内容）';
+COMMENT ON COLUMN manual_text_cache.text_content IS 'Gemini で抽出したMarkdownテキスト';
+COMMENT ON COLUMN manual_text_cache.updated_at IS '最終更新日時';
+
+CREATE TRIGGER update_manual_text_cache_updated_at
+    BEFORE UPDATE ON manual_text_cache
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE manual_text_cache ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- Migration: 20260116000016_qa_session_composite_indexes.sql
+-- Description: QAセッション関連の頻出クエリ条件に合わせた複合インデックスを追加する
+-- ============================================================================
+--
+-- 目的:
+--   セッション・メッセージ数の増加に伴い、質問ごとに実行される検索が
+--   単一カラムのインデックスからの再検査やソートで遅くなるのを防ぐ。
+--
+-- 設計:
+--   - idx_qa_sessions_user_appliance_active:
+--     アクティブセッションの取得（user_id, shared_appliance_id, is_active,
+--     last_activity_at 降順の LIMIT 1）と、新規作成時の非アクティブ化
+--   - idx_qa_sessions_group_appliance:
+--     グループ家電のセッション一覧（group_id, shared_appliance_id）
+--   - idx_qa_session_messages_session_user:
+--     get_qa_session_meta の最初のユーザー質問（role = 'user' を created_at 順）
+--   - (session_id, created_at) は idx_qa_session_messages_session が既にあるため追加しない
+--   - マイグレーションはトランザクション内で実行されるため CONCURRENTLY は使わない
+--
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_qa_sessions_user_appliance_active
+    ON qa_sessions(user_id, shared_appliance_id, last_activity_at DESC)
+    WHERE is_active;
+
+CREATE INDEX IF NOT EXISTS idx_qa_sessions_group_appliance
+    ON qa_sessions(group_id, shared_appliance_id)
+    WHERE group_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_qa_session_messages_session_user
+    ON qa_session_messages(session_id, created_at)
+    WHERE role = 'user';
@@ -0,0 +1,76 @@
+-- ============================================================================
+-- Migration: 20260116000017_qa_session_summary_backfill.sql
+-- Description: 保存されなかったQAセッション要約を定期ジョブで再生成するための関数
+-- ============================================================================
+--
+-- 目的:
+--   add_message 後のバックグラウンド要約がワーカー終了や Gemini の失敗で
+--   保存されなかったセッションを、Cron ジョブ（/api/v1/cron/backfill-session-summaries）
+--   で拾い直す。
+--
+-- 設計:
+--   - summary_attempts / summary_attempted_at: ジョブでの試行回数と最終試行日時
+--   - claim_qa_sessions_missing_summary(p_limit): 要約が未設定のセッションを
+--     FOR UPDATE SKIP LOCKED で確保し、試行を記録したうえで最初のユーザー質問
+--     （全文）を返す。同時に実行されたジョブ同士で同じセッションを取り合わない
+--   - 失敗したセッションは 1, 2, 4, 8 時間と間隔を空けて再試行し、5回で諦める
+--   - 最後のアクティビティから5分以内のセッションは、add_message の
+--     要約生成が実行中の可能性があるため対象外
+--
+-- ============================================================================
+
+ALTER TABLE qa_sessions
+    ADD COLUMN summary_attempts INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN summary_attempted_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN qa_sessions.summary_attempts IS '要約再生成ジョブでの試行回数';
+COMMENT ON COLUMN qa_sessions.summary_attempted_at IS '要約再生成ジョブでの最終試行日時';
+
+CREATE INDEX IF NOT EXISTS idx_qa_sessions_missing_summary
+    ON qa_sessions(last_activity_at)
+    WHERE summary IS NULL;
+
+CREATE OR REPLACE FUNCTION claim_qa_sessions_missing_summary(p_limit INTEGER)
+RETURNS TABLE (session_id UUID, question TEXT) AS $$
+    WITH claimed AS (
+        SELECT s.id
+        FROM qa_sessions s
+        WHERE s.summary IS NULL
+          AND s.summary_attempts < 5
+          AND (
+              s.summary_attempted_at IS NULL
+              OR s.summary_attempted_at
+                  < NOW() - INTERVAL '1 hour' * POWER(2, s.summary_attempts - 1)
+          )
+          AND s.last_activity_at < NOW() - INTERVAL '5 minutes'
+          AND EXISTS (
+              SELECT 1
+              FROM qa_session_messages m
+              WHERE m.session_id = s.id AND m.role = 'user'
+          )
+        ORDER BY s.last_activity_at DESC
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE qa_sessions s
+    SET summary_attempts = s.summary_attempts + 1,
+        summary_attempted_at = NOW()
+    FROM claimed c
+    WHERE s.id = c.id
+    RETURNING
+        s.id,
+        (
+            SELECT m.content
+            FROM qa_session_messages m
+            WHERE m.session_id = s.id AND m.role = 'user'
+            ORDER BY m.created_at
+            LIMIT 1
+        );
+$$ LANGUAGE sql VOLATILE;
+
+COMMENT ON FUNCTION claim_qa_sessions_missing_summary(INTEGER)
+    IS '要約が未設定のQAセッションを確保して試行を記録し、最初のユーザー質問を返す';
+
+-- 呼び出しはバックエンドサービス（service_role）のみ
+REVOKE EXECUTE ON FUNCTION claim_qa_sessions_missing_summary(INTEGER)
+    FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,8 @@
+"""Shared pytest setup for backend unit tests."""
+
+import os
+
+# Settings requires these at import time; unit tests never call the real APIs
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.setdefault("GOOGLE_CSE_API_KEY", "test")
+os.environ.setdefault("GOOGLE_CSE_ID", "test")
@@ -0,0 +1,32 @@
+"""Tests for the shared Gemini client transport."""
+
+import httpx
+import pytest
+from google.genai import _api_client
+
+from app.services import gemini_client
+
+
+@pytest.fixture
+def fresh_client():
+    gemini_client.get_gemini_client.cache_clear()
+    yield gemini_client.get_gemini_client
+    gemini_client.get_gemini_client.cache_clear()
+
+
+def test_async_transport_is_http2_httpx_pool(fresh_client):
+    api_client = fresh_client()._api_client
+
+    assert not api_client._use_aiohttp()
+    http_client = api_client._async_httpx_client
+    assert isinstance(http_client, httpx.AsyncClient)
+    pool = http_client._transport._pool
+    assert pool._http2
+    assert pool._keepalive_expiry == gemini_client.GEMINI_KEEPALIVE_EXPIRY
+
+
+def test_httpx_is_used_even_when_aiohttp_is_installed(fresh_client, monkeypatch):
+    # aiohttp is installed in production via pywebpush
+    monkeypatch.setattr(_api_client, "has_aiohttp", True)
+
+    assert not fresh_client()._api_client._use_aiohttp()
@@ -0,0 +1,78 @@
+"""Tests for moving user-added QA out of qa.md into qa_entries."""
+
+from app.services.qa_service import _merge_user_qa_entries
+from scripts.migrate_user_qa_entries import select_new_entries, split_user_entries
+
+GENERATED = """---
+appliance_id: 00000000-0000-0000-0000-000000000001
+manufacturer: Panasonic
+model_number: NA-LX129AL
+generated_at: 2026-01-01T00:00:00+00:00
+last_updated_at: 2026-01-01T00:00:00+00:00
+---
+
+# Panasonic NA-LX129AL よくある質問
+
+## 製品仕様
+
+### Q: 定格容量は？
+**A**: 洗濯12kg、乾燥6kgです。
+**参照**: P.50
+"""
+
+ENTRIES = [
+    {
+        "question": "糸くずフィルターの掃除方法は？",
+        "answer": "フィルターを外して水洗いしてください。",
+        "source": "text_cache",
+        "added_at": "2026-01-10T00:00:00+00:00",
+    },
+    {
+        "question": "エラーH21の意味は？",
+        "answer": "排水できません。\n排水ホースを確認してください。",
+        "source": "pdf",
+        "added_at": "2026-01-12T00:00:00+00:00",
+    },
+]
+
+
+def test_split_recovers_merged_entries():
+    merged = _merge_user_qa_entries(GENERATED, ENTRIES)
+
+    remaining, entries = split_user_entries(merged)
+
+    assert entries == ENTRIES
+    assert "(追加:" not in remaining
+    assert remaining.endswith("**参照**: P.50\n")
+
+
+def test_split_without_user_entries_keeps_content():
+    remaining, entries = split_user_entries(GENERATED)
+
+    assert entries == []
+    assert remaining == GENERATED
+
+
+def test_split_then_merge_restores_the_entries():
+    merged = _merge_user_qa_entries(GENERATED, ENTRIES)
+    remaining, entries = split_user_entries(merged)
+
+    assert split_user_entries(_merge_user_qa_entries(remaining, entries))[1] == entries
+
+
+def test_select_new_entries_skips_rows_already_inserted():
+    # Rows as returned by PostgREST after an earlier, interrupted run
+    existing = [
+        {"question": ENTRIES[0]["question"], "added_at": "2026-01-10T00:00:00+00:00"}
+    ]
+
+    assert select_new_entries(ENTRIES, existing) == ENTRIES[1:]
+
+
+def test_select_new_entries_matches_on_question_and_date():
+    existing = [
+        {"question": ENTRIES[0]["question"], "added_at": "2026-01-11T00:00:00+00:00"},
+        {"question": "別の質問", "added_at": "2026-01-12T00:00:00+00:00"},
+    ]
+
+    assert select_new_entries(ENTRIES, existing) == ENTRIES
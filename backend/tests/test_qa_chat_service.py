@@ -0,0 +1,72 @@
+"""Tests for the speculative step gate of the streaming QA pipeline."""
+
+import pytest
+
+from app.services import qa_chat_service
+from app.services.qa_chat_service import (
+    SPECULATION_MIN_SAMPLES,
+    SourceStep,
+    _record_self_check,
+    _should_speculate,
+)
+
+
+async def _no_answer():
+    return None
+
+
+def _step(step: int, **kwargs) -> SourceStep:
+    return SourceStep(
+        step=step,
+        source="text_cache",
+        run=_no_answer,
+        start_name="",
+        found_name="",
+        not_found_name="",
+        timeout_name="",
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_history():
+    qa_chat_service._self_check_history.clear()
+    yield
+    qa_chat_service._self_check_history.clear()
+
+
+def test_speculates_cheap_step_without_history():
+    assert _should_speculate("qa", _step(2))
+
+
+def test_never_speculates_final_step():
+    assert not _should_speculate("text_cache", _step(3, final=True))
+
+
+def test_respects_worthwhile_gate():
+    assert not _should_speculate("qa", _step(2, worthwhile=lambda: False))
+    assert _should_speculate("qa", _step(2, worthwhile=lambda: True))
+
+
+def test_stops_speculating_when_answers_reliably_pass():
+    for _ in range(SPECULATION_MIN_SAMPLES):
+        _record_self_check("qa", True)
+
+    assert not _should_speculate("qa", _step(2))
+
+
+def test_speculates_when_answers_are_often_rejected():
+    for i in range(SPECULATION_MIN_SAMPLES):
+        _record_self_check("qa", i % 3 != 0)
+
+    assert _should_speculate("qa", _step(2))
+
+
+def test_history_is_per_source_and_bounded():
+    for _ in range(qa_chat_service.SPECULATION_WINDOW):
+        _record_self_check("qa", False)
+    for _ in range(qa_chat_service.SPECULATION_WINDOW):
+        _record_self_check("qa", True)
+
+    assert list(qa_chat_service._self_check_history["qa"]).count(False) == 0
+    assert "text_cache" not in qa_chat_service._self_check_history
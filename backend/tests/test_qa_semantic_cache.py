@@ -0,0 +1,131 @@
+"""Tests for the in-process semantic answer cache."""
+
+import math
+
+import pytest
+
+from app.services import qa_semantic_cache
+from app.services.qa_semantic_cache import (
+    SEMANTIC_CACHE_THRESHOLD,
+    _normalize,
+    lookup_answer,
+    store_answer,
+)
+
+PRODUCT = ("Panasonic", "NA-LX129AL")
+
+
+def _vector_at_distance(distance: float):
+    """Return a unit vector whose cosine distance from [1, 0, 0] is ``distance``."""
+    cos = 1 - distance
+    return _normalize([cos, math.sqrt(1 - cos * cos), 0.0])
+
+
+BASE = _normalize([1.0, 0.0, 0.0])
+NEAR = _vector_at_distance(SEMANTIC_CACHE_THRESHOLD / 3)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    qa_semantic_cache._entries.clear()
+    yield
+    qa_semantic_cache._entries.clear()
+
+
+def test_paraphrase_within_threshold_hits():
+    store_answer(*PRODUCT, "フィルターの掃除方法を教えて", BASE, {"answer": "A"})
+
+    result = lookup_answer(*PRODUCT, "フィルターの掃除方法を教えてください", NEAR)
+
+    assert result == {"answer": "A"}
+
+
+@pytest.mark.parametrize(
+    ("cached_question", "question"),
+    [
+        ("フィルターの掃除方法を教えて", "フィルターの交換時期を教えて"),
+        ("タイマーを1時間に設定するには？", "タイマーを2時間に設定するには？"),
+        ("乾燥フィルターの外し方は？", "排水フィルターの外し方は？"),
+        ("エラーH21の意味は？", "エラーH27の意味は？"),
+    ],
+)
+def test_near_miss_question_does_not_get_other_answer(cached_question, question):
+    store_answer(*PRODUCT, cached_question, BASE, {"answer": "A"})
+
+    # Even an embedding almost identical to the cached one must not match
+    assert lookup_answer(*PRODUCT, question, NEAR) is None
+
+
+def test_key_words_ignore_width_and_case():
+    store_answer(*PRODUCT, "ＷｉＦｉの設定方法は？", BASE, {"answer": "A"})
+
+    assert lookup_answer(*PRODUCT, "wifiの設定方法は？", NEAR) == {"answer": "A"}
+
+
+def test_distance_above_threshold_misses():
+    question = "フィルターの掃除方法を教えて"
+    store_answer(*PRODUCT, question, BASE, {"answer": "A"})
+
+    far = _vector_at_distance(SEMANTIC_CACHE_THRESHOLD * 1.2)
+    assert lookup_answer(*PRODUCT, question, far) is None
+
+
+def test_closest_entry_wins():
+    question = "フィルターの掃除方法を教えて"
+    store_answer(
+        *PRODUCT,
+        question,
+        _vector_at_distance(SEMANTIC_CACHE_THRESHOLD / 2),
+        {"answer": "farther"},
+    )
+    store_answer(*PRODUCT, question, BASE, {"answer": "closest"})
+
+    assert lookup_answer(*PRODUCT, question, BASE) == {"answer": "closest"}
+
+
+def test_other_product_misses():
+    question = "フィルターの掃除方法を教えて"
+    store_answer(*PRODUCT, question, BASE, {"answer": "A"})
+
+    assert lookup_answer("Panasonic", "NA-LX127AL", question, BASE) is None
+
+
+def test_least_recently_used_product_is_evicted(monkeypatch):
+    monkeypatch.setattr(qa_semantic_cache, "SEMANTIC_CACHE_MAX_PRODUCTS", 2)
+    question = "フィルターの掃除方法を教えて"
+    store_answer("M", "A", question, BASE, {"answer": "A"})
+    store_answer("M", "B", question, BASE, {"answer": "B"})
+
+    # A lookup marks product A as recently used, so B is evicted instead
+    assert lookup_answer("M", "A", question, BASE) is not None
+    store_answer("M", "C", question, BASE, {"answer": "C"})
+
+    assert list(qa_semantic_cache._entries) == [("M", "A"), ("M", "C")]
+
+
+def test_entries_per_product_are_bounded(monkeypatch):
+    monkeypatch.setattr(qa_semantic_cache, "SEMANTIC_CACHE_MAX_ENTRIES", 3)
+    for i in range(5):
+        store_answer(*PRODUCT, f"質問{i}", BASE, {"answer": i})
+
+    entries = qa_semantic_cache._entries[PRODUCT]
+    assert [result["answer"] for *_, result in entries] == [2, 3, 4]
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    question = "フィルターの掃除方法を教えて"
+    now = 1000.0
+    monkeypatch.setattr(qa_semantic_cache.time, "monotonic", lambda: now)
+    store_answer(*PRODUCT, question, BASE, {"answer": "A"})
+
+    now += qa_semantic_cache.SEMANTIC_CACHE_TTL
+    assert lookup_answer(*PRODUCT, question, BASE) is None
+    assert PRODUCT not in qa_semantic_cache._entries
+
+
+def test_vectors_are_stored_as_float32_arrays():
+    store_answer(*PRODUCT, "質問", _normalize([3.0, 4.0]), {"answer": "A"})
+
+    (_, embedding, _, _) = qa_semantic_cache._entries[PRODUCT][0]
+    assert embedding.typecode == "f"
+    assert embedding.itemsize == 4
@@ -0,0 +1,101 @@
+"""Tests for merging user-added QA rows into the QA markdown."""
+
+from app.services.qa_service import (
+    _merge_user_qa_entries,
+    _render_user_qa_entry,
+    count_qa_items,
+    parse_qa_metadata,
+)
+
+GENERATED = """---
+appliance_id: 00000000-0000-0000-0000-000000000001
+manufacturer: Panasonic
+model_number: NA-LX129AL
+generated_at: 2026-01-01T00:00:00+00:00
+last_updated_at: 2026-01-01T00:00:00+00:00
+---
+
+# Panasonic NA-LX129AL よくある質問
+
+## 製品仕様
+
+### Q: 定格容量は？
+**A**: 洗濯12kg、乾燥6kgです。
+**参照**: P.50
+
+"""
+
+ENTRIES = [
+    {
+        "question": "糸くずフィルターの掃除方法は？",
+        "answer": "フィルターを外して水洗いしてください。",
+        "source": "text_cache",
+        "added_at": "2026-01-10T03:04:05.123456+00:00",
+    },
+    {
+        "question": "エラーH21の意味は？",
+        "answer": "排水できません。\n排水ホースを確認してください。",
+        "source": "pdf",
+        "added_at": "2026-01-12T08:00:00+00:00",
+    },
+]
+
+
+def _append_to_markdown(content: str, question: str, answer: str, source: str, date):
+    """The way user-added QA used to be appended to qa.md itself."""
+    return (
+        content.rstrip()
+        + f"""
+### Q: {question} (追加: {date})
+**A**: {answer}
+**ソース**: {source}
+"""
+    )
+
+
+def test_render_user_qa_entry_uses_the_added_date():
+    assert _render_user_qa_entry(ENTRIES[0]) == (
+        "\n### Q: 糸くずフィルターの掃除方法は？ (追加: 2026-01-10)\n"
+        "**A**: フィルターを外して水洗いしてください。\n"
+        "**ソース**: text_cache\n"
+    )
+
+
+def test_merge_without_entries_returns_content_unchanged():
+    assert _merge_user_qa_entries(GENERATED, []) is GENERATED
+
+
+def test_merge_matches_appending_to_qa_markdown():
+    expected = GENERATED
+    for entry in ENTRIES:
+        expected = _append_to_markdown(
+            expected,
+            entry["question"],
+            entry["answer"],
+            entry["source"],
+            entry["added_at"][:10],
+        )
+
+    merged = _merge_user_qa_entries(GENERATED, ENTRIES)
+
+    # Only last_updated_at differs: it comes from the newest row
+    assert merged == expected.replace(
+        "last_updated_at: 2026-01-01T00:00:00+00:00",
+        "last_updated_at: 2026-01-12T08:00:00+00:00",
+    )
+
+
+def test_merge_updates_metadata_and_item_count():
+    merged = _merge_user_qa_entries(GENERATED, ENTRIES)
+
+    metadata = parse_qa_metadata(merged)
+    assert metadata.last_updated_at.isoformat() == "2026-01-12T08:00:00+00:00"
+    assert count_qa_items(merged) == 3
+
+
+def test_merging_into_merged_content_appends_one_entry():
+    merged = _merge_user_qa_entries(GENERATED, ENTRIES[:1])
+
+    assert _merge_user_qa_entries(merged, ENTRIES[1:]) == _merge_user_qa_entries(
+        GENERATED, ENTRIES
+    )
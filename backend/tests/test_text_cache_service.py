@@ -0,0 +1,57 @@
+"""Tests for the in-process decoded text cache."""
+
+import sys
+
+import pytest
+
+from app.services import text_cache_service
+from app.services.text_cache_service import _remember_text_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    text_cache_service._text_cache.clear()
+    # Room for two of the 1000-character texts below, but not three
+    budget = sys.getsizeof("a" * 1000) * 2 + 100
+    monkeypatch.setattr(text_cache_service, "TEXT_CACHE_MAX_BYTES", budget)
+    yield
+    text_cache_service._text_cache.clear()
+
+
+def test_oldest_text_is_evicted_when_over_byte_budget():
+    _remember_text_cache(("M", "A"), "a" * 1000)
+    _remember_text_cache(("M", "B"), "b" * 1000)
+    _remember_text_cache(("M", "C"), "c" * 1000)
+
+    assert list(text_cache_service._text_cache) == [("M", "B"), ("M", "C")]
+
+
+def test_large_text_evicts_several_entries():
+    _remember_text_cache(("M", "A"), "a" * 1000)
+    _remember_text_cache(("M", "B"), "b" * 1000)
+    _remember_text_cache(("M", "C"), "c" * 1900)
+
+    assert list(text_cache_service._text_cache) == [("M", "C")]
+
+
+def test_text_over_whole_budget_is_not_cached():
+    _remember_text_cache(("M", "A"), "a" * 1000)
+    _remember_text_cache(("M", "B"), "b" * 5000)
+
+    assert list(text_cache_service._text_cache) == [("M", "A")]
+
+
+def test_non_ascii_text_is_measured_in_bytes():
+    # Japanese text takes 2 bytes per character in memory
+    _remember_text_cache(("M", "A"), "a" * 1000)
+    _remember_text_cache(("M", "B"), "あ" * 1000)
+
+    assert list(text_cache_service._text_cache) == [("M", "B")]
+
+
+def test_replacing_a_product_does_not_count_its_old_text():
+    _remember_text_cache(("M", "A"), "a" * 1000)
+    _remember_text_cache(("M", "B"), "b" * 1000)
+    _remember_text_cache(("M", "B"), "B" * 1000)
+
+    assert list(text_cache_service._text_cache) == [("M", "A"), ("M", "B")]
@@ -221,6 +221,9 @@ QA機能をご利用いただくには、ログインが必要です。
       let buffer = '';
       const completedSteps: number[] = [];
       const timedOutSteps: number[] = [];
+      // 生成中の回答（answer_delta）を表示するメッセージ
+      const streamingId = (Date.now() + 1).toString();
+      let streamingContent = '';
 
       while (true) {
         const { done, value } = await reader.read();
@@ -263,6 +266,23 @@ QA機能をご利用いただくには、ログインが必要です。
                       }
                     : null
                 );
+              } else if (event.event === 'answer_delta' && event.delta) {
+                const isFirstDelta = streamingContent === '';
+                streamingContent += event.delta;
+                const content = streamingContent;
+                setMessages((prev) =>
+                  isFirstDelta
+                    ? [
+                        ...prev,
+                        {
+                          id: streamingId,
+                          type: 'assistant',
+                          content,
+                          timestamp: new Date(),
+                        },
+                      ]
+                    : prev.map((m) => (m.id === streamingId ? { ...m, content } : m))
+                );
               } else if (event.event === 'answer') {
                 // セッションIDを更新
                 if (event.session_id && event.session_id !== currentSessionId) {
@@ -271,7 +291,7 @@ QA機能をご利用いただくには、ログインが必要です。
                 }
 
                 const assistantMessage: ChatMessage = {
-                  id: (Date.now() + 1).toString(),
+                  id: streamingId,
                   type: 'assistant',
                   content: event.answer || '',
                   source: event.source,
@@ -282,7 +302,12 @@ QA機能をご利用いただくには、ログインが必要です。
                   needsVerification: event.needs_verification,
                   usedGeneralKnowledge: event.used_general_knowledge,
                 };
-                setMessages((prev) => [...prev, assistantMessage]);
+                // 生成中のメッセージがあれば確定版で置き換える
+                setMessages((prev) =>
+                  streamingContent
+                    ? prev.map((m) => (m.id === streamingId ? assistantMessage : m))
+                    : [...prev, assistantMessage]
+                );
                 setSearchProgress(null);
               } else if (event.event === 'error') {
                 throw new Error(event.error || 'Unknown error');
@@ -68,10 +68,17 @@ export interface ChatMessage {
 
 // SSEストリーミングイベント
 export interface QAStreamEvent {
-  event: 'step_start' | 'step_complete' | 'step_timeout' | 'answer' | 'error';
+  event:
+    | 'step_start'
+    | 'step_complete'
+    | 'step_timeout'
+    | 'answer_delta'
+    | 'answer'
+    | 'error';
   step?: number; // 1, 1.5, 2, 2.5, 3, 3.5（小数点は検証ステップ）
   step_name?: string;
   answer?: string;
+  delta?: string; // answer_delta: 生成中の回答の差分テキスト
   source?: 'qa' | 'text_cache' | 'pdf' | 'none';
   reference?: string | null;
   added_to_qa?: boolean;
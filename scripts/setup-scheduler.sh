@@ -2,7 +2,8 @@
 # =============================================================================
 # Cloud Scheduler セットアップスクリプト
 #
-# メンテナンスリマインド通知を定期実行するためのCloud Schedulerジョブを作成
+# メンテナンスリマインド通知と、QAセッション要約の再生成を定期実行するための
+# Cloud Schedulerジョブを作成
 #
 # 使用方法:
 #   ./scripts/setup-scheduler.sh              # ジョブ作成
@@ -18,6 +19,7 @@ PROJECT_ID="${GCP_PROJECT_ID:-manual-agent-prod}"
 REGION="${GCP_REGION:-asia-northeast1}"
 SERVICE_NAME="${CLOUD_RUN_SERVICE:-manual-agent-api}"
 JOB_NAME="${SCHEDULER_JOB_NAME:-maintenance-reminder-hourly}"
+SUMMARY_JOB_NAME="${SUMMARY_SCHEDULER_JOB_NAME:-qa-session-summary-backfill}"
 
 # --- 色付き出力 ---
 RED='\033[0;31m'
@@ -40,6 +42,17 @@ get_service_url() {
         --format "value(status.url)" 2>/dev/null
 }
 
+delete_job_if_exists() {
+    local name="$1"
+    if gcloud scheduler jobs describe "${name}" --location="${REGION}" --project="${PROJECT_ID}" &>/dev/null; then
+        log_warn "既存のジョブ '${name}' を削除します..."
+        gcloud scheduler jobs delete "${name}" \
+            --location="${REGION}" \
+            --project="${PROJECT_ID}" \
+            --quiet
+    fi
+}
+
 get_cron_secret() {
     # \r と \n を除去して純粋な秘密値のみを返す
     gcloud secrets versions access latest --secret=CRON_SECRET_KEY --project="${PROJECT_ID}" 2>/dev/null | tr -d '\r\n'
@@ -83,13 +96,8 @@ create_job() {
     log_info "スケジュール: 毎時0分 (JST)"
 
     # 既存のジョブがあれば削除
-    if gcloud scheduler jobs describe "${JOB_NAME}" --location="${REGION}" --project="${PROJECT_ID}" &>/dev/null; then
-        log_warn "既存のジョブ '${JOB_NAME}' を削除します..."
-        gcloud scheduler jobs delete "${JOB_NAME}" \
-            --location="${REGION}" \
-            --project="${PROJECT_ID}" \
-            --quiet
-    fi
+    delete_job_if_exists "${JOB_NAME}"
+    delete_job_if_exists "${SUMMARY_JOB_NAME}"
 
     # Cloud Scheduler ジョブを作成
     # 毎時0分に実行（JST = UTC+9）
@@ -104,12 +112,25 @@ create_job() {
         --attempt-deadline="60s" \
         --description="Hourly maintenance reminder notifications"
 
+    # QAセッション要約の再生成（30分ごと）
+    gcloud scheduler jobs create http "${SUMMARY_JOB_NAME}" \
+        --location="${REGION}" \
+        --project="${PROJECT_ID}" \
+        --schedule="*/30 * * * *" \
+        --time-zone="Asia/Tokyo" \
+        --uri="${SERVICE_URL}/api/v1/cron/backfill-session-summaries" \
+        --http-method=POST \
+        --headers="Content-Type=application/json,X-Cron-Secret=${CRON_SECRET}" \
+        --attempt-deadline="120s" \
+        --description="Backfill missing QA session summaries"
+
     log_success "Cloud Scheduler ジョブを作成しました!"
     echo ""
     echo -e "${GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${NC}"
     echo -e "${GREEN}  ジョブ名: ${JOB_NAME}${NC}"
     echo -e "${GREEN}  スケジュール: 毎時0分 (Asia/Tokyo)${NC}"
     echo -e "${GREEN}  エンドポイント: ${ENDPOINT}${NC}"
+    echo -e "${GREEN}  ジョブ名: ${SUMMARY_JOB_NAME}（30分ごと、QAセッション要約の再生成）${NC}"
     echo -e "${GREEN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${NC}"
     echo ""
     echo "手動実行でテスト: ./scripts/setup-scheduler.sh --trigger"
@@ -118,29 +139,33 @@ create_job() {
 delete_job() {
     log_info "Cloud Scheduler ジョブを削除中..."
 
-    if gcloud scheduler jobs describe "${JOB_NAME}" --location="${REGION}" --project="${PROJECT_ID}" &>/dev/null; then
-        gcloud scheduler jobs delete "${JOB_NAME}" \
-            --location="${REGION}" \
-            --project="${PROJECT_ID}" \
-            --quiet
-        log_success "ジョブ '${JOB_NAME}' を削除しました"
-    else
-        log_warn "ジョブ '${JOB_NAME}' は存在しません"
-    fi
+    for name in "${JOB_NAME}" "${SUMMARY_JOB_NAME}"; do
+        if gcloud scheduler jobs describe "${name}" --location="${REGION}" --project="${PROJECT_ID}" &>/dev/null; then
+            gcloud scheduler jobs delete "${name}" \
+                --location="${REGION}" \
+                --project="${PROJECT_ID}" \
+                --quiet
+            log_success "ジョブ '${name}' を削除しました"
+        else
+            log_warn "ジョブ '${name}' は存在しません"
+        fi
+    done
 }
 
 show_status() {
     log_info "Cloud Scheduler ジョブの状態を確認中..."
 
-    if gcloud scheduler jobs describe "${JOB_NAME}" --location="${REGION}" --project="${PROJECT_ID}" &>/dev/null; then
-        echo ""
-        gcloud scheduler jobs describe "${JOB_NAME}" \
-            --location="${REGION}" \
-            --project="${PROJECT_ID}" \
-            --format="yaml(name,schedule,timeZone,state,lastAttemptTime,scheduleTime,httpTarget.uri)"
-    else
-        log_warn "ジョブ '${JOB_NAME}' は存在しません"
-    fi
+    for name in "${JOB_NAME}" "${SUMMARY_JOB_NAME}"; do
+        if gcloud scheduler jobs describe "${name}" --location="${REGION}" --project="${PROJECT_ID}" &>/dev/null; then
+            echo ""
+            gcloud scheduler jobs describe "${name}" \
+                --location="${REGION}" \
+                --project="${PROJECT_ID}" \
+                --format="yaml(name,schedule,timeZone,state,lastAttemptTime,scheduleTime,httpTarget.uri)"
+        else
+            log_warn "ジョブ '${name}' は存在しません"
+        fi
+    done
 }
 
 trigger_job() {
@@ -176,6 +201,7 @@ show_usage() {
     echo "  GCP_REGION           リージョン (default: asia-northeast1)"
     echo "  CLOUD_RUN_SERVICE    Cloud Run サービス名 (default: manual-agent-api)"
     echo "  SCHEDULER_JOB_NAME   Scheduler ジョブ名 (default: maintenance-reminder-hourly)"
+    echo "  SUMMARY_SCHEDULER_JOB_NAME  要約再生成ジョブ名 (default: qa-session-summary-backfill)"
 }
 
 # --- メイン ---